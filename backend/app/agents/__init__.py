@@ -1,5 +1,20 @@
-from app.agents.graph import create_graph, run_graph
-from app.agents.nodes import AnalysisState
+import importlib
 
 
-__all__ = ["run_graph", "create_graph", "AnalysisState"]
+# The agent stack pulls in langgraph/langchain/openai, so its exports are
+# resolved on first access instead of when the package is imported
+_EXPORTS = {
+    "run_graph": "app.agents.graph",
+    "create_graph": "app.agents.graph",
+    "AnalysisState": "app.agents.nodes",
+    "ContinuousTriage": "app.agents.continuous",
+    "continuous_triage": "app.agents.continuous",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name]), name)
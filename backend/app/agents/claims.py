@@ -0,0 +1,153 @@
+import asyncio
+import datetime as dt
+
+from sqlalchemy import and_, case, literal, or_, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+from app.agents.prompts import PROMPT_VERSION
+from app.config import CLAIM_LEASE_SECONDS, MODEL, setup_logger
+from app.database import get_db_session
+from app.models import Ticket, utc_now
+
+
+logger = setup_logger(__name__)
+
+
+def stale_condition() -> ColumnElement[bool]:
+    """
+    Completed tickets whose text, model or prompt version changed since
+    their last analysis
+    """
+    return and_(
+        Ticket.status == "complete",
+        or_(
+            Ticket.fingerprint.is_(None),
+            Ticket.analyzed_fingerprint.is_(None),
+            Ticket.analyzed_fingerprint != Ticket.fingerprint,
+            Ticket.analyzed_model.is_distinct_from(MODEL),
+            Ticket.analyzed_prompt_version.is_distinct_from(PROMPT_VERSION),
+        ),
+    )
+
+
+def claim_tickets(
+    db: Session,
+    analysis_run_id: str,
+    ticket_ids: list[str] | None = None,
+    mode: str = "incomplete",
+    queue: str | None = None,
+) -> list[Ticket]:
+    """
+    Atomically marks the selected tickets (of `queue`, if given)
+    `in_progress` for this run and returns them. Tickets claimed by another run are skipped until that
+    claim's lease expires; claims of the same run (e.g. its shards) are
+    taken over
+    """
+    now = utc_now()
+    if mode == "stale":
+        selectable = stale_condition()
+    else:
+        selectable = Ticket.status == "incomplete"
+    reclaimable = and_(
+        Ticket.status == "in_progress",
+        or_(
+            Ticket.claim_expires_at < now,
+            Ticket.claimed_by_run_id == analysis_run_id,
+        ),
+    )
+
+    candidates = (
+        select(Ticket.id)
+        .where(or_(selectable, reclaimable))
+        .with_for_update(skip_locked=True)
+    )
+    if ticket_ids:
+        candidates = candidates.where(Ticket.id.in_(ticket_ids))
+    if queue:
+        candidates = candidates.where(Ticket.queue == queue)
+
+    tickets = db.scalars(
+        update(Ticket)
+        .where(Ticket.id.in_(candidates.scalar_subquery()))
+        .values(
+            status="in_progress",
+            claimed_by_run_id=analysis_run_id,
+            claim_expires_at=now + dt.timedelta(seconds=CLAIM_LEASE_SECONDS),
+        )
+        .returning(Ticket)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    # Detached before the commit so they stay loaded for the graph
+    for ticket in tickets:
+        db.expunge(ticket)
+    db.commit()
+    return tickets
+
+
+def renew_ticket_claims(
+    db: Session, analysis_run_id: str, ticket_ids: list[str] | None = None
+) -> None:
+    query = update(Ticket).where(
+        Ticket.claimed_by_run_id == analysis_run_id,
+        Ticket.status == "in_progress",
+    )
+    if ticket_ids:
+        query = query.where(Ticket.id.in_(ticket_ids))
+
+    db.execute(
+        query.values(
+            claim_expires_at=utc_now()
+            + dt.timedelta(seconds=CLAIM_LEASE_SECONDS)
+        ).execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def release_ticket_claims(
+    db: Session, analysis_run_id: str, ticket_ids: list[str] | None = None
+) -> int:
+    """
+    Hands back tickets this run claimed but did not complete, restoring
+    the status they had before the claim
+    """
+    query = update(Ticket).where(
+        Ticket.claimed_by_run_id == analysis_run_id,
+        Ticket.status == "in_progress",
+    )
+    if ticket_ids:
+        query = query.where(Ticket.id.in_(ticket_ids))
+
+    released = db.execute(
+        query.values(
+            status=case(
+                (
+                    Ticket.last_analyzed_at.is_(None),
+                    literal("incomplete", Ticket.status.type),
+                ),
+                else_=literal("complete", Ticket.status.type),
+            ),
+            claimed_by_run_id=None,
+            claim_expires_at=None,
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return released
+
+
+async def keep_ticket_claims(
+    analysis_run_id: str, ticket_ids: list[str] | None = None
+) -> None:
+    """
+    Extends this run's claims until cancelled, so long runs keep them
+    """
+    while True:
+        await asyncio.sleep(CLAIM_LEASE_SECONDS / 3)
+        db = get_db_session()
+        try:
+            renew_ticket_claims(db, analysis_run_id, ticket_ids)
+        except Exception as e:
+            logger.warning(f"Failed to renew claims of run {analysis_run_id}: {e}")
+        finally:
+            db.close()
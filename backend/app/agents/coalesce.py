@@ -0,0 +1,45 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: while a call for `key` is running,
+    further callers await the same task instead of starting their own
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, tuple[asyncio.Task, Any]] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def start(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        tag: Any = None,
+    ) -> tuple[asyncio.Task, Any]:
+        """
+        The in-flight task for `key` and the `tag` it was started with
+        (e.g. a run id), starting it from `factory` if there is none
+        """
+        if key not in self._inflight:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = (task, tag)
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return self._inflight[key]
+
+    async def run(
+        self, key: Hashable, factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        task, _ = self.start(key, factory)
+        # A disconnecting caller must not cancel the run the others await
+        return await asyncio.shield(task)
+
+
+analysis_requests = SingleFlight()
@@ -0,0 +1,130 @@
+import asyncio
+import uuid
+
+from app.config import (
+    CONTINUOUS_MAX_BATCH,
+    CONTINUOUS_MAX_LATENCY,
+    SUMMARY_INTERVAL,
+    setup_logger,
+)
+from app.database import get_db_session
+
+
+logger = setup_logger(__name__)
+
+
+class ContinuousTriage:
+    """
+    Long-running consumer that triages tickets shortly after they arrive.
+
+    New ticket ids are micro-batched (up to `max_batch` tickets or
+    `max_latency` seconds) through the analysis graph without a summary.
+    All batches inside one `summary_interval` share a single AnalysisRun,
+    which gets its rolling summary when the window closes.
+    """
+
+    def __init__(
+        self,
+        max_batch: int = CONTINUOUS_MAX_BATCH,
+        max_latency: float = CONTINUOUS_MAX_LATENCY,
+        summary_interval: float = SUMMARY_INTERVAL,
+    ):
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.summary_interval = summary_interval
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[str] | None = None
+        self._lock = asyncio.Lock()
+        self._tasks: list[asyncio.Task] = []
+        self._run_id: str | None = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._consume()),
+            asyncio.create_task(self._summarize_periodically()),
+        ]
+        logger.info("Continuous triage STARTED", "BLUE")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._close_window()
+        logger.info("Continuous triage STOPPED", "BLUE")
+
+    def enqueue(self, ticket_ids: list[str]) -> None:
+        """
+        Thread-safe, so sync endpoints running in the threadpool can call it
+        """
+        if not self.running:
+            return
+        for ticket_id in ticket_ids:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, ticket_id)
+
+    async def _next_batch(self) -> list[str]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_latency
+
+        while len(batch) < self.max_batch:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                )
+            except TimeoutError:
+                break
+        return batch
+
+    async def _consume(self) -> None:
+        # Deferred so the API can import this module without the agent stack
+        from app.agents.graph import run_graph
+
+        while True:
+            ticket_ids = await self._next_batch()
+            async with self._lock:
+                if not self._run_id:
+                    self._run_id = str(uuid.uuid4())
+
+                logger.info(
+                    f"Continuous triage of {len(ticket_ids)} tickets into run {self._run_id[:8]}...",
+                    "CYAN",
+                )
+                db = get_db_session()
+                try:
+                    await run_graph(
+                        db, self._run_id, ticket_ids, summarize=False
+                    )
+                except Exception as e:
+                    logger.error(f"Continuous triage batch failed: {e}")
+                finally:
+                    db.close()
+
+    async def _summarize_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.summary_interval)
+            await self._close_window()
+
+    async def _close_window(self) -> None:
+        from app.agents.nodes import summarize_run
+
+        async with self._lock:
+            run_id, self._run_id = self._run_id, None
+            if not run_id:
+                return
+            try:
+                await summarize_run(run_id)
+            except Exception as e:
+                logger.error(f"Rolling summary for run {run_id} failed: {e}")
+
+
+continuous_triage = ContinuousTriage()
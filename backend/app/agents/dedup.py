@@ -0,0 +1,131 @@
+import re
+
+import numpy as np
+
+from app.agents.scheduler import priority_score
+from app.config import (
+    DEDUP_SHINGLE_SIZE,
+    DEDUP_THRESHOLD,
+    LSH_BANDS,
+    MINHASH_PERMUTATIONS,
+    setup_logger,
+)
+from app.models import Ticket
+
+
+logger = setup_logger(__name__)
+
+# Largest 32-bit prime, shingles and hashes stay below it so the
+# universal hash (a * x + b) never overflows uint64
+_PRIME = np.uint64(4294967291)
+_SEED = 20240101
+
+_WHITESPACE = re.compile(r"\s+")
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_text(ticket: Ticket) -> str:
+    """
+    Lowercased title and cleaned description with numbers masked, so
+    tickets that only differ by ids, counts, timestamps or their quoted
+    history look alike
+    """
+    description = ticket.clean_description or ticket.description or ""
+    text = f"{ticket.title or ''} {description}".lower()
+    text = _DIGITS.sub("0", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def shingle(text: str, size: int = DEDUP_SHINGLE_SIZE) -> np.ndarray:
+    """
+    Distinct byte `size`-grams of `text`, each packed into an integer
+    """
+    data = np.frombuffer(text.encode(), dtype=np.uint8)
+    if len(data) < size:
+        data = np.pad(data, (0, size - len(data)))
+
+    windows = np.lib.stride_tricks.sliding_window_view(data, size)
+    weights = np.uint64(256) ** np.arange(size, dtype=np.uint64)
+    packed = windows.astype(np.uint64) @ weights
+    return np.unique(packed % _PRIME)
+
+
+def minhash_signatures(
+    shingle_sets: list[np.ndarray], num_perm: int = MINHASH_PERMUTATIONS
+) -> np.ndarray:
+    """
+    One row of `num_perm` minimum hash values per shingle set
+    """
+    rng = np.random.default_rng(_SEED)
+    a = rng.integers(1, 2**31, num_perm, dtype=np.uint64)
+    b = rng.integers(0, 2**31, num_perm, dtype=np.uint64)
+
+    signatures = np.empty((len(shingle_sets), num_perm), dtype=np.uint64)
+    for i, shingles in enumerate(shingle_sets):
+        hashed = (np.outer(shingles, a) + b) % _PRIME
+        signatures[i] = hashed.min(axis=0)
+    return signatures
+
+
+def lsh_clusters(
+    signatures: np.ndarray,
+    bands: int = LSH_BANDS,
+    threshold: float = DEDUP_THRESHOLD,
+) -> list[int]:
+    """
+    Buckets signatures band by band and merges bucket mates whose
+    estimated Jaccard similarity reaches `threshold`. Returns the cluster
+    root of every row
+    """
+    count, num_perm = signatures.shape
+    rows = num_perm // bands
+    parent = list(range(count))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        band_slice = signatures[:, band * rows : (band + 1) * rows]
+        _, buckets = np.unique(band_slice, axis=0, return_inverse=True)
+        order = np.argsort(buckets, kind="stable")
+        boundaries = np.flatnonzero(np.diff(buckets[order])) + 1
+
+        for members in np.split(order, boundaries):
+            if len(members) < 2:
+                continue
+            first = members[0]
+            similarity = (signatures[members[1:]] == signatures[first]).mean(
+                axis=1
+            )
+            for other in members[1:][similarity >= threshold]:
+                parent[find(other)] = find(first)
+
+    return [find(i) for i in range(count)]
+
+
+def cluster_tickets(tickets: list[Ticket]) -> list[list[int]]:
+    """
+    Groups near-duplicate tickets (MinHash + LSH over title and
+    description). Each cluster is a list of indices into `tickets` whose
+    first entry is the representative, the ticket that would be triaged
+    first
+    """
+    if len(tickets) < 2:
+        return [[i] for i in range(len(tickets))]
+
+    signatures = minhash_signatures(
+        [shingle(normalize_text(ticket)) for ticket in tickets]
+    )
+    roots = lsh_clusters(signatures)
+
+    clusters: dict[int, list[int]] = {}
+    for index, root in enumerate(roots):
+        clusters.setdefault(root, []).append(index)
+
+    return [
+        sorted(members, key=lambda i: priority_score(tickets[i]))
+        for members in clusters.values()
+    ]
@@ -0,0 +1,164 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import Counter
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from app.agents.metrics import record
+from app.config import (
+    DEFAULT_QUEUE,
+    LLM_CONCURRENCY,
+    LLM_MAX_BACKLOG,
+    settings,
+    setup_logger,
+)
+from app.exceptions import QueueSaturatedError
+
+
+logger = setup_logger(__name__)
+
+
+def parse_weights(spec: str) -> dict[str, float]:
+    """
+    "billing=3,platform=1" -> {"billing": 3.0, "platform": 1.0}
+    """
+    weights = {}
+    for pair in filter(None, (part.strip() for part in spec.split(","))):
+        queue, _, weight = pair.partition("=")
+        weights[queue.strip()] = float(weight)
+    return weights
+
+
+class FairQueue:
+    """
+    Process-wide gate in front of the shared LLM pool, with start-time
+    fair queueing across ticket queues: when a slot frees up it goes to
+    the waiting call with the lowest virtual start tag, so each queue
+    gets capacity in proportion to its weight however much it has
+    pending. A large backlog from one team only delays that team.
+
+    Admission is tracked in tickets: `admit` refuses new runs of a queue
+    that already has work pending while the total backlog is above
+    `max_backlog`
+    """
+
+    def __init__(
+        self,
+        capacity: int = LLM_CONCURRENCY,
+        weights: dict[str, float] | None = None,
+        max_backlog: int = LLM_MAX_BACKLOG,
+    ):
+        self.capacity = capacity
+        self.weights = weights or {}
+        self.max_backlog = max_backlog
+        self._active = 0
+        # (start tag, arrival, future) of the calls waiting for a slot
+        self._waiting: list[tuple[float, int, asyncio.Future]] = []
+        self._virtual_time = 0.0
+        self._finish_tags: dict[str, float] = {}
+        self._arrivals = itertools.count()
+        self._backlog: Counter[str] = Counter()
+        self._service_time = 2.0  # EWMA of seconds per call
+
+    def weight(self, queue: str) -> float:
+        return self.weights.get(queue, 1.0)
+
+    def _start_tag(self, queue: str) -> float:
+        start = max(self._virtual_time, self._finish_tags.get(queue, 0.0))
+        self._finish_tags[queue] = start + 1 / self.weight(queue)
+        return start
+
+    async def acquire(self, queue: str) -> None:
+        start = self._start_tag(queue)
+        if self._active < self.capacity and not self._waiting:
+            self._active += 1
+            self._virtual_time = start
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (start, next(self._arrivals), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Handed a slot just as the waiter gave up, pass it on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiting:
+            start, _, future = heapq.heappop(self._waiting)
+            if future.done():  # Cancelled while waiting
+                continue
+            # The slot moves straight to the next waiter
+            self._virtual_time = start
+            future.set_result(None)
+            return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, queue: str | None) -> AsyncIterator[None]:
+        queue = queue or DEFAULT_QUEUE
+        queued_at = time.monotonic()
+        await self.acquire(queue)
+        started = time.monotonic()
+        record("llm_queue_wait_ms", round((started - queued_at) * 1000))
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self._service_time += 0.1 * (elapsed - self._service_time)
+            self.release()
+
+    def add_backlog(self, queue: str | None, tickets: int = 1) -> None:
+        self._backlog[queue or DEFAULT_QUEUE] += tickets
+
+    def remove_backlog(self, queue: str | None, tickets: int = 1) -> None:
+        queue = queue or DEFAULT_QUEUE
+        self._backlog[queue] -= tickets
+        if self._backlog[queue] <= 0:
+            del self._backlog[queue]
+
+    @property
+    def pending(self) -> int:
+        """
+        Tickets admitted to runs and not processed yet
+        """
+        return sum(self._backlog.values())
+
+    def retry_after(self) -> int:
+        """
+        Seconds until the current backlog should have drained
+        """
+        return max(
+            1, math.ceil(self.pending * self._service_time / self.capacity)
+        )
+
+    def admit(self, queue: str | None) -> None:
+        queue = queue or DEFAULT_QUEUE
+        saturated = self.pending >= self.max_backlog
+        if saturated and self._backlog[queue] > 0:
+            record("llm_queue_rejected")
+            retry_after = self.retry_after()
+            logger.warning(
+                f"Queue {queue} rejected, LLM backlog is saturated "
+                f"(retry in {retry_after}s)"
+            )
+            raise QueueSaturatedError(queue, retry_after)
+
+    def snapshot(self) -> dict[str, object]:
+        waiting = sum(1 for *_, f in self._waiting if not f.done())
+        return {
+            "capacity": self.capacity,
+            "active": self._active,
+            "waiting": waiting,
+            "backlog": dict(self._backlog),
+            "weights": self.weights,
+            "retry_after": self.retry_after(),
+        }
+
+
+llm_queue = FairQueue(weights=parse_weights(settings.queue_weights))
@@ -1,3 +1,4 @@
+import asyncio
 import glob
 import os
 
@@ -5,10 +6,14 @@ from langgraph.graph import END, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from sqlalchemy.orm import Session
 
+from app.agents.claims import keep_ticket_claims, release_ticket_claims
+from app.agents.metrics import LLMMetrics, merge_counts, run_metrics
 from app.agents.nodes import (
     AnalysisState,
     node_classify_tickets,
+    node_dedup_tickets,
     node_fetch_tickets,
+    node_preprocess_tickets,
     node_save_classification,
     node_save_summary,
     node_summarize_tickets,
@@ -26,13 +31,17 @@ def create_graph():
     graph = StateGraph(AnalysisState)
 
     graph.add_node("fetch", node_fetch_tickets)
+    graph.add_node("preprocess", node_preprocess_tickets)
+    graph.add_node("dedup", node_dedup_tickets)
     graph.add_node("classify", node_classify_tickets)
     graph.add_node("summarize", node_summarize_tickets)
     graph.add_node("save_classification", node_save_classification)
     graph.add_node("save_summary", node_save_summary)
 
-    graph.add_edge("fetch", "classify")
-    graph.add_edge("fetch", "summarize")
+    graph.add_edge("fetch", "preprocess")
+    graph.add_edge("preprocess", "dedup")
+    graph.add_edge("dedup", "classify")
+    graph.add_edge("dedup", "summarize")
 
     graph.add_edge("classify", "save_classification")
     graph.add_edge("summarize", "save_summary")
@@ -47,26 +56,69 @@ def create_graph():
     return graph.compile()
 
 
+def add_run_stats(
+    db: Session, analysis_run_id: str, stats: dict[str, float]
+) -> AnalysisRun | None:
+    """
+    Adds `stats` to the run's counters. Shards and continuous batches add
+    to the same run concurrently, so the row stays locked from the read
+    until the merge is committed
+    """
+    analysis_run = (
+        db.query(AnalysisRun)
+        .filter(AnalysisRun.id == analysis_run_id)
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+    if analysis_run:
+        analysis_run.stats = merge_counts(analysis_run.stats, stats)
+    db.commit()
+    return analysis_run
+
+
 async def run_graph(
     db: Session,
     analysis_run_id: str,
     ticket_ids: list = None,
+    mode: str = "incomplete",
+    deadline: float | None = None,
+    summarize: bool = True,
+    queue: str | None = None,
 ) -> AnalysisRun:
+    """
+    Runs the workflow under `analysis_run_id`, creating the run if needed.
+    Continuous triage reuses one run per summary window and summarizes it
+    separately, hence `summarize`. `queue` restricts the run to that
+    queue's tickets
+    """
     try:
         logger.info("Starting analysis workflow...", "WHITE")
 
-        analysis_run = AnalysisRun(
-            id=analysis_run_id, summary="Analysis in progress..."
+        analysis_run = (
+            db.query(AnalysisRun)
+            .filter(AnalysisRun.id == analysis_run_id)
+            .first()
         )
-        db.add(analysis_run)
-        db.commit()
-        db.refresh(analysis_run)
+        if not analysis_run:
+            analysis_run = AnalysisRun(
+                id=analysis_run_id, summary="Analysis in progress..."
+            )
+            db.add(analysis_run)
+            db.commit()
+            db.refresh(analysis_run)
 
         initial_state = AnalysisState(
             analysis_run_id=analysis_run_id,
             ticket_ids=ticket_ids,
+            mode=mode,
+            queue=queue,
+            deadline=deadline,
             tickets=[],
+            clusters=[],
             results=[],
+            saved_ticket_ids=[],
+            with_summary=summarize,
             summary="",
         )
 
@@ -75,14 +127,32 @@ async def run_graph(
         if not glob.glob("assets/*.png"):
             visualize_graph(graph)
 
-        await graph.ainvoke(initial_state)
-
-        analysis_run = (
-            db.query(AnalysisRun)
-            .filter(AnalysisRun.id == analysis_run_id)
-            .first()
+        heartbeat = asyncio.create_task(
+            keep_ticket_claims(analysis_run_id, ticket_ids)
         )
+        metrics = LLMMetrics()
+        metrics_token = run_metrics.set(metrics)
+        try:
+            await graph.ainvoke(initial_state)
+        finally:
+            run_metrics.reset(metrics_token)
+            heartbeat.cancel()
+            # Anything claimed but not completed goes back to the pool
+            released = release_ticket_claims(db, analysis_run_id, ticket_ids)
+            if released:
+                logger.warning(f"Released {released} unfinished tickets")
+
+        analysis_run = add_run_stats(db, analysis_run_id, metrics.snapshot())
         if analysis_run:
+            logger.info(f"Run stats: {analysis_run.stats}", "CYAN")
+            try:
+                from app.agents.trends import trend_tracker
+
+                await asyncio.to_thread(
+                    trend_tracker.update_for_run, db, analysis_run_id
+                )
+            except Exception as e:
+                logger.warning(f"Could not update trends: {e}")
             return analysis_run
         else:
             raise AnalysisError("No valid analysis results were produced")
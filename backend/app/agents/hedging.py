@@ -0,0 +1,165 @@
+import asyncio
+import math
+import time
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable
+from threading import Lock
+from typing import TYPE_CHECKING, TypeVar
+
+from app.agents.metrics import record
+from app.config import (
+    HEDGE_MAX_EXTRA_LOAD,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    HEDGE_WINDOW,
+    get_async_openai_client,
+    get_hedge_openai_client,
+    setup_logger,
+)
+
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """
+    Recent LLM latencies bucketed by prompt size (powers of two tokens)
+    """
+
+    def __init__(
+        self,
+        percentile: float = HEDGE_PERCENTILE,
+        window: int = HEDGE_WINDOW,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._samples: dict[int, deque[float]] = defaultdict(
+            lambda: deque(maxlen=window)
+        )
+        self._lock = Lock()
+
+    @staticmethod
+    def bucket(tokens: int) -> int:
+        return int(math.log2(max(tokens, 1)))
+
+    def record(self, tokens: int, seconds: float) -> None:
+        with self._lock:
+            self._samples[self.bucket(tokens)].append(seconds)
+
+    def threshold(self, tokens: int) -> float | None:
+        """
+        Latency percentile for prompts of this size, None until enough
+        calls were observed
+        """
+        with self._lock:
+            samples = sorted(self._samples[self.bucket(tokens)])
+        if len(samples) < self.min_samples:
+            return None
+        return samples[
+            min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        ]
+
+
+class HedgeBudget:
+    """
+    Caps hedges at `max_extra_load` of the recent primary calls
+    """
+
+    def __init__(
+        self, max_extra_load: float = HEDGE_MAX_EXTRA_LOAD, window: int = 1000
+    ):
+        self.max_extra_load = max_extra_load
+        self._calls: deque[bool] = deque(maxlen=window)  # True for hedges
+        self._lock = Lock()
+
+    def add_call(self) -> None:
+        with self._lock:
+            self._calls.append(False)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            hedges = sum(self._calls)
+            primaries = len(self._calls) - hedges
+            if hedges + 1 > self.max_extra_load * primaries:
+                return False
+            self._calls.append(True)
+            return True
+
+
+latency_tracker = LatencyTracker()
+hedge_budget = HedgeBudget()
+
+
+async def _first_valid(tasks: list[asyncio.Task]) -> asyncio.Task:
+    """
+    Waits for the first task that succeeds and cancels the others.
+    Raises the last error when all of them fail
+    """
+    pending = set(tasks)
+    error: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def hedged_request(
+    call: Callable[["AsyncOpenAI"], Awaitable[T]], tokens: int
+) -> T:
+    """
+    Sends `call` to the primary backend. If it has not answered after the
+    observed latency percentile for prompts of this size, the same call
+    goes to the hedge backend too and the first valid response wins.
+    Without HEDGE_API_URL this is a plain call that only feeds the tracker
+    """
+    client = get_async_openai_client()
+    hedge_client = get_hedge_openai_client()
+    record("llm_calls")
+    hedge_budget.add_call()
+
+    started = time.perf_counter()
+    primary = asyncio.ensure_future(call(client))
+    delay = latency_tracker.threshold(tokens) if hedge_client else None
+
+    try:
+        if delay is None:
+            result = await primary
+            latency_tracker.record(tokens, time.perf_counter() - started)
+            return result
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not hedge_budget.try_acquire():
+            if not done:
+                record("hedge_skipped")
+            result = await primary
+            latency_tracker.record(tokens, time.perf_counter() - started)
+            return result
+
+        record("hedged")
+        backup = asyncio.ensure_future(call(hedge_client))
+        winner = await _first_valid([primary, backup])
+        # A lower bound when the primary lost, still keeps the tail visible
+        latency_tracker.record(tokens, time.perf_counter() - started)
+        if winner is backup:
+            record("hedge_wins")
+        return winner.result()
+
+    finally:
+        if not primary.done():
+            primary.cancel()
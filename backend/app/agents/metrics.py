@@ -0,0 +1,69 @@
+from collections import Counter
+from contextvars import ContextVar
+from threading import Lock
+
+
+# (rate, numerator, denominators) derived from the raw counters
+RATES = [
+    ("parse_failure_rate", "parse_failure", ("parse_success", "parse_failure")),
+    ("hedge_rate", "hedged", ("llm_calls",)),
+    ("hedge_win_rate", "hedge_wins", ("hedged",)),
+]
+
+
+def with_rates(counts: dict[str, float]) -> dict[str, float]:
+    counts = {k: v for k, v in counts.items() if not k.endswith("_rate")}
+    for rate, numerator, denominators in RATES:
+        total = sum(counts.get(name, 0) for name in denominators)
+        counts[rate] = counts.get(numerator, 0) / total if total else 0.0
+    return counts
+
+
+def merge_counts(*snapshots: dict[str, float] | None) -> dict[str, float]:
+    """
+    Adds up the counters of several snapshots (e.g. the shards or
+    micro-batches of one run) and recomputes the rates
+    """
+    merged: Counter[str] = Counter()
+    for snapshot in snapshots:
+        merged.update(
+            {
+                k: v
+                for k, v in (snapshot or {}).items()
+                if not k.endswith("_rate")
+            }
+        )
+    return with_rates(merged)
+
+
+class LLMMetrics:
+    """
+    Counters for LLM calls, process-wide or per analysis run
+    """
+
+    def __init__(self):
+        self._counts: Counter[str] = Counter()
+        self._lock = Lock()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += value
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            counts = dict(self._counts)
+        return with_rates(counts)
+
+
+llm_metrics = LLMMetrics()
+
+# Set by run_graph, so counters can also be attributed to the current run
+run_metrics: ContextVar[LLMMetrics | None] = ContextVar(
+    "run_metrics", default=None
+)
+
+
+def record(name: str, value: int = 1) -> None:
+    llm_metrics.increment(name, value)
+    if metrics := run_metrics.get():
+        metrics.increment(name, value)
@@ -1,63 +1,101 @@
 import asyncio
-from typing import Any, TypedDict
-
-from pydantic import BaseModel
-
+import datetime as dt
+from collections.abc import Awaitable, Callable
+from typing import Any, TypedDict, get_args
+
+from pydantic import BaseModel, ConfigDict, field_validator
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from app.agents.claims import claim_tickets
+from app.agents.dedup import cluster_tickets
+from app.agents.fair_queue import llm_queue
+from app.agents.metrics import llm_metrics, record
+from app.agents.preprocess import preprocess_key, preprocess_text
+from app.agents.prompts import (
+    CLASSIFICATION_SYSTEM_PROMPT,
+    PROMPT_VERSION,
+    SUMMARY_SYSTEM_PROMPT,
+    build_classification_prompt,
+    build_summary_prompt,
+    count_tokens,
+)
+from app.agents.scheduler import schedule_tickets
 from app.agents.utils import (
     default_categorizer,
     default_summarizer,
     get_structured_llm_response,
 )
-from app.config import (
-    MAX_CONCURRENT_REQUESTS,
-    setup_logger,
-)
+from app.config import MODEL, setup_logger
 from app.database import get_db_session
 from app.exceptions import AnalysisError
-from app.models import AnalysisRun, Ticket, TicketAnalysis
+from app.models import (
+    AnalysisRun,
+    Category,
+    Priority,
+    Ticket,
+    TicketAnalysis,
+    compute_fingerprint,
+)
 
 
 logger = setup_logger(__name__)
 
 
 class TicketStructuredOutput(BaseModel):
-    category: str
-    priority: str
+    model_config = ConfigDict(extra="forbid")
+
+    category: Category
+    priority: Priority
     notes: str
 
+    @field_validator("category", "priority", mode="before")
+    @classmethod
+    def normalize_label(cls, value: Any, info) -> Any:
+        """
+        Maps loose labels ("Feature Request", "HIGH") onto the stored
+        codes, unknown ones onto the catch-all value
+        """
+        if not isinstance(value, str):
+            return value
+        label = value.strip().lower().replace(" ", "_").replace("-", "_")
+        if info.field_name == "category":
+            labels, fallback = get_args(Category), "other"
+        else:
+            labels, fallback = get_args(Priority), "medium"
+        return label if label in labels else fallback
+
 
 class AnalysisState(TypedDict):
     analysis_run_id: str
     ticket_ids: list[str] | None
+    mode: str
+    queue: str | None
+    deadline: float | None
     tickets: list[Ticket]
+    clusters: list[list[int]]
     results: list[dict[str, Any]]
+    saved_ticket_ids: list[str]
+    with_summary: bool
     summary: str
 
 
 def node_fetch_tickets(state: AnalysisState) -> AnalysisState:
     """
-    LangGraph node that fetches tickets from the database
+    LangGraph node that fetches and claims tickets from the database
     """
     try:
         db = get_db_session()
 
         ticket_ids = state.get("ticket_ids")
-        logger.info(f"Ticket IDs: {ticket_ids}", "CYAN")
-
-        if ticket_ids:
-            tickets = (
-                db.query(Ticket)
-                .filter(Ticket.id.in_(ticket_ids))
-                .filter(Ticket.status == "incomplete")
-                .all()
-            )
+        mode = state.get("mode") or "incomplete"
+        logger.info(f"Ticket IDs: {ticket_ids} | Mode: {mode}", "CYAN")
 
-        else:
-            tickets = (
-                db.query(Ticket).filter(Ticket.status == "incomplete").all()
-            )
+        tickets = claim_tickets(
+            db, state["analysis_run_id"], ticket_ids, mode, state.get("queue")
+        )
 
-        logger.info(f"Fetched {len(tickets)} tickets for processing")
+        logger.info(f"Claimed {len(tickets)} tickets for processing")
         db.close()
         return {"tickets": tickets}
 
@@ -65,51 +103,224 @@ def node_fetch_tickets(state: AnalysisState) -> AnalysisState:
         raise AnalysisError(f"Failed to fetch tickets: {str(e)}") from e
 
 
+def node_preprocess_tickets(state: AnalysisState) -> AnalysisState:
+    """
+    LangGraph node that strips quoting, signatures, markup and stack trace
+    noise from the descriptions and compresses oversized ones. Results
+    are cached on the tickets, only new or edited ones are processed
+    """
+    try:
+        tickets = state["tickets"]
+        updates = []
+        for ticket in tickets:
+            key = preprocess_key(ticket)
+            if ticket.cleaned_key == key and ticket.clean_description:
+                continue
+            ticket.clean_description = preprocess_text(ticket.description)
+            ticket.cleaned_key = key
+            updates.append(
+                {
+                    "ticket_id": ticket.id,
+                    "clean_description": ticket.clean_description,
+                    "cleaned_key": key,
+                }
+            )
+
+        raw = sum(count_tokens(t.description) for t in tickets)
+        clean = sum(count_tokens(t.clean_description) for t in tickets)
+        record("description_tokens", raw)
+        record("description_tokens_saved", raw - clean)
+
+        if updates:
+            db = get_db_session()
+            try:
+                # Core UPDATE, so the ticket's fingerprint hooks stay out
+                db.connection().execute(
+                    update(Ticket)
+                    .where(Ticket.id == bindparam("ticket_id"))
+                    .values(
+                        clean_description=bindparam("clean_description"),
+                        cleaned_key=bindparam("cleaned_key"),
+                    ),
+                    updates,
+                )
+                db.commit()
+            finally:
+                db.close()
+
+        logger.info(
+            f"Preprocessed {len(updates)} tickets, "
+            f"{raw - clean}/{raw} description tokens removed",
+            "CYAN",
+        )
+        return {"tickets": tickets}
+
+    except Exception as e:
+        raise AnalysisError(f"Failed to preprocess tickets: {str(e)}") from e
+
+
+def node_dedup_tickets(state: AnalysisState) -> AnalysisState:
+    """
+    LangGraph node that groups near-duplicate tickets so only one
+    representative per cluster is sent to the LLM
+    """
+    try:
+        tickets = state["tickets"]
+        clusters = cluster_tickets(tickets)
+
+        duplicates = len(tickets) - len(clusters)
+        if duplicates:
+            record("dedup_skipped", duplicates)
+        logger.info(
+            f"Clustered {len(tickets)} tickets into {len(clusters)} groups",
+            "CYAN",
+        )
+        return {"clusters": clusters}
+
+    except Exception as e:
+        raise AnalysisError(f"Failed to cluster tickets: {str(e)}") from e
+
+
+def _clusters(state: AnalysisState) -> list[list[int]]:
+    tickets = state["tickets"]
+    return state.get("clusters") or [[i] for i in range(len(tickets))]
+
+
 async def node_classify_tickets(state: AnalysisState) -> AnalysisState:
     try:
         tickets = state["tickets"]
-        results = await get_analysis(tickets)
-        return {"results": results}
+        clusters = _clusters(state)
+        representatives = [tickets[cluster[0]] for cluster in clusters]
+        members = {
+            tickets[cluster[0]].id: [tickets[i] for i in cluster]
+            for cluster in clusters
+        }
+        saved_ticket_ids = []
+
+        def save_cluster(ticket: Ticket, result: dict[str, Any]) -> bool:
+            # The representative's result fans out to its whole cluster
+            db = get_db_session()
+            try:
+                for member in members[ticket.id]:
+                    save_ticket_result(
+                        db, state["analysis_run_id"], member, result
+                    )
+                db.commit()
+                return True
+            except Exception as e:
+                db.rollback()
+                logger.warning(
+                    f"Deferring save of ticket {ticket.id[:8]}... to batch save: {e}"
+                )
+                return False
+            finally:
+                db.close()
+
+        async def persist(ticket: Ticket, result: dict[str, Any]) -> None:
+            # Sync session work stays off the event loop
+            if await asyncio.to_thread(save_cluster, ticket, result):
+                saved_ticket_ids.extend(m.id for m in members[ticket.id])
+
+        cluster_results = await get_analysis(
+            representatives, deadline=state.get("deadline"), on_result=persist
+        )
+
+        results = [None] * len(tickets)
+        for cluster, result in zip(clusters, cluster_results, strict=True):
+            for i in cluster:
+                results[i] = result
+        return {"results": results, "saved_ticket_ids": saved_ticket_ids}
 
     except Exception as e:
         raise AnalysisError(f"Failed to classify tickets: {str(e)}") from e
 
 
 async def node_summarize_tickets(state: AnalysisState) -> AnalysisState:
+    if not state.get("with_summary", True):
+        return {"summary": ""}
+
     try:
         tickets = state["tickets"]
+        # Sync queries, the first one a full-history aggregate
+        trends = await asyncio.to_thread(_trend_lines)
 
         try:
-            summary = await get_summary(tickets)
+            summary = await get_summary(
+                tickets, _clusters(state), state.get("queue"), trends
+            )
         except Exception as e:
             logger.warning(
                 f"Trouble with the provided client. Falling back to default summary: {e}"
             )
-            summary = default_summarizer(tickets, state["results"])
+            summary = default_summarizer(tickets, state["results"], trends)
         return {"summary": summary}
 
     except Exception as e:
         raise AnalysisError(f"Failed to summarize tickets: {str(e)}") from e
 
 
+def _trend_lines() -> list[str]:
+    # NumPy is loaded with the first summary, not at startup
+    from app.agents.trends import describe_trends, trend_tracker
+
+    db = get_db_session()
+    try:
+        trend_tracker.ensure_fresh(db)
+        return describe_trends(trend_tracker.report())
+    except Exception as e:
+        logger.warning(f"Trends unavailable for the summary: {e}")
+        return []
+    finally:
+        db.close()
+
+
+def save_ticket_result(
+    db: Session, analysis_run_id: str, ticket: Ticket, result: dict[str, Any]
+) -> None:
+    merged_ticket = db.merge(ticket)
+    merged_ticket.status = "complete"
+    merged_ticket.claimed_by_run_id = None
+    merged_ticket.claim_expires_at = None
+    merged_ticket.analyzed_fingerprint = compute_fingerprint(
+        merged_ticket.title, merged_ticket.description
+    )
+    merged_ticket.analyzed_model = result.get("model", MODEL)
+    merged_ticket.analyzed_prompt_version = PROMPT_VERSION
+
+    analyzed_at = dt.datetime.now(dt.UTC)
+    merged_ticket.last_analyzed_at = analyzed_at
+
+    ticket_analysis = TicketAnalysis(
+        created_at=analyzed_at,
+        analysis_run_id=analysis_run_id,
+        ticket_id=ticket.id,
+        category=result["category"],
+        priority=result["priority"],
+        notes=result.get("notes"),
+    )
+    db.add(ticket_analysis)
+
+
 def node_save_classification(state: AnalysisState) -> None:
+    """
+    Saves whatever the classify node could not persist incrementally
+    """
     db = get_db_session()
     try:
+        saved_ticket_ids = set(state.get("saved_ticket_ids") or [])
+
         for i, ticket in enumerate(state["tickets"]):
+            if ticket.id in saved_ticket_ids:
+                continue
 
             result = state["results"][i]
+            if not isinstance(result, dict):
+                logger.warning(
+                    f"No result for ticket {ticket.id[:8]}..., leaving it pending: {result}"
+                )
+                continue
 
-            merged_ticket = db.merge(ticket)
-            merged_ticket.status = "complete"
-
-            ticket_analysis = TicketAnalysis(
-                analysis_run_id=state["analysis_run_id"],
-                ticket_id=ticket.id,
-                category=result["category"],
-                priority=result["priority"],
-                notes=result.get("notes"),
-            )
-            db.add(ticket_analysis)
+            save_ticket_result(db, state["analysis_run_id"], ticket, result)
 
         db.commit()
         logger.info("Classification results saved successfully", "WHITE")
@@ -127,6 +338,9 @@ def node_save_classification(state: AnalysisState) -> None:
 
 def node_save_summary(state: AnalysisState) -> None:
 
+    if not state.get("with_summary", True):
+        return
+
     db = get_db_session()
     try:
         if not state["summary"]:
@@ -155,83 +369,99 @@ def node_save_summary(state: AnalysisState) -> None:
         db.close()
 
 
-async def get_analysis(tickets: list[Ticket]) -> list[dict[str, Any]]:
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
-
-    async def analyze_single_ticket(ticket: Ticket) -> dict[str, Any]:
-
-        async with semaphore:
-
-            prompt = f"""
-            Analyze this support ticket and provide categorization:
+async def summarize_run(analysis_run_id: str, queue: str | None = None) -> None:
+    """
+    Summarizes every ticket analysed under an existing run, used for the
+    rolling summaries of continuous triage
+    """
+    db = get_db_session()
+    try:
+        rows = (
+            db.query(Ticket, TicketAnalysis)
+            .join(TicketAnalysis, TicketAnalysis.ticket_id == Ticket.id)
+            .filter(TicketAnalysis.analysis_run_id == analysis_run_id)
+            .all()
+        )
+    finally:
+        db.close()
 
-            Ticket: Title: {ticket.title} | Description: {ticket.description}
+    tickets = [ticket for ticket, _ in rows]
+    state = AnalysisState(
+        analysis_run_id=analysis_run_id,
+        queue=queue,
+        tickets=tickets,
+        clusters=cluster_tickets(tickets),
+        results=[
+            {
+                "category": analysis.category,
+                "priority": analysis.priority,
+                "notes": analysis.notes,
+            }
+            for _, analysis in rows
+        ],
+        with_summary=True,
+        summary="",
+    )
+    state.update(await node_summarize_tickets(state))
+    node_save_summary(state)
+
+
+async def get_analysis(
+    tickets: list[Ticket],
+    deadline: float | None = None,
+    on_result: Callable[[Ticket, dict[str, Any]], Awaitable[None]]
+    | None = None,
+) -> list[dict[str, Any]]:
 
-            For this ticket, provide category (billing/bug/feature_request/authentication/other), priority (high/medium/low), and brief notes.
-            Respond with valid JSON object: {{"category": "billing", "priority": "high", "notes": "Payment processing issue"}}
-            """
+    async def analyze_single_ticket(ticket: Ticket) -> dict[str, Any]:
+        prompt = build_classification_prompt(ticket)
 
-            try:
+        try:
 
+            async with llm_queue.slot(ticket.queue):
                 result = await get_structured_llm_response(
                     prompt=prompt,
+                    system_prompt=CLASSIFICATION_SYSTEM_PROMPT,
                     response_format=TicketStructuredOutput,
                 )
 
-                logger.info(
-                    f"Analyzed ticket {ticket.id} - Category: {result['category']}",
-                    "MAGENTA",
-                )
-                return result
+            logger.info(
+                f"Analyzed ticket {ticket.id} - Category: {result['category']}",
+                "MAGENTA",
+            )
+            return result
 
-            except Exception as e:
-                logger.warning(
-                    f"LLM analysis failed for ticket {ticket.id[:8]}..., using fallback: {str(e)}"
-                )
-                return default_categorizer(ticket)
+        except Exception as e:
+            logger.warning(
+                f"LLM analysis failed for ticket {ticket.id[:8]}..., using fallback: {str(e)}"
+            )
+            return default_categorizer(ticket)
 
-    tasks = [analyze_single_ticket(ticket) for ticket in tickets]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    results = await schedule_tickets(
+        tickets, analyze_single_ticket, deadline=deadline, on_result=on_result
+    )
 
     logger.info(f"Completed processing {len(tickets)} tickets")
+    logger.info(f"LLM metrics: {llm_metrics.snapshot()}", "CYAN")
     return results
 
 
-async def get_summary(tickets: list[Ticket]) -> str:
+async def get_summary(
+    tickets: list[Ticket],
+    clusters: list[list[int]] | None = None,
+    queue: str | None = None,
+    trends: list[str] | None = None,
+) -> str:
     try:
 
-        tickets_text = "\n".join(
-            [
-                f"Ticket {i+1}: Title: {ticket.title} | Description: {ticket.description}"
-                for i, ticket in enumerate(tickets)
-            ]
-        )
-
-        prompt = f"""
-        Analyze the following support tickets and provide a concise summary in markdown format.
-
-        TICKETS:
-        {tickets_text}
+        prompt = build_summary_prompt(tickets, clusters, trends)
 
-        INSTRUCTIONS:
-        - IDENTIFY common patterns and trends across tickets
-        - Highlight the most critical issues by priority and frequency
-        - Keep the summary UNDER 200 words
-        - Format your response as clean markdown within code blocks:
-
-        ```md
-        ## Ticket Analysis Summary
-
-        **Key Issues:**
-        - [Description of the key issues in BULLETS with supporting FIGURES]
-        - [Describe the MOST COMMON ISSUES in detail]
-        ```
-        """
-
-        data = await get_structured_llm_response(
-            prompt=prompt,
-            is_markdown=True,
-        )
+        async with llm_queue.slot(queue):
+            data = await get_structured_llm_response(
+                prompt=prompt,
+                system_prompt=SUMMARY_SYSTEM_PROMPT,
+                is_markdown=True,
+            )
         logger.info(f"Preview of response from summary agent: {data[:500]}")
         return data
 
@@ -0,0 +1,276 @@
+import hashlib
+import html
+import re
+from collections import Counter
+
+from app.agents.prompts import count_tokens, truncate_to_budget
+from app.config import MAX_DESCRIPTION_TOKENS
+from app.models import Ticket, compute_fingerprint
+
+
+# Bump whenever the cleaning rules change, cached texts are then redone
+PREPROCESS_VERSION = "2"
+
+_HTML_TAG = re.compile(r"<(/?)([a-zA-Z][\w-]*)\b[^>]*>")
+_HTML_DROP = re.compile(
+    r"<(script|style|head)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL
+)
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+_BLOCK_TAGS = {"br", "p", "div", "li", "tr", "h1", "h2", "h3", "h4", "table"}
+
+_DATA_URI = re.compile(r"data:[\w/+.-]+;base64,[A-Za-z0-9+/=\s]+")
+# Whole lines of base64 alphabet: one long line, or a wrapped block of at
+# least two full lines and a last line, which when short must look encoded
+# (digits, +/=) so a word below the block stays. Anchored to lines, so a
+# run that is too short can only be tried once per line
+_BASE64_BLOB = re.compile(
+    r"^[ \t]*(?:[A-Za-z0-9+/]{180,}={0,2}"
+    r"|(?:[A-Za-z0-9+/]{60,}={0,2}[ \t]*\n[ \t]*){2,}"
+    r"(?:[A-Za-z0-9+/]{60,}|(?=[A-Za-z0-9+/]*[0-9+/=])[A-Za-z0-9+/]+)={0,2})"
+    r"[ \t]*$\n?",
+    re.MULTILINE,
+)
+
+# Where the quoted history of a reply starts, everything below is dropped
+_REPLY_HEADERS = [
+    re.compile(r"^On .{1,200}wrote:\s*$"),
+    re.compile(r"^-{2,}\s*Original Message\s*-{2,}", re.IGNORECASE),
+    re.compile(r"^-{2,}\s*Forwarded message\s*-{2,}", re.IGNORECASE),
+    re.compile(r"^_{20,}\s*$"),
+    re.compile(r"^From:\s.+$"),  # Outlook headers, only with Sent: below
+]
+_SENT_HEADER = re.compile(r"^(Sent|Date):\s", re.IGNORECASE)
+
+_SIGNATURE_DELIMITER = re.compile(r"^--\s*$")
+_CLOSINGS = re.compile(
+    r"^(best|kind|warm)?\s*(regards|wishes)|^(many\s+)?thanks|^cheers|"
+    r"^sincerely|^sent from my ",
+    re.IGNORECASE,
+)
+SIGNATURE_MAX_LINES = 6  # Closings further up than this are body text
+CLOSING_MAX_WORDS = 4  # "Thanks," or "Best regards" on a line of its own
+SIGNATURE_LINE_MAX_WORDS = 6  # Names, titles, companies, phone numbers
+
+# Frames of Python, Java/.NET and JavaScript stack traces
+_FRAME = re.compile(
+    r'^\s*(File ".+", line \d+|at [\w$.<>\[\]/]+[ (].*|at .+:\d+:\d+\)?$)'
+)
+TRACE_HEAD_FRAMES = 2  # Where the call came from
+TRACE_TAIL_FRAMES = 3  # Where it failed, usually the interesting part
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])|\n+")
+_WORD = re.compile(r"[a-z][a-z0-9_]{2,}")
+_SIGNAL_WORDS = re.compile(
+    r"\b(error|exception|fail\w*|cannot|can't|unable|crash\w*|broken|"
+    r"urgent|down|refund|charge\w*|invoice|payment|login|password|"
+    r"locked|timeout|denied|request|feature|please|expected|instead)\b",
+    re.IGNORECASE,
+)
+GAP_MARKER = "[...]"
+
+
+def strip_html(text: str) -> str:
+    if not _HTML_TAG.search(text):
+        return text
+    text = _HTML_COMMENT.sub("", _HTML_DROP.sub("", text))
+
+    def replace(match: re.Match) -> str:
+        return "\n" if match.group(2).lower() in _BLOCK_TAGS else ""
+
+    return html.unescape(_HTML_TAG.sub(replace, text))
+
+
+def strip_encoded_blobs(text: str) -> str:
+    text = _DATA_URI.sub("[embedded file]", text)
+    return _BASE64_BLOB.sub("[encoded data]\n", text)
+
+
+def strip_quoted_history(lines: list[str]) -> list[str]:
+    kept = []
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith(">"):
+            continue
+        if any(header.match(stripped) for header in _REPLY_HEADERS):
+            if not stripped.startswith("From:"):
+                break
+            headers = lines[i + 1 : i + 4]
+            if any(_SENT_HEADER.match(h.strip()) for h in headers):
+                break
+        kept.append(line)
+    return kept
+
+
+def _is_closing(line: str) -> bool:
+    return bool(_CLOSINGS.match(line)) and (
+        len(line.split()) <= CLOSING_MAX_WORDS
+    )
+
+
+def _is_signature_line(line: str) -> bool:
+    """
+    Blank, or short and unlike a sentence of the report ("Jane Doe",
+    "Acme Inc.", "+1 555 0100"), so nothing the classifier needs
+    """
+    words = line.split()
+    if len(words) > SIGNATURE_LINE_MAX_WORDS or _SIGNAL_WORDS.search(line):
+        return False
+    return len(words) < 3 or not line.endswith((".", "!", "?"))
+
+
+def strip_signature(lines: list[str]) -> list[str]:
+    """
+    Cuts at a "--" delimiter, or at a closing line near the end that only
+    name-like lines follow. A closing that starts a sentence ("Thanks to
+    this bug...") or precedes more of the report is body text
+    """
+    for i, line in enumerate(lines):
+        if _SIGNATURE_DELIMITER.match(line):
+            return lines[:i]
+
+    tail_start = max(0, len(lines) - SIGNATURE_MAX_LINES)
+    for i in range(tail_start, len(lines)):
+        # Never strip the whole message, the first line is the body
+        if (
+            i > 0
+            and _is_closing(lines[i].strip())
+            and all(_is_signature_line(line.strip()) for line in lines[i + 1 :])
+        ):
+            return lines[:i]
+    return lines
+
+
+def collapse_stack_traces(lines: list[str]) -> list[str]:
+    """
+    Keeps the outermost and innermost frames of every run of stack frames.
+    Exception and "Caused by" lines are not frames and always stay
+    """
+    collapsed: list[str] = []
+    frames: list[str] = []
+
+    def flush() -> None:
+        keep = TRACE_HEAD_FRAMES + TRACE_TAIL_FRAMES
+        if len(frames) > keep + 1:
+            omitted = len(frames) - keep
+            frames[TRACE_HEAD_FRAMES:-TRACE_TAIL_FRAMES] = [
+                f"    [... {omitted} frames omitted ...]"
+            ]
+        collapsed.extend(frames)
+        frames.clear()
+
+    for line in lines:
+        if _FRAME.match(line):
+            frames.append(line)
+        # Source lines printed below Python frames belong to the frame
+        elif frames and line.startswith("    ") and line.strip():
+            if frames[-1].lstrip().startswith("File "):
+                frames[-1] = f"{frames[-1]}\n{line}"
+            else:
+                flush()
+                collapsed.append(line)
+        else:
+            flush()
+            collapsed.append(line)
+    flush()
+    return collapsed
+
+
+def collapse_repeats(lines: list[str]) -> list[str]:
+    """
+    Identical consecutive lines (log spam) and runs of blank lines
+    """
+    collapsed: list[str] = []
+    repeats = 0
+    for line in lines:
+        if collapsed and line == collapsed[-1]:
+            repeats += 1
+            continue
+        if repeats and collapsed[-1].strip():
+            collapsed[-1] += f" [repeated {repeats + 1} times]"
+        repeats = 0
+        collapsed.append(line)
+    if repeats and collapsed[-1].strip():
+        collapsed[-1] += f" [repeated {repeats + 1} times]"
+    return collapsed
+
+
+def clean_text(text: str) -> str:
+    """
+    Drops what never helps the classifier: markup, encoded attachments,
+    quoted reply chains and signatures. Stack traces keep only their key
+    frames. Falls back to the plain text when nothing would be left
+    """
+    if not text:
+        return ""
+    plain = strip_encoded_blobs(strip_html(text)).replace("\r\n", "\n")
+
+    lines = [line.rstrip() for line in plain.split("\n")]
+    lines = strip_quoted_history(lines)
+    lines = strip_signature(lines)
+    lines = collapse_stack_traces(lines)
+    lines = collapse_repeats(lines)
+
+    cleaned = "\n".join(lines).strip()
+    return cleaned or plain.strip()
+
+
+def compress_to_budget(text: str, budget: int) -> str:
+    """
+    Extractive compression: keeps the sentences that score best (error
+    vocabulary, terms frequent across the text, opening and closing
+    lines) in their original order until `budget` tokens are used.
+    Dropped stretches are marked with GAP_MARKER
+    """
+    if count_tokens(text) <= budget:
+        return text
+
+    sentences = [s.strip() for s in _SENTENCE.split(text) if s and s.strip()]
+    frequencies = Counter(_WORD.findall(text.lower()))
+
+    def score(index: int, sentence: str) -> float:
+        words = _WORD.findall(sentence.lower())
+        if not words:
+            return 0.0
+        salience = sum(frequencies[w] > 1 for w in words) / len(words)
+        signal = len(_SIGNAL_WORDS.findall(sentence))
+        position = 1.0 if index < 2 or index == len(sentences) - 1 else 0.0
+        return salience + signal + position
+
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: score(i, sentences[i]),
+        reverse=True,
+    )
+    chosen, used, seen = set(), 0, set()
+    for index in ranked:
+        # Repeated sentences (log lines, templated text) only count once
+        words = frozenset(_WORD.findall(sentences[index].lower()))
+        cost = count_tokens(sentences[index])
+        if used + cost > budget or (words and words in seen):
+            continue
+        chosen.add(index)
+        seen.add(words)
+        used += cost
+
+    if not chosen:  # One huge sentence, e.g. an unbroken log line
+        return truncate_to_budget(text, budget)
+
+    parts = []
+    for index in sorted(chosen):
+        if parts and index - 1 not in chosen:
+            parts.append(GAP_MARKER)
+        parts.append(sentences[index])
+    return "\n".join(parts)
+
+
+def preprocess_text(text: str, budget: int = MAX_DESCRIPTION_TOKENS) -> str:
+    return compress_to_budget(clean_text(text), budget)
+
+
+def preprocess_key(ticket: Ticket) -> str:
+    """
+    Identifies the ticket text and cleaning rules a cached text came from
+    """
+    fingerprint = compute_fingerprint(ticket.title, ticket.description)
+    payload = f"{PREPROCESS_VERSION}\x1f{fingerprint}".encode()
+    return hashlib.sha256(payload).hexdigest()
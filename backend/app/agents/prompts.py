@@ -0,0 +1,129 @@
+import hashlib
+import re
+
+from app.config import MAX_DESCRIPTION_TOKENS, SUMMARY_TICKET_TOKENS
+from app.models import Ticket
+
+
+# Prompts are a fixed system prefix followed by the variable ticket payload,
+# so local servers (Ollama/vLLM) can reuse the cached prefix across calls
+CLASSIFICATION_SYSTEM_PROMPT = (
+    "You are a support ticket triage assistant. "
+    "Analyze the support ticket provided by the user and categorize it.\n"
+    "Provide category (billing/bug/feature_request/authentication/other), "
+    "priority (high/medium/low), and brief notes.\n"
+    "Respond with valid JSON object: "
+    '{"category": "billing", "priority": "high", '
+    '"notes": "Payment processing issue"}'
+)
+
+CLASSIFICATION_TICKET_TEMPLATE = "Title: {title}\nDescription: {description}"
+
+SUMMARY_SYSTEM_PROMPT = (
+    "Analyze the support tickets provided by the user and provide a "
+    "concise summary in markdown format.\n"
+    "\n"
+    "INSTRUCTIONS:\n"
+    "- IDENTIFY common patterns and trends across tickets\n"
+    "- Highlight the most critical issues by priority and frequency\n"
+    "- Each entry stands for a group of near-identical tickets, weigh it by "
+    'its ticket count and report it as "N tickets about X"\n'
+    "- If a TRENDS section is given, call out those spikes against the "
+    "baseline\n"
+    "- Keep the summary UNDER 200 words\n"
+    "- Format your response as clean markdown within code blocks:\n"
+    "\n"
+    "```md\n"
+    "## Ticket Analysis Summary\n"
+    "\n"
+    "**Key Issues:**\n"
+    "- [Description of the key issues in BULLETS with supporting FIGURES]\n"
+    "- [Describe the MOST COMMON ISSUES in detail]\n"
+    "```"
+)
+
+SUMMARY_TICKET_TEMPLATE = (
+    "Group {index} ({count} tickets): Title: {title} | "
+    "Description: {description}"
+)
+
+# Changes whenever the classification prompt does, which in turn marks
+# previously analysed tickets as stale
+PROMPT_VERSION = hashlib.sha256(
+    f"{CLASSIFICATION_SYSTEM_PROMPT}\x1f{CLASSIFICATION_TICKET_TEMPLATE}"
+    .encode()
+).hexdigest()[:12]
+
+TRUNCATION_MARKER = "\n[... truncated ...]\n"
+
+# Word pieces and single punctuation marks, a close (slightly pessimistic)
+# stand-in for BPE token counts that needs no model-specific vocabulary
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    return len(_TOKEN_PATTERN.findall(text or ""))
+
+
+def truncate_to_budget(text: str, budget: int) -> str:
+    """
+    Deterministically cuts `text` to roughly `budget` tokens, keeping the
+    head and the tail (where error messages usually are)
+    """
+    if not text:
+        return ""
+
+    spans = [m.span() for m in _TOKEN_PATTERN.finditer(text)]
+    if len(spans) <= budget:
+        return text
+
+    head = (budget * 2) // 3
+    tail = budget - head
+    head_end = spans[head - 1][1] if head else 0
+    tail_start = spans[-tail][0] if tail else len(text)
+    return text[:head_end] + TRUNCATION_MARKER + text[tail_start:]
+
+
+def prompt_description(ticket: Ticket) -> str:
+    """
+    The preprocessed description when the preprocess node has run
+    """
+    return (ticket.clean_description or ticket.description).strip()
+
+
+def build_classification_prompt(ticket: Ticket) -> str:
+    return CLASSIFICATION_TICKET_TEMPLATE.format(
+        title=ticket.title.strip(),
+        description=truncate_to_budget(
+            prompt_description(ticket), MAX_DESCRIPTION_TOKENS
+        ),
+    )
+
+
+def build_summary_prompt(
+    tickets: list[Ticket],
+    clusters: list[list[int]] | None = None,
+    trends: list[str] | None = None,
+) -> str:
+    """
+    One line per near-duplicate cluster (its representative and size),
+    largest clusters first, then the labels trending above their baseline
+    """
+    if clusters is None:
+        clusters = [[i] for i in range(len(tickets))]
+    clusters = sorted(clusters, key=len, reverse=True)
+
+    groups = "\n".join(
+        SUMMARY_TICKET_TEMPLATE.format(
+            index=i + 1,
+            count=len(cluster),
+            title=tickets[cluster[0]].title.strip(),
+            description=truncate_to_budget(
+                prompt_description(tickets[cluster[0]]), SUMMARY_TICKET_TOKENS
+            ),
+        )
+        for i, cluster in enumerate(clusters)
+    )
+    if not trends:
+        return groups
+    return f"{groups}\n\nTRENDS:\n" + "\n".join(f"- {t}" for t in trends)
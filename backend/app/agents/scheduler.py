@@ -0,0 +1,89 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.agents.fair_queue import llm_queue
+from app.agents.utils import default_categorizer
+from app.config import MAX_CONCURRENT_REQUESTS, setup_logger
+from app.models import Ticket
+
+
+logger = setup_logger(__name__)
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+
+def priority_score(ticket: Ticket) -> tuple[int, float]:
+    """
+    Cheap pre-score used to order the LLM work within a run.
+    Keyword priority first, then the longest waiting ticket
+    """
+    priority = default_categorizer(ticket)["priority"]
+    created_at = ticket.created_at.timestamp() if ticket.created_at else 0.0
+    return PRIORITY_RANK.get(priority, 1), created_at
+
+
+async def schedule_tickets(
+    tickets: list[Ticket],
+    analyze: Callable[[Ticket], Awaitable[dict[str, Any]]],
+    concurrency: int = MAX_CONCURRENT_REQUESTS,
+    deadline: float | None = None,
+    on_result: Callable[[Ticket, dict[str, Any]], Awaitable[None]]
+    | None = None,
+) -> list[dict[str, Any] | Exception]:
+    """
+    Feeds `analyze` from a priority queue with a fixed pool of workers.
+    Tickets still pending when the deadline (seconds) elapses get the
+    keyword fallback. Results are returned in the order of `tickets`,
+    while `on_result` fires in completion order. Pending tickets count
+    towards their queue's backlog for admission control
+    """
+    queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+    for index, ticket in enumerate(tickets):
+        queue.put_nowait((*priority_score(ticket), index))
+
+    results: list[dict[str, Any] | Exception | None] = [None] * len(tickets)
+    expires_at = time.monotonic() + deadline if deadline else None
+
+    async def worker() -> None:
+        while True:
+            try:
+                *_, index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            ticket = tickets[index]
+            remaining = expires_at - time.monotonic() if expires_at else None
+
+            try:
+                if remaining is not None and remaining <= 0:
+                    result = default_categorizer(ticket)
+                else:
+                    result = await asyncio.wait_for(
+                        analyze(ticket), timeout=remaining
+                    )
+            except TimeoutError:
+                logger.warning(
+                    f"Deadline reached for ticket {ticket.id[:8]}..., using fallback"
+                )
+                result = default_categorizer(ticket)
+            except Exception as e:
+                result = e
+
+            results[index] = result
+            llm_queue.remove_backlog(ticket.queue)
+            if on_result and isinstance(result, dict):
+                await on_result(ticket, result)
+
+    for ticket in tickets:
+        llm_queue.add_backlog(ticket.queue)
+    workers = min(concurrency, len(tickets))
+    try:
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    finally:
+        # Tickets left unprocessed by a cancelled run
+        for ticket, result in zip(tickets, results, strict=True):
+            if result is None:
+                llm_queue.remove_backlog(ticket.queue)
+    return results
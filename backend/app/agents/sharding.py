@@ -0,0 +1,296 @@
+import argparse
+import asyncio
+import datetime as dt
+import os
+import socket
+import uuid
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.agents.claims import keep_ticket_claims, release_ticket_claims
+from app.agents.graph import run_graph
+from app.agents.nodes import node_fetch_tickets, summarize_run
+from app.config import (
+    SHARD_LEASE_SECONDS,
+    SHARD_MAX_ATTEMPTS,
+    SHARD_POLL_INTERVAL,
+    SHARD_SIZE,
+    setup_logger,
+)
+from app.database import get_db_session
+from app.exceptions import AnalysisError
+from app.models import AnalysisRun, AnalysisShard, utc_now
+
+
+logger = setup_logger(__name__)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def create_shards(
+    db: Session,
+    analysis_run_id: str,
+    ticket_ids: list[str],
+    mode: str = "incomplete",
+    shard_size: int = SHARD_SIZE,
+) -> int:
+    shards = [
+        AnalysisShard(
+            analysis_run_id=analysis_run_id,
+            shard_index=index,
+            mode=mode,
+            ticket_ids=ticket_ids[start : start + shard_size],
+        )
+        for index, start in enumerate(range(0, len(ticket_ids), shard_size))
+    ]
+    db.add_all(shards)
+    db.commit()
+    return len(shards)
+
+
+def claim_shard(
+    db: Session, worker_id: str, analysis_run_id: str | None = None
+) -> AnalysisShard | None:
+    """
+    Atomically leases the next pending (or expired) shard. SKIP LOCKED
+    keeps concurrent workers from blocking on, or double-claiming, a row
+    """
+    now = utc_now()
+    candidate = (
+        select(AnalysisShard.id)
+        .where(
+            or_(
+                AnalysisShard.status == "pending",
+                and_(
+                    AnalysisShard.status == "leased",
+                    AnalysisShard.lease_expires_at < now,
+                ),
+            )
+        )
+        .order_by(AnalysisShard.created_at, AnalysisShard.shard_index)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if analysis_run_id:
+        candidate = candidate.where(
+            AnalysisShard.analysis_run_id == analysis_run_id
+        )
+
+    shard_id = db.execute(
+        update(AnalysisShard)
+        .where(AnalysisShard.id == candidate.scalar_subquery())
+        .values(
+            status="leased",
+            lease_owner=worker_id,
+            lease_expires_at=now + dt.timedelta(seconds=SHARD_LEASE_SECONDS),
+            attempts=AnalysisShard.attempts + 1,
+        )
+        .returning(AnalysisShard.id)
+    ).scalar()
+    db.commit()
+
+    return db.get(AnalysisShard, shard_id) if shard_id else None
+
+
+def renew_lease(db: Session, shard_id: str, worker_id: str) -> bool:
+    renewed = db.execute(
+        update(AnalysisShard)
+        .where(
+            AnalysisShard.id == shard_id,
+            AnalysisShard.lease_owner == worker_id,
+            AnalysisShard.status == "leased",
+        )
+        .values(
+            lease_expires_at=utc_now()
+            + dt.timedelta(seconds=SHARD_LEASE_SECONDS)
+        )
+    ).rowcount
+    db.commit()
+    return bool(renewed)
+
+
+def release_shard(
+    db: Session, shard_id: str, worker_id: str, status: str
+) -> None:
+    db.execute(
+        update(AnalysisShard)
+        .where(
+            AnalysisShard.id == shard_id,
+            AnalysisShard.lease_owner == worker_id,
+        )
+        .values(status=status, lease_expires_at=None)
+    )
+    db.commit()
+
+
+async def _keep_lease(shard_id: str, worker_id: str) -> None:
+    while True:
+        await asyncio.sleep(SHARD_LEASE_SECONDS / 3)
+        db = get_db_session()
+        try:
+            if not renew_lease(db, shard_id, worker_id):
+                logger.warning(f"Lost lease on shard {shard_id[:8]}...")
+                return
+        finally:
+            db.close()
+
+
+async def process_shard(shard: AnalysisShard, worker_id: str) -> None:
+    logger.info(
+        f"Worker {worker_id} processing shard {shard.shard_index} of run {shard.analysis_run_id[:8]}...",
+        "CYAN",
+    )
+    heartbeat = asyncio.create_task(_keep_lease(shard.id, worker_id))
+    db = get_db_session()
+    try:
+        await run_graph(
+            db,
+            shard.analysis_run_id,
+            shard.ticket_ids,
+            shard.mode,
+            summarize=False,
+        )
+        release_shard(db, shard.id, worker_id, "done")
+
+    except Exception as e:
+        logger.error(f"Shard {shard.id[:8]}... failed: {e}")
+        status = "failed" if shard.attempts >= SHARD_MAX_ATTEMPTS else "pending"
+        release_shard(db, shard.id, worker_id, status)
+
+    finally:
+        heartbeat.cancel()
+        db.close()
+
+
+async def run_shard_worker(
+    worker_id: str | None = None,
+    analysis_run_id: str | None = None,
+    stop_when_idle: bool = False,
+) -> None:
+    """
+    Claims and processes shards until none are left (`stop_when_idle`)
+    or forever, polling every SHARD_POLL_INTERVAL seconds
+    """
+    worker_id = worker_id or default_worker_id()
+
+    while True:
+        db = get_db_session()
+        try:
+            shard = claim_shard(db, worker_id, analysis_run_id)
+            if shard:
+                db.expunge(shard)
+        finally:
+            db.close()
+
+        if shard:
+            await process_shard(shard, worker_id)
+        elif stop_when_idle:
+            return
+        else:
+            await asyncio.sleep(SHARD_POLL_INTERVAL)
+
+
+def _unfinished_shards(db: Session, analysis_run_id: str) -> int:
+    return (
+        db.query(AnalysisShard)
+        .filter(
+            AnalysisShard.analysis_run_id == analysis_run_id,
+            AnalysisShard.status.in_(["pending", "leased"]),
+        )
+        .count()
+    )
+
+
+async def run_sharded_analysis(
+    db: Session,
+    analysis_run_id: str,
+    ticket_ids: list[str] | None = None,
+    mode: str = "incomplete",
+    shard_size: int = SHARD_SIZE,
+    queue: str | None = None,
+) -> AnalysisRun:
+    """
+    Coordinator: splits the selected tickets into leased shards, works on
+    them alongside any `python -m app.agents.sharding` workers, then writes
+    one summary for the merged run
+    """
+    try:
+        # Created up front by the API when the caller does not wait
+        if not (
+            db.query(AnalysisRun)
+            .filter(AnalysisRun.id == analysis_run_id)
+            .first()
+        ):
+            db.add(
+                AnalysisRun(
+                    id=analysis_run_id, summary="Analysis in progress..."
+                )
+            )
+            db.commit()
+
+        tickets = node_fetch_tickets(
+            {
+                "analysis_run_id": analysis_run_id,
+                "ticket_ids": ticket_ids,
+                "mode": mode,
+                "queue": queue,
+            }
+        )["tickets"]
+        shard_count = create_shards(
+            db, analysis_run_id, [t.id for t in tickets], mode, shard_size
+        )
+        logger.info(
+            f"Split {len(tickets)} tickets into {shard_count} shards", "BLUE"
+        )
+
+        # Every ticket was claimed above, so the coordinator keeps the
+        # claims alive until the last shard is done, not just the shard
+        # that happens to be running
+        heartbeat = asyncio.create_task(keep_ticket_claims(analysis_run_id))
+        worker_id = default_worker_id()
+        try:
+            await run_shard_worker(
+                worker_id, analysis_run_id, stop_when_idle=True
+            )
+            while _unfinished_shards(db, analysis_run_id):
+                await asyncio.sleep(SHARD_POLL_INTERVAL)
+                # Picks up shards whose worker died and whose lease expired
+                await run_shard_worker(
+                    worker_id, analysis_run_id, stop_when_idle=True
+                )
+        finally:
+            heartbeat.cancel()
+            # Tickets of failed shards go back to the pool
+            released = release_ticket_claims(db, analysis_run_id)
+            if released:
+                logger.warning(f"Released {released} unfinished tickets")
+
+        await summarize_run(analysis_run_id, queue)
+
+        db.expire_all()
+        return (
+            db.query(AnalysisRun)
+            .filter(AnalysisRun.id == analysis_run_id)
+            .first()
+        )
+
+    except Exception as e:
+        logger.error(e)
+        db.rollback()
+        raise AnalysisError(f"Sharded analysis failed: {str(e)}") from e
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analysis shard worker")
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument(
+        "--stop-when-idle", action="store_true", help="Exit once no shard is left"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(
+        run_shard_worker(args.worker_id, stop_when_idle=args.stop_when_idle)
+    )
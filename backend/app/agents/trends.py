@@ -0,0 +1,257 @@
+import datetime as dt
+import time
+from threading import Lock
+from typing import Any, get_args
+
+import numpy as np
+from sqlalchemy import Date, func, select
+from sqlalchemy.orm import Session
+
+from app.config import (
+    TREND_EWMA_SPAN,
+    TREND_MAX_AGE_SECONDS,
+    TREND_MIN_COUNT,
+    TREND_RISING_RATIO,
+    TREND_WINDOW_DAYS,
+    TREND_Z_THRESHOLD,
+    setup_logger,
+)
+from app.database.queries import LATEST_ANALYSIS
+from app.models import Category, Priority, Ticket, TicketAnalysis
+
+
+logger = setup_logger(__name__)
+
+# Series per dimension, one column per label in code order
+DIMENSIONS = {
+    "category": (TicketAnalysis.category, get_args(Category)),
+    "priority": (TicketAnalysis.priority, get_args(Priority)),
+}
+
+
+def rolling_baseline(
+    counts: np.ndarray, window: int = TREND_WINDOW_DAYS
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and standard deviation of the `window` days before each day
+    (the day itself excluded), for every column at once
+    """
+    zero = np.zeros((1, counts.shape[1]))
+    sums = np.cumsum(np.vstack([zero, counts]), axis=0)
+    squares = np.cumsum(np.vstack([zero, counts**2]), axis=0)
+
+    days = np.arange(len(counts))
+    first = np.maximum(days - window, 0)
+    n = (days - first)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(n > 0, (sums[days] - sums[first]) / n, 0.0)
+        mean_sq = np.where(n > 0, (squares[days] - squares[first]) / n, 0.0)
+    return mean, np.sqrt(np.maximum(mean_sq - mean**2, 0.0))
+
+
+def ewma(counts: np.ndarray, span: int = TREND_EWMA_SPAN) -> np.ndarray:
+    """
+    Exponentially weighted moving average down each column. Closed form
+    per block of days, short enough for the decay powers to stay finite
+    """
+    alpha = 2 / (span + 1)
+    decay = 1 - alpha
+    block = 256
+
+    smoothed = np.empty_like(counts, dtype=float)
+    if not len(counts):
+        return smoothed
+    level = counts[0].astype(float)
+    for start in range(0, len(counts), block):
+        chunk = counts[start : start + block]
+        steps = np.arange(len(chunk))[:, None]
+        weighted = np.cumsum(chunk * decay**-steps, axis=0) * decay**steps
+        smoothed[start : start + len(chunk)] = (
+            decay ** (steps + 1) * level + alpha * weighted
+        )
+        level = smoothed[start + len(chunk) - 1]
+    return smoothed
+
+
+def z_scores(
+    counts: np.ndarray, mean: np.ndarray, std: np.ndarray
+) -> np.ndarray:
+    # Poisson noise as the floor, so quiet series don't spike on one ticket
+    return (counts - mean) / np.maximum(std, np.sqrt(np.maximum(mean, 1.0)))
+
+
+class TrendTracker:
+    """
+    Daily ticket counts per category and priority (by ticket creation
+    day, labelled with the latest analysis), kept as NumPy arrays. Loaded
+    once, then only the days touched by a run are reloaded
+    """
+
+    def __init__(self):
+        self._start: dt.date | None = None
+        self._counts: dict[str, np.ndarray] = {}
+        self._loaded_at = 0.0
+        self._lock = Lock()
+
+    def _query(self, db: Session, since: dt.date | None) -> dict[str, list]:
+        day = func.date(Ticket.created_at, type_=Date)
+        rows = {}
+        for name, (column, _) in DIMENSIONS.items():
+            query = (
+                select(day, column, func.count())
+                .select_from(Ticket)
+                .join(TicketAnalysis, LATEST_ANALYSIS)
+                .group_by(day, column)
+            )
+            if since:
+                query = query.where(
+                    Ticket.created_at
+                    >= dt.datetime.combine(since, dt.time.min)
+                )
+            rows[name] = db.execute(query).all()
+        return rows
+
+    def load(self, db: Session, since: dt.date | None = None) -> None:
+        """
+        Reloads the days from `since` on, or everything
+        """
+        if self._start is None or (since and since <= self._start):
+            since = None
+        rows = self._query(db, since)
+
+        days = [day for dimension in rows.values() for day, *_ in dimension]
+        with self._lock:
+            start = self._start if since else None
+            start = min([d for d in [start, *days] if d], default=None)
+            if start is None:
+                return
+            end = max([dt.datetime.now(dt.UTC).date(), *days])
+            length = (end - start).days + 1
+
+            for name, (_, labels) in DIMENSIONS.items():
+                counts = np.zeros((length, len(labels)))
+                previous = self._counts.get(name)
+                if since and previous is not None:
+                    # Keep the untouched days before `since`
+                    offset = (self._start - start).days
+                    keep = min(len(previous), (since - self._start).days)
+                    counts[offset : offset + keep] = previous[:keep]
+
+                codes = {label: i for i, label in enumerate(labels)}
+                valid = [r for r in rows[name] if r[1] in codes]
+                if valid:
+                    day_index = np.array([(d - start).days for d, *_ in valid])
+                    label_index = np.array([codes[r[1]] for r in valid])
+                    values = np.array([r[2] for r in valid], dtype=float)
+                    np.add.at(counts, (day_index, label_index), values)
+                self._counts[name] = counts
+
+            self._start = start
+            self._loaded_at = time.monotonic()
+
+    def update_for_run(self, db: Session, analysis_run_id: str) -> None:
+        """
+        Reloads the days of the tickets a run has just labelled. Nothing
+        to do before the first full load
+        """
+        if self._start is None:
+            return
+        oldest = db.execute(
+            select(func.min(Ticket.created_at))
+            .join(TicketAnalysis, TicketAnalysis.ticket_id == Ticket.id)
+            .where(TicketAnalysis.analysis_run_id == analysis_run_id)
+        ).scalar()
+        if oldest:
+            self.load(db, oldest.date())
+
+    def ensure_fresh(self, db: Session) -> None:
+        """
+        Picks up runs of other processes (shard workers) now and then
+        """
+        if self._start is None:
+            self.load(db)
+        elif time.monotonic() - self._loaded_at > TREND_MAX_AGE_SECONDS:
+            today = dt.datetime.now(dt.UTC).date()
+            self.load(db, today - dt.timedelta(days=1))
+
+    def report(self, days: int = 30) -> dict[str, Any]:
+        """
+        Per label: the latest day's count against its rolling baseline,
+        z-score, EWMA and spike/rising flags, plus every spike of the
+        last `days` days
+        """
+        with self._lock:
+            start, series = self._start, dict(self._counts)
+        if start is None:
+            return {"as_of": None, "current": {}, "spikes": []}
+
+        current: dict[str, list[dict[str, Any]]] = {}
+        spikes = []
+        for name, counts in series.items():
+            labels = DIMENSIONS[name][1]
+            mean, std = rolling_baseline(counts)
+            z = z_scores(counts, mean, std)
+            smoothed = ewma(counts)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.where(mean > 0, counts / mean, np.nan)
+                level = np.where(mean > 0, smoothed / mean, np.nan)
+            spiking = (z >= TREND_Z_THRESHOLD) & (counts >= TREND_MIN_COUNT)
+
+            current[name] = [
+                {
+                    "label": label,
+                    "count": int(counts[-1, i]),
+                    "baseline": round(float(mean[-1, i]), 2),
+                    "ratio": _rounded(ratio[-1, i]),
+                    "z_score": round(float(z[-1, i]), 2),
+                    "ewma": round(float(smoothed[-1, i]), 2),
+                    "spike": bool(spiking[-1, i]),
+                    "rising": bool(level[-1, i] >= TREND_RISING_RATIO),
+                }
+                for i, label in enumerate(labels)
+            ]
+
+            recent = max(len(counts) - days, 0)
+            for day, i in np.argwhere(spiking[recent:]):
+                day += recent
+                spikes.append(
+                    {
+                        "date": start + dt.timedelta(days=int(day)),
+                        "dimension": name,
+                        "label": labels[i],
+                        "count": int(counts[day, i]),
+                        "baseline": round(float(mean[day, i]), 2),
+                        "z_score": round(float(z[day, i]), 2),
+                    }
+                )
+
+        as_of = start + dt.timedelta(days=len(next(iter(series.values()))) - 1)
+        spikes.sort(key=lambda spike: (spike["date"], -spike["z_score"]))
+        return {"as_of": as_of, "current": current, "spikes": spikes}
+
+
+def _rounded(value: float) -> float | None:
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def describe_trends(report: dict[str, Any]) -> list[str]:
+    """
+    One line per label that spikes or rises above its baseline today,
+    for the summary prompt
+    """
+    lines = []
+    for name, labels in report["current"].items():
+        for entry in labels:
+            if not (entry["spike"] or entry["rising"]):
+                continue
+            ratio = f"{entry['ratio']}x" if entry["ratio"] else "far above"
+            lines.append(
+                f"{name} {entry['label']}: {entry['count']} tickets on "
+                f"{report['as_of']}, {ratio} the {TREND_WINDOW_DAYS}-day "
+                f"baseline of {entry['baseline']}/day "
+                f"(z={entry['z_score']}{', spike' if entry['spike'] else ''})"
+            )
+    return lines
+
+
+trend_tracker = TrendTracker()
@@ -1,18 +1,40 @@
 import json
 import re
+import time
 from typing import Any
 
-from pydantic import BaseModel
+from openai import AsyncOpenAI, BadRequestError
+from pydantic import BaseModel, ValidationError
 
+from app.agents.hedging import hedged_request
+from app.agents.metrics import record
+from app.agents.prompts import count_tokens
 from app.config import (
     MAX_TOKENS,
     MODEL,
+    STRUCTURED_OUTPUT_MODE,
+    STRUCTURED_OUTPUT_RETRY_SECONDS,
     TEMPERATURE,
-    get_async_openai_client,
+    setup_logger,
 )
 from app.models import Ticket
 
 
+logger = setup_logger(__name__)
+
+STRUCTURED_OUTPUT_MODES = ["json_schema", "json_object", "text"]
+
+# Downgraded at runtime when the provider rejects a response format, the
+# configured mode is tried again after STRUCTURED_OUTPUT_RETRY_SECONDS
+_structured_output_mode = STRUCTURED_OUTPUT_MODE
+_downgraded_at = 0.0
+
+_RESPONSE_FORMAT_ERROR = re.compile(
+    r"response_format|json_schema|json_object|structured output",
+    re.IGNORECASE,
+)
+
+
 def default_categorizer(ticket: Ticket) -> dict[str, Any]:
     title_desc = f"{ticket.title} {ticket.description}".lower()
 
@@ -62,11 +84,14 @@ def default_categorizer(ticket: Ticket) -> dict[str, Any]:
         "category": category,
         "priority": priority,
         "notes": "Auto-categorized based on keywords in title/description",
+        "model": "fallback",
     }
 
 
 def default_summarizer(
-    tickets: list[Ticket], results: list[dict[str, Any]]
+    tickets: list[Ticket],
+    results: list[dict[str, Any]],
+    trends: list[str] | None = None,
 ) -> str:
     """
     Creates a summary with attributes availabe within tiekcts and the results
@@ -113,12 +138,16 @@ def default_summarizer(
             f"Most common issue: {top_category[0]} ({top_category[1]} tickets)."
         )
 
+    if trends:
+        summary_parts.append(f"Trending: {'; '.join(trends)}.")
+
     return " ".join(summary_parts)
 
 
 async def get_structured_llm_response(
     prompt: str,
-    response_format: BaseModel = None,
+    system_prompt: str | None = None,
+    response_format: type[BaseModel] | None = None,
     model: str = MODEL,
     temperature: float = TEMPERATURE,
     max_tokens: int = MAX_TOKENS,
@@ -126,48 +155,143 @@ async def get_structured_llm_response(
 ) -> Any:
     """
     Makes an async request to the provider and parses the response in the provided structured format
+    Slow calls may be hedged to a second backend, see app.agents.hedging
 
     """
 
-    client = get_async_openai_client()
+    messages = [{"role": "user", "content": prompt}]
+    if system_prompt:
+        messages.insert(0, {"role": "system", "content": system_prompt})
+
+    async def attempt(client: AsyncOpenAI) -> Any:
+        if isinstance(response_format, type) and issubclass(
+            response_format, BaseModel
+        ):
+            return await get_structured_output(
+                client,
+                messages,
+                response_format,
+                model,
+                temperature,
+                max_tokens,
+            )
 
-    try:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
 
-        if response_format and isinstance(response_format, BaseModel):
-            response = await client.chat.completions.parse(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=max_tokens,
-                response_format=response_format,
-            )
+        data = response.choices[0].message.content
+        if not data or not data.strip():
+            raise Exception("Empty response from LLM")
 
-            if response.choices[0].message.refusal:
-                raise Exception("Refusal for structured output parsing")
+        if is_markdown:
+            return extract_markdown(data)
 
-            parsed = response.choices[0].message.parsed
-            return parsed.model_dump()
+        return extract_json(data)
 
-        else:
-            response = await client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
+    return await hedged_request(
+        attempt, count_tokens(f"{system_prompt or ''}\n{prompt}")
+    )
 
-            data = response.choices[0].message.content
-            if not data or not data.strip():
-                raise Exception("Empty response from LLM")
 
-            if is_markdown:
-                return extract_markdown(data)
+def _current_output_mode() -> str:
+    global _structured_output_mode
 
-            else:
-                return extract_json(data)
+    if (
+        _structured_output_mode != STRUCTURED_OUTPUT_MODE
+        and time.monotonic() - _downgraded_at > STRUCTURED_OUTPUT_RETRY_SECONDS
+    ):
+        _structured_output_mode = STRUCTURED_OUTPUT_MODE
+    return _structured_output_mode
 
-    except Exception as e:
-        raise e
+
+def rejects_response_format(error: BadRequestError) -> bool:
+    """
+    Whether a 400 is about the requested output format, rather than the
+    prompt (too long, bad content) of this one request
+    """
+    if error.param == "response_format":
+        return True
+    return bool(_RESPONSE_FORMAT_ERROR.search(str(error.message)))
+
+
+def _response_format_for(
+    mode: str, response_format: type[BaseModel]
+) -> dict[str, Any] | None:
+    if mode == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": response_format.__name__,
+                "schema": response_format.model_json_schema(),
+                "strict": True,
+            },
+        }
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
+
+
+async def get_structured_output(
+    client: AsyncOpenAI,
+    messages: list[dict[str, str]],
+    response_format: type[BaseModel],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+) -> dict[str, Any]:
+    """
+    Requests schema-constrained output, stepping down to plain JSON mode
+    and then free text for servers that reject the stricter modes.
+    Whatever comes back is parsed tolerantly and validated
+    """
+    global _structured_output_mode, _downgraded_at
+
+    mode = _current_output_mode()
+    kwargs = {}
+    if format_spec := _response_format_for(mode, response_format):
+        kwargs["response_format"] = format_spec
+
+    try:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs,
+        )
+    except BadRequestError as e:
+        if mode == "text" or not rejects_response_format(e):
+            raise
+        next_mode = STRUCTURED_OUTPUT_MODES[
+            STRUCTURED_OUTPUT_MODES.index(mode) + 1
+        ]
+        logger.warning(
+            f"Provider rejected {mode} output, falling back to {next_mode}"
+        )
+        _structured_output_mode = next_mode
+        _downgraded_at = time.monotonic()
+        return await get_structured_output(
+            client, messages, response_format, model, temperature, max_tokens
+        )
+
+    message = response.choices[0].message
+    if getattr(message, "refusal", None):
+        raise Exception("Refusal for structured output parsing")
+
+    try:
+        parsed = response_format.model_validate(
+            parse_partial_json(message.content or "")
+        )
+    except (ValueError, ValidationError):
+        record("parse_failure")
+        raise
+
+    record("parse_success")
+    return parsed.model_dump()
 
 
 def extract_markdown(content: str) -> str | None:
@@ -181,13 +305,64 @@ def extract_markdown(content: str) -> str | None:
     raise ValueError("No MD tags found")
 
 
-def extract_json(content: str) -> str | None:
+def extract_json(content: str) -> Any:
     """
-    Extract JSON embedded content from the LLM response
-    Returns None if no appropriate TAGS are found
+    Extract JSON embedded content from the LLM response, with or without
+    code fences
+    Raises ValueError if no JSON object can be recovered
 
     """
-    match = re.search(r"```(?:json)?\s*(.*?)\s*```", content, re.DOTALL)
+    return parse_partial_json(content)
+
+
+def parse_partial_json(content: str) -> Any:
+    """
+    Tolerant JSON parser for LLM output. Skips surrounding prose (brackets
+    in it included) and code fences, and closes strings/brackets left open
+    by a truncated (or still streaming) response. Objects are looked for
+    before arrays, and the first start that parses or repairs wins
+    """
+    match = re.search(r"```(?:json)?\s*(.*?)(?:```|$)", content, re.DOTALL)
     if match:
-        return json.loads(match.group(1))
-    raise ValueError("No JSON tags found")
+        content = match.group(1)
+
+    starts = [i for i, char in enumerate(content) if char == "{"]
+    starts += [i for i, char in enumerate(content) if char == "["]
+    if not starts:
+        raise ValueError("No JSON object found")
+
+    error = None
+    for start in starts:
+        candidate = content[start:]
+        try:
+            return json.JSONDecoder().raw_decode(candidate)[0]
+        except json.JSONDecodeError:
+            pass
+        try:
+            return json.loads(_close_truncated(candidate))
+        except json.JSONDecodeError as e:
+            error = error or e
+    raise ValueError(f"Unable to parse JSON from response: {error}")
+
+
+def _close_truncated(content: str) -> str:
+    closers = []
+    in_string = escaped = False
+    for char in content:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]" and closers:
+            closers.pop()
+
+    repaired = content + ('"' if in_string else "")
+    repaired = re.sub(r"[,:\s]+$", "", repaired)
+    return repaired + "".join(reversed(closers))
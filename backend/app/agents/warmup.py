@@ -0,0 +1,181 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any
+
+from app.agents.coalesce import analysis_requests
+from app.agents.continuous import continuous_triage
+from app.agents.fair_queue import llm_queue
+from app.agents.prompts import (
+    CLASSIFICATION_SYSTEM_PROMPT,
+    CLASSIFICATION_TICKET_TEMPLATE,
+    SUMMARY_SYSTEM_PROMPT,
+)
+from app.config import (
+    API_URL,
+    KEEP_ALIVE_INTERVAL,
+    MODEL,
+    OLLAMA_KEEP_ALIVE,
+    WARMUP_TIMEOUT,
+    get_async_openai_client,
+    get_hedge_openai_client,
+    settings,
+    setup_logger,
+)
+
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+logger = setup_logger(__name__)
+
+# Same system prompts as real calls, so the server caches their prefix
+PRIMING_PROMPTS = [
+    (
+        CLASSIFICATION_SYSTEM_PROMPT,
+        CLASSIFICATION_TICKET_TEMPLATE.format(
+            title="Warm-up", description="Warm-up request"
+        ),
+    ),
+    (SUMMARY_SYSTEM_PROMPT, "Group 1 (1 tickets): Title: Warm-up"),
+]
+
+
+def native_url(api_url: str) -> str:
+    """
+    Ollama's native API lives next to its OpenAI-compatible /v1
+    """
+    return api_url.rstrip("/").removesuffix("/v1")
+
+
+class ModelWarmer:
+    """
+    Loads the model on every LLM backend at startup and primes the prompt
+    prefixes, so the first analysis runs at steady-state latency. Then
+    keeps the model resident (Ollama `keep_alive`) for as long as analysis
+    work is pending. `ready` turns true once warm-up has finished or
+    given up, which is what /health reports to load balancers
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.status: dict[str, Any] = {}
+        self._task: asyncio.Task | None = None
+        self._pinged_at = 0.0
+        self._ping: asyncio.Task | None = None
+
+    def _backends(self) -> list[tuple[str, "AsyncOpenAI"]]:
+        backends = [(API_URL, get_async_openai_client())]
+        if hedge := get_hedge_openai_client():
+            backends.append((settings.hedge_api_url, hedge))
+        return backends
+
+    async def preload(self, api_url: str) -> bool:
+        """
+        Ollama loads a model on a prompt-less generate request. Other
+        servers answer with an error and are only primed
+        """
+        # Imported on first use to keep application startup light
+        import httpx
+
+        try:
+            async with httpx.AsyncClient(timeout=WARMUP_TIMEOUT) as client:
+                response = await client.post(
+                    f"{native_url(api_url)}/api/generate",
+                    json={"model": MODEL, "keep_alive": OLLAMA_KEEP_ALIVE},
+                )
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def prime(self, client: "AsyncOpenAI") -> None:
+        for system_prompt, prompt in PRIMING_PROMPTS:
+            await client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                max_tokens=1,
+                temperature=0,
+            )
+
+    async def warm_up(self) -> None:
+        try:
+            backends = self._backends()
+        except ValueError as e:  # No API key, every call uses the fallback
+            self.status = {"skipped": str(e)}
+            return
+
+        for api_url, client in backends:
+            started = time.perf_counter()
+            try:
+                preloaded = await self.preload(api_url)
+                await asyncio.wait_for(self.prime(client), WARMUP_TIMEOUT)
+                elapsed = (time.perf_counter() - started) * 1000
+                self.status[api_url] = {
+                    "warm": True,
+                    "preloaded": preloaded,
+                    "warmup_ms": round(elapsed),
+                }
+                logger.info(
+                    f"Model {MODEL} warm on {api_url} in {elapsed:.0f} ms",
+                    "GREEN",
+                )
+            except Exception as e:
+                self.status[api_url] = {"warm": False, "error": str(e)}
+                logger.warning(f"Warm-up of {api_url} failed: {e}")
+
+    @staticmethod
+    def work_pending() -> bool:
+        return bool(
+            llm_queue.pending
+            or len(analysis_requests)
+            or continuous_triage.running
+        )
+
+    async def ping(self) -> None:
+        """
+        Reloads the model where it was evicted, before a call stalls on it
+        """
+        self._pinged_at = time.monotonic()
+        for api_url, status in self.status.items():
+            if isinstance(status, dict) and status.get("preloaded"):
+                await self.preload(api_url)
+
+    def touch(self) -> None:
+        """
+        Called when analysis work arrives after an idle period, so a model
+        load overlaps the fetch/preprocess steps instead of the first call
+        """
+        if not self.ready or self.status.get("skipped"):
+            return
+        if time.monotonic() - self._pinged_at > KEEP_ALIVE_INTERVAL:
+            self._ping = asyncio.get_running_loop().create_task(self.ping())
+
+    async def _keep_alive(self) -> None:
+        while True:
+            await asyncio.sleep(KEEP_ALIVE_INTERVAL)
+            if self.work_pending():
+                await self.ping()
+
+    async def _run(self) -> None:
+        try:
+            await self.warm_up()
+        finally:
+            self.ready = True
+            self._pinged_at = time.monotonic()
+        if self.status.get("skipped") is None:
+            await self._keep_alive()
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+model_warmer = ModelWarmer()
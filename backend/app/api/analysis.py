@@ -1,12 +1,20 @@
+import asyncio
 import uuid
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 
-from app.agents.graph import run_graph
+from app.agents.coalesce import analysis_requests
+from app.agents.fair_queue import llm_queue
+from app.agents.metrics import llm_metrics
+from app.agents.warmup import model_warmer
 from app.config import setup_logger
-from app.database import get_db
-from app.exceptions import AnalysisRunNotFoundError, DatabaseError
+from app.database import get_db, get_db_session, get_read_db, mark_write
+from app.exceptions import (
+    AnalysisRunNotFoundError,
+    BaseAppException,
+    DatabaseError,
+)
 from app.models import AnalysisRun, Ticket, TicketAnalysis
 from app.schemas import (
     AnalysisRequest,
@@ -20,44 +28,138 @@ logger = setup_logger(__name__)
 router = APIRouter(prefix="/api/analysis", tags=["analysis"])
 
 
-@router.post("/", response_model=AnalysisRunResponse)
-async def run_analysis(request: AnalysisRequest, db: Session = Depends(get_db)):
-    try:
-        analysis_run_id = str(uuid.uuid4())
-        analysis_run = await run_graph(db, analysis_run_id, request.ticket_ids)
+def build_run_response(db: Session, analysis_run: AnalysisRun):
+    """
+    Analyses are listed in the order they were persisted, which is
+    priority order within a run
+    """
+    ticket_analyses = (
+        db.query(TicketAnalysis)
+        .filter(TicketAnalysis.analysis_run_id == analysis_run.id)
+        # Analyses never predate their run, this prunes older partitions
+        .filter(TicketAnalysis.created_at >= analysis_run.created_at)
+        .order_by(TicketAnalysis.created_at)
+        .all()
+    )
+
+    analysis_responses = []
+    for ta in ticket_analyses:
+        ticket = db.query(Ticket).filter(Ticket.id == ta.ticket_id).first()
+        if ticket:
+            analysis_responses.append(
+                TicketAnalysisResponse(
+                    id=ta.id,
+                    created_at=ta.created_at,
+                    analysis_run_id=ta.analysis_run_id,
+                    ticket=ticket,
+                )
+            )
 
-        ticket_analyses = (
-            db.query(TicketAnalysis)
-            .filter(TicketAnalysis.analysis_run_id == analysis_run.id)
-            .all()
-        )
+    return AnalysisRunResponse(
+        id=analysis_run.id,
+        created_at=analysis_run.created_at,
+        summary=analysis_run.summary,
+        stats=analysis_run.stats,
+        ticket_analyses=analysis_responses,
+    )
 
-        analysis_responses = []
-        for ta in ticket_analyses:
-            ticket = db.query(Ticket).filter(Ticket.id == ta.ticket_id).first()
-            if ticket:
-                analysis_responses.append(
-                    TicketAnalysisResponse(
-                        id=ta.id,
-                        created_at=ta.created_at,
-                        analysis_run_id=ta.analysis_run_id,
-                        ticket=ticket,
-                    )
+
+@router.post("/", response_model=AnalysisRunResponse)
+async def run_analysis(
+    request: AnalysisRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    """
+    Runs an analysis and answers with its results. With `wait` false it
+    answers 202 with the run as soon as it has started, and its results
+    can be polled from GET /api/analysis/{run_id} (Location) as they are
+    saved, urgent tickets first
+    """
+    # The agent stack is loaded on the first analysis, not at startup
+    from app.agents.graph import run_graph
+    from app.agents.sharding import run_sharded_analysis
+
+    async def start_run(analysis_run_id: str) -> str:
+        run_db = get_db_session()  # Shared by every coalesced caller
+        try:
+            if request.shard_size:
+                await run_sharded_analysis(
+                    run_db,
+                    analysis_run_id,
+                    request.ticket_ids,
+                    request.mode,
+                    request.shard_size,
+                    queue=request.queue,
+                )
+            else:
+                await run_graph(
+                    run_db,
+                    analysis_run_id,
+                    request.ticket_ids,
+                    request.mode,
+                    request.deadline_seconds,
+                    queue=request.queue,
                 )
+        finally:
+            run_db.close()
+        return analysis_run_id
+
+    # Identical requests attach to the in-flight run instead of starting one
+    key = (
+        request.mode,
+        request.queue,
+        tuple(sorted(request.ticket_ids)) if request.ticket_ids else None,
+        request.deadline_seconds,
+        request.shard_size,
+    )
+    if key in analysis_requests:
+        logger.info(f"Attaching to in-flight analysis for {key}", "CYAN")
+    else:
+        # Raises a 429 while a busy queue would only add to the backlog
+        llm_queue.admit(request.queue)
+        model_warmer.touch()
 
-        return AnalysisRunResponse(
-            id=analysis_run.id,
-            created_at=analysis_run.created_at,
-            summary=analysis_run.summary,
-            ticket_analyses=analysis_responses,
+    try:
+        new_run_id = str(uuid.uuid4())
+        if key not in analysis_requests:
+            # Exists before the run starts, so it can be polled right away
+            db.add(
+                AnalysisRun(id=new_run_id, summary="Analysis in progress...")
+            )
+            db.commit()
+        task, analysis_run_id = analysis_requests.start(
+            key, lambda: start_run(new_run_id), tag=new_run_id
+        )
+        mark_write(db)
+
+        if request.wait:
+            # A disconnecting caller must not cancel the run others await
+            await asyncio.shield(task)
+            db.expire_all()
+        else:
+            task.add_done_callback(_log_run_failure)
+            response.status_code = 202
+            response.headers["Location"] = f"{router.prefix}/{analysis_run_id}"
+
+        analysis_run = (
+            db.query(AnalysisRun)
+            .filter(AnalysisRun.id == analysis_run_id)
+            .first()
         )
+        return build_run_response(db, analysis_run)
     except Exception as e:
         db.rollback()
         raise DatabaseError(str(e)) from e
 
 
+def _log_run_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and (error := task.exception()):
+        logger.error(f"Background analysis failed: {error}")
+
+
 @router.get("/latest", response_model=AnalysisRunResponse | None)
-def get_latest_analysis(db: Session = Depends(get_db)):
+def get_latest_analysis(db: Session = Depends(get_read_db)):
     try:
         latest_run = (
             db.query(AnalysisRun)
@@ -68,29 +170,60 @@ def get_latest_analysis(db: Session = Depends(get_db)):
         if not latest_run:
             raise AnalysisRunNotFoundError()
 
-        ticket_analyses = (
-            db.query(TicketAnalysis)
-            .filter(TicketAnalysis.analysis_run_id == latest_run.id)
-            .all()
-        )
+        return build_run_response(db, latest_run)
+    except BaseAppException:
+        raise
+    except Exception as e:
+        raise DatabaseError(str(e)) from e
 
-        analysis_responses = []
-        for ta in ticket_analyses:
-            ticket = db.query(Ticket).filter(Ticket.id == ta.ticket_id).first()
-            analysis_responses.append(
-                TicketAnalysisResponse(
-                    id=ta.id,
-                    created_at=ta.created_at,
-                    analysis_run_id=ta.analysis_run_id,
-                    ticket=ticket,
-                )
-            )
 
-        return AnalysisRunResponse(
-            id=latest_run.id,
-            created_at=latest_run.created_at,
-            summary=latest_run.summary,
-            ticket_analyses=analysis_responses,
+@router.get("/metrics")
+def get_llm_metrics():
+    return llm_metrics.snapshot()
+
+
+@router.get("/queues")
+def get_llm_queues():
+    return llm_queue.snapshot()
+
+
+@router.get("/trends")
+def get_trends(
+    days: int = Query(default=30, ge=1, le=3650),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Today's count per category and priority against its rolling baseline
+    (z-score, EWMA), plus the spikes of the last `days` days
+    """
+    # NumPy is loaded on the first request, not at startup
+    from app.agents.trends import trend_tracker
+
+    try:
+        trend_tracker.ensure_fresh(db)
+        return trend_tracker.report(days)
+    except Exception as e:
+        raise DatabaseError(str(e)) from e
+
+
+@router.get("/{run_id}", response_model=AnalysisRunResponse)
+def get_analysis_run(run_id: uuid.UUID, db: Session = Depends(get_read_db)):
+    """
+    Results of a run persisted so far, so urgent tickets can be read
+    while the rest of the run is still in progress
+    """
+    try:
+        analysis_run = (
+            db.query(AnalysisRun)
+            .filter(AnalysisRun.id == str(run_id))
+            .first()
         )
+
+        if not analysis_run:
+            raise AnalysisRunNotFoundError(run_id)
+
+        return build_run_response(db, analysis_run)
+    except BaseAppException:
+        raise
     except Exception as e:
         raise DatabaseError(str(e)) from e
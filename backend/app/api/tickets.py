@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import desc
+import datetime as dt
+import uuid
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.exceptions import DatabaseError
-from app.models import Ticket, TicketAnalysis
-from app.schemas import TicketListCreate, TicketResponse
+from app.agents.continuous import continuous_triage
+from app.database import get_db, get_read_db, read_engine
+from app.database.export import MEDIA_TYPES, ExportFormat, stream_export
+from app.database.queries import select_tickets
+from app.database.search import SearchSort, search_tickets
+from app.exceptions import BaseAppException, DatabaseError
+from app.models import Category, Priority, Ticket, TicketAnalysis, TicketStatus
+from app.schemas import (
+    TicketFilter,
+    TicketListCreate,
+    TicketResponse,
+    TicketSearchResponse,
+)
 
 
 router = APIRouter(prefix="/api/tickets", tags=["tickets"])
@@ -27,6 +39,9 @@ def create_tickets(
         for ticket in created_tickets:
             db.refresh(ticket)
 
+        continuous_triage.enqueue(
+            [t.id for t in created_tickets if t.status == "incomplete"]
+        )
         return created_tickets
     except Exception as e:
         db.rollback()
@@ -34,25 +49,23 @@ def create_tickets(
 
 
 @router.get("/", response_model=list[TicketResponse])
-def get_tickets(db: Session = Depends(get_db)):
+def get_tickets(
+    filters: TicketFilter = Depends(), db: Session = Depends(get_read_db)
+):
     try:
-        tickets = db.query(Ticket).all()
+        rows = db.execute(
+            select_tickets(Ticket, TicketAnalysis, filters=filters)
+        ).all()
         result = []
 
-        for ticket in tickets:
-            latest_analysis = (
-                db.query(TicketAnalysis)
-                .filter(TicketAnalysis.ticket_id == ticket.id)
-                .order_by(desc(TicketAnalysis.created_at))
-                .first()
-            )
-
+        for ticket, latest_analysis in rows:
             ticket_data = TicketResponse(
                 id=ticket.id,
                 created_at=ticket.created_at,
                 title=ticket.title,
                 description=ticket.description,
                 status=ticket.status,
+                queue=ticket.queue,
                 category=latest_analysis.category if latest_analysis else None,
                 priority=latest_analysis.priority if latest_analysis else None,
                 notes=latest_analysis.notes if latest_analysis else None,
@@ -62,3 +75,62 @@ def get_tickets(db: Session = Depends(get_db)):
         return result
     except Exception as e:
         raise DatabaseError(str(e)) from e
+
+
+@router.get("/export")
+def export_tickets(
+    request: Request,
+    format: ExportFormat = "csv",
+    run_id: uuid.UUID | None = None,
+    filters: TicketFilter = Depends(),
+):
+    """
+    Streams tickets with their latest (or `run_id`'s) analysis. Rows come
+    from a server-side cursor and are encoded batch by batch in the
+    threadpool, so large exports neither buffer nor block the event loop.
+    The first batch is read before the response starts, so a failing
+    query still gets an error status
+    """
+    stamp = dt.datetime.now(dt.UTC).strftime("%Y%m%dT%H%M%S")
+    try:
+        chunks = stream_export(
+            format,
+            filters,
+            str(run_id) if run_id else None,
+            read_engine(request),
+        )
+    except BaseAppException:
+        raise
+    except Exception as e:
+        raise DatabaseError(str(e)) from e
+
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="tickets-{stamp}.{format}"'
+            )
+        },
+    )
+
+
+@router.get("/search", response_model=TicketSearchResponse)
+def search(
+    q: str = Query(min_length=1, max_length=256),
+    category: Category | None = None,
+    priority: Priority | None = None,
+    status: TicketStatus | None = None,
+    sort: SearchSort = "rank",
+    cursor: str | None = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+):
+    try:
+        return search_tickets(
+            db, q, category, priority, status, sort, cursor, limit
+        )
+    except BaseAppException:
+        raise
+    except Exception as e:
+        raise DatabaseError(str(e)) from e
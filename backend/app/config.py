@@ -1,23 +1,45 @@
 import logging
 import os
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 
 load_dotenv()
 
 
 class Settings(BaseSettings):
+    # Fields may start with "model_" (model_warmup)
+    model_config = SettingsConfigDict(protected_namespaces=("settings_",))
+
     database_url: str = os.environ.get("DATABASE_URL")
     environment: str = os.environ.get("ENVIRONMENT", "development")
+    # Second backend or replica for hedged LLM requests, hedging is off
+    # when unset
+    hedge_api_url: str | None = os.environ.get("HEDGE_API_URL")
+    # Comma separated read replica URLs, reads use the primary when unset
+    read_replica_urls: str = os.environ.get("READ_REPLICA_URLS", "")
+    # Relative LLM capacity per ticket queue, e.g. "billing=3,platform=1";
+    # unlisted queues weigh 1
+    queue_weights: str = os.environ.get("QUEUE_WEIGHTS", "")
+    # Preload and keep the model resident, see app.agents.warmup
+    model_warmup: bool = (
+        os.environ.get("MODEL_WARMUP", "true").lower() == "true"
+    )
+    continuous_triage: bool = (
+        os.environ.get("CONTINUOUS_TRIAGE", "false").lower() == "true"
+    )
 
 
 settings = Settings()
 
-_async_openai_client: AsyncOpenAI | None = None
+_async_openai_client: "AsyncOpenAI | None" = None
+_hedge_openai_client: "AsyncOpenAI | None" = None
 
 LLM_API_KEY = os.environ.get("LLM_API_KEY")
 MODEL = "gemma3"  # "openai/gpt-oss-20b:free"
@@ -27,7 +49,48 @@ API_URL = (
 TEMPERATURE = 0.1
 MAX_TOKENS = 1000
 SUMMARY_TOKENS = 200
-MAX_CONCURRENT_REQUESTS = 3
+STRUCTURED_OUTPUT_MODE = "json_schema"  # json_schema | json_object | text
+STRUCTURED_OUTPUT_RETRY_SECONDS = 600.0  # Until a downgraded mode is retried
+MAX_CONCURRENT_REQUESTS = 3  # Workers per run, LLM_CONCURRENCY caps calls
+LLM_CONCURRENCY = 4  # LLM calls in flight across all runs of the process
+LLM_MAX_BACKLOG = 500  # Pending tickets beyond which busy queues get a 429
+DEFAULT_QUEUE = "default"  # Queue of tickets and requests without one
+OLLAMA_KEEP_ALIVE = "30m"  # How long Ollama keeps the model after a ping
+KEEP_ALIVE_INTERVAL = 120.0  # Seconds between pings while work is pending
+WARMUP_TIMEOUT = 120.0  # Seconds a model load may take before giving up
+MAX_DESCRIPTION_TOKENS = 1024  # Ticket text budget in the classify prompt
+SUMMARY_TICKET_TOKENS = 128  # Per-ticket text budget in the summary prompt
+DEDUP_SHINGLE_SIZE = 5  # Characters per shingle for near-duplicate detection
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32  # Bands of MINHASH_PERMUTATIONS / LSH_BANDS rows each
+DEDUP_THRESHOLD = 0.8  # Estimated Jaccard similarity to merge two tickets
+SEARCH_LANGUAGE = "english"  # Text search config, as in migration 0004
+HEDGE_PERCENTILE = 95  # Calls slower than this latency percentile are hedged
+HEDGE_MAX_EXTRA_LOAD = 0.1  # Hedges allowed per primary call
+HEDGE_MIN_SAMPLES = 20  # Calls observed per prompt size before hedging
+HEDGE_WINDOW = 200  # Latencies kept per prompt size
+TREND_WINDOW_DAYS = 28  # Days before each day that form its baseline
+TREND_EWMA_SPAN = 7  # Days, smoothing of the trend level
+TREND_Z_THRESHOLD = 3.0  # Daily counts this many deviations up are spikes
+TREND_MIN_COUNT = 5  # Fewer tickets a day never count as a spike
+TREND_RISING_RATIO = 1.5  # EWMA over baseline that counts as rising
+TREND_MAX_AGE_SECONDS = 300  # Recent days are reloaded after this
+CONTINUOUS_MAX_BATCH = 20  # Tickets per micro-batch in continuous mode
+CONTINUOUS_MAX_LATENCY = 2.0  # Seconds a ticket may wait for its batch
+SUMMARY_INTERVAL = 300  # Seconds between rolling summaries
+CLAIM_LEASE_SECONDS = 600  # Claimed tickets are released after this
+SHARD_SIZE = 50  # Tickets per shard in sharded runs
+SHARD_LEASE_SECONDS = 120  # A shard is re-claimable once its lease expires
+SHARD_POLL_INTERVAL = 2.0  # Seconds between claim attempts of idle workers
+SHARD_MAX_ATTEMPTS = 3
+PARTITION_MONTHS_AHEAD = 2  # Monthly partitions created ahead of time
+PARTITION_CHECK_INTERVAL = 6 * 3600  # Seconds between partition checks
+HOT_MONTHS = 3  # Runs and partitions younger than this are never archived
+RETENTION_RUNS_PER_TICKET = 3  # Latest analyses per ticket kept in Postgres
+REPLICA_CHECK_INTERVAL = 5.0  # Seconds between replica health checks
+REPLICA_MAX_LAG_SECONDS = 10.0  # Replicas further behind are skipped
+READ_YOUR_WRITES_SECONDS = 5.0  # Reads stay on the primary after a write
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", "archive")
 LOG_COLORS = {
     "RED": "\033[31m",
     "GREEN": "\033[32m",
@@ -134,15 +197,34 @@ def setup_logger(name: str = __name__) -> CustomLogger:
     return CustomLogger(logger)
 
 
-def get_async_openai_client() -> AsyncOpenAI:
+def get_async_openai_client() -> "AsyncOpenAI":
     global _async_openai_client
 
     if not LLM_API_KEY:
         raise ValueError("Invalid API Key provided")
 
     if not _async_openai_client:
+        # Imported on first use to keep application startup light
+        from openai import AsyncOpenAI
+
         _async_openai_client = AsyncOpenAI(
             base_url=API_URL,
             api_key="ollama-api-key",
         )
     return _async_openai_client
+
+
+def get_hedge_openai_client() -> "AsyncOpenAI | None":
+    global _hedge_openai_client
+
+    if not settings.hedge_api_url or not LLM_API_KEY:
+        return None
+
+    if not _hedge_openai_client:
+        from openai import AsyncOpenAI
+
+        _hedge_openai_client = AsyncOpenAI(
+            base_url=settings.hedge_api_url,
+            api_key="ollama-api-key",
+        )
+    return _hedge_openai_client
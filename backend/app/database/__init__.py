@@ -1,4 +1,23 @@
-from app.database.connection import engine, get_db, get_db_session
+from app.database.connection import (
+    engine,
+    get_db,
+    get_db_session,
+    get_read_db,
+    mark_write,
+    read_engine,
+)
+from app.database.partitions import ensure_partitions, maintain_partitions
+from app.database.replicas import replicas
 
 
-__all__ = ["get_db", "get_db_session", "engine"]
+__all__ = [
+    "get_db",
+    "get_read_db",
+    "get_db_session",
+    "engine",
+    "read_engine",
+    "mark_write",
+    "replicas",
+    "ensure_partitions",
+    "maintain_partitions",
+]
@@ -1,9 +1,12 @@
 from collections.abc import Generator
 
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import settings
+from app.database.replicas import client_key, recent_writes, replicas
 from app.exceptions import DatabaseError
 
 
@@ -11,16 +14,70 @@ engine = create_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-def get_db() -> Generator[Session | None]:
-    db = SessionLocal()
+@event.listens_for(SessionLocal, "after_flush")
+def _flag_write(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _record_write(session: Session) -> None:
+    if session.info.pop("wrote", False):
+        mark_write(session)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_write(session: Session) -> None:
+    session.info.pop("wrote", None)
+
+
+def mark_write(db: Session) -> None:
+    """
+    Keeps the reads of the session's client on the primary for a while,
+    also for writes made on its behalf by other sessions (analysis runs)
+    """
+    if client := db.info.get("client"):
+        recent_writes.mark(client)
+
+
+def _session_scope(db: Session) -> Generator[Session]:
+    """
+    Rolls back on any error. Only database errors become a DatabaseError,
+    HTTP errors of the endpoint (404, 429, ...) pass through unchanged
+    """
     try:
         yield db
-    except Exception as e:
+    except SQLAlchemyError as e:
         db.rollback()
         raise DatabaseError(str(e)) from e
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
 
 
+def get_db(request: Request) -> Generator[Session | None]:
+    db = SessionLocal(info={"client": client_key(request)})
+    yield from _session_scope(db)
+
+
+def read_engine(request: Request) -> Engine:
+    """
+    A healthy replica, or the primary when none is available or the
+    client wrote within the read-your-writes window
+    """
+    if client_key(request) in recent_writes:
+        return engine
+    return replicas.pick() or engine
+
+
+def get_read_db(request: Request) -> Generator[Session]:
+    """
+    For read-only endpoints, see `read_engine`
+    """
+    db = SessionLocal(bind=read_engine(request))
+    yield from _session_scope(db)
+
+
 def get_db_session() -> Session:
     return SessionLocal()
@@ -0,0 +1,176 @@
+import argparse
+import csv
+import datetime as dt
+import io
+import json
+import sys
+from collections.abc import Iterator
+from typing import Any, Literal, get_args
+
+from sqlalchemy import Engine, Select
+
+from app.config import setup_logger
+from app.database.connection import engine as default_engine
+from app.database.queries import select_tickets
+from app.models import (
+    Category,
+    Priority,
+    Ticket,
+    TicketAnalysis,
+    TicketStatus,
+)
+from app.schemas import TicketFilter
+
+
+logger = setup_logger(__name__)
+
+ExportFormat = Literal["csv", "ndjson", "parquet"]
+
+EXPORT_BATCH_SIZE = 5000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+_tickets = Ticket.__table__.c
+_analyses = TicketAnalysis.__table__.c
+
+EXPORT_COLUMNS = {
+    "ticket_id": _tickets.id,
+    "created_at": _tickets.created_at,
+    "title": _tickets.title,
+    "description": _tickets.description,
+    "status": _tickets.status,
+    "queue": _tickets.queue,
+    "analysis_id": _analyses.id,
+    "analysis_run_id": _analyses.analysis_run_id,
+    "analyzed_at": _analyses.created_at,
+    "category": _analyses.category,
+    "priority": _analyses.priority,
+    "notes": _analyses.notes,
+}
+
+
+def iter_rows(
+    engine: Engine, query: Select, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[list[dict[str, Any]]]:
+    """
+    Runs `query` on a server-side cursor, holding one batch in memory. The
+    query runs and its first batch is fetched before this returns, so
+    errors reach the caller instead of cutting a response mid-stream
+    """
+    conn = engine.connect()
+    try:
+        result = conn.execution_options(
+            stream_results=True, yield_per=batch_size
+        ).execute(query)
+        batches = result.mappings().partitions()
+        first = next(batches, None)
+    except Exception:
+        conn.close()
+        raise
+
+    def rows() -> Iterator[list[dict[str, Any]]]:
+        try:
+            if first is not None:
+                yield [dict(row) for row in first]
+            for batch in batches:
+                yield [dict(row) for row in batch]
+        finally:
+            conn.close()
+
+    return rows()
+
+
+def iter_csv(batches: Iterator[list[dict[str, Any]]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(EXPORT_COLUMNS))
+    writer.writeheader()
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(batches: Iterator[list[dict[str, Any]]]) -> Iterator[str]:
+    for rows in batches:
+        yield "".join(f"{json.dumps(row, default=str)}\n" for row in rows)
+
+
+def stream_export(
+    export_format: ExportFormat,
+    filters: TicketFilter | None = None,
+    analysis_run_id: str | None = None,
+    engine: Engine = default_engine,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[str | bytes]:
+    """
+    Encodes tickets joined with their latest (or `analysis_run_id`'s)
+    analysis batch by batch, so memory stays flat whatever the row count
+    """
+    query = select_tickets(
+        *(column.label(name) for name, column in EXPORT_COLUMNS.items()),
+        filters=filters,
+        analysis_run_id=analysis_run_id,
+    )
+    batches = iter_rows(engine, query, batch_size)
+
+    if export_format == "csv":
+        return iter_csv(batches)
+    if export_format == "ndjson":
+        return iter_ndjson(batches)
+
+    # pyarrow is only loaded for Parquet exports, not at API startup
+    import pyarrow as pa
+
+    from app.database.parquet import arrow_type, iter_parquet
+
+    schema = pa.schema(
+        [(name, arrow_type(column)) for name, column in EXPORT_COLUMNS.items()]
+    )
+    return iter_parquet(schema, batches)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export tickets with their analyses"
+    )
+    parser.add_argument(
+        "--format", choices=list(MEDIA_TYPES), default="csv", dest="fmt"
+    )
+    parser.add_argument("--output", help="File to write, stdout by default")
+    parser.add_argument("--run-id", help="Export this run's analyses")
+    parser.add_argument("--status", choices=get_args(TicketStatus))
+    parser.add_argument("--queue")
+    parser.add_argument("--category", choices=get_args(Category))
+    parser.add_argument("--priority", choices=get_args(Priority))
+    parser.add_argument("--created-after", type=dt.datetime.fromisoformat)
+    parser.add_argument("--created-before", type=dt.datetime.fromisoformat)
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    filters = TicketFilter(
+        status=args.status,
+        queue=args.queue,
+        category=args.category,
+        priority=args.priority,
+        created_after=args.created_after,
+        created_before=args.created_before,
+    )
+    chunks = stream_export(
+        args.fmt, filters, args.run_id, batch_size=args.batch_size
+    )
+
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            output.write(chunk.encode() if isinstance(chunk, str) else chunk)
+    finally:
+        if args.output:
+            output.close()
+    if args.output:
+        logger.info(f"Export written to {args.output}", "GREEN")
@@ -0,0 +1,99 @@
+import io
+import json
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Column, DateTime, Integer
+
+
+def arrow_type(column: Column) -> pa.DataType:
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    return pa.string()
+
+
+def arrow_schema(columns: Iterable[Column]) -> pa.Schema:
+    return pa.schema([(column.name, arrow_type(column)) for column in columns])
+
+
+def to_record_batch(
+    rows: list[dict[str, Any]], schema: pa.Schema
+) -> pa.RecordBatch:
+    columns = {
+        field.name: [
+            json.dumps(row[field.name])
+            if isinstance(row[field.name], dict | list)
+            else row[field.name]
+            for row in rows
+        ]
+        for field in schema
+    }
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def write_parquet(
+    path: Path,
+    schema: pa.Schema,
+    batches: Iterable[list[dict[str, Any]]],
+    compression: str = "zstd",
+) -> int:
+    """
+    Writes row batches to a compressed Parquet file one row group at a time
+    Returns the number of rows written
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        for rows in batches:
+            if rows:
+                writer.write_batch(to_record_batch(rows, schema))
+                written += len(rows)
+    return written
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file that hands out what was written since the last drain
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def iter_parquet(
+    schema: pa.Schema,
+    batches: Iterable[list[dict[str, Any]]],
+    compression: str = "zstd",
+) -> Iterator[bytes]:
+    """
+    Encodes row batches as a Parquet stream, yielding each row group's
+    bytes as soon as it is written
+    """
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression=compression) as writer:
+        for rows in batches:
+            if rows:
+                writer.write_batch(to_record_batch(rows, schema))
+                yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,169 @@
+import asyncio
+import datetime as dt
+import re
+
+from sqlalchemy import Connection, Engine, text
+
+from app.config import (
+    PARTITION_CHECK_INTERVAL,
+    PARTITION_MONTHS_AHEAD,
+    setup_logger,
+)
+
+
+logger = setup_logger(__name__)
+
+PARTITIONED_TABLES = ["analysis_runs", "ticket_analysis"]
+
+_PARTITION_NAME = re.compile(r"^(?P<table>\w+)_y(?P<year>\d{4})m(?P<month>\d{2})$")
+
+
+def month_start(day: dt.date, offset: int = 0) -> dt.date:
+    month_index = day.year * 12 + day.month - 1 + offset
+    return dt.date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: dt.date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def parse_partition_name(name: str) -> tuple[str, dt.date] | None:
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return match["table"], dt.date(int(match["year"]), int(match["month"]), 1)
+
+
+def month_range(first_month: dt.date, last_month: dt.date) -> list[dt.date]:
+    months = [month_start(first_month)]
+    while months[-1] < month_start(last_month):
+        months.append(month_start(months[-1], 1))
+    return months
+
+
+def create_default_partition(conn: Connection, table: str) -> None:
+    conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {table}_default "
+            f"PARTITION OF {table} DEFAULT"
+        )
+    )
+
+
+def create_partition(conn: Connection, table: str, month: dt.date) -> None:
+    """
+    Creates the partition of `table` for `month`. Postgres refuses it while
+    the DEFAULT partition holds rows of that month (written before it
+    existed), so those are moved into the new table before attaching it
+    """
+    name = partition_name(table, month)
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+        return
+
+    end = month_start(month, 1)
+    bounds = f"FOR VALUES FROM ('{month}') TO ('{end}')"
+    in_month = f"created_at >= '{month}' AND created_at < '{end}'"
+    stray = conn.execute(
+        text(f"SELECT count(*) FROM {table}_default WHERE {in_month}")
+    ).scalar()
+    if not stray:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {bounds}"))
+        return
+
+    conn.execute(
+        text(
+            f"CREATE TABLE {name} "
+            f"(LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {table}_default WHERE {in_month} "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        )
+    )
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}"))
+    logger.warning(f"Moved {stray} rows from {table}_default to {name}")
+
+
+def create_partitions(
+    conn: Connection, first_month: dt.date, last_month: dt.date
+) -> None:
+    """
+    Creates the monthly partitions from `first_month` to `last_month`
+    (inclusive), plus a DEFAULT partition that catches anything else
+    """
+    for table in PARTITIONED_TABLES:
+        create_default_partition(conn, table)
+        for month in month_range(first_month, last_month):
+            create_partition(conn, table, month)
+
+
+def ensure_partitions(
+    engine: Engine, months_ahead: int = PARTITION_MONTHS_AHEAD
+) -> int:
+    """
+    Makes sure partitions exist from the current month up to `months_ahead`.
+    Each table and month gets its own transaction, so one failure does not
+    hold back the others. Returns the number of failures, which are logged
+    """
+    if engine.dialect.name != "postgresql":
+        return 0
+
+    today = dt.datetime.now(dt.UTC).date()
+    months = month_range(today, month_start(today, months_ahead))
+    failures = 0
+    for table in PARTITIONED_TABLES:
+        steps = [(f"{table}_default", create_default_partition, ())]
+        steps += [
+            (partition_name(table, month), create_partition, (month,))
+            for month in months
+        ]
+        for name, create, args in steps:
+            try:
+                with engine.begin() as conn:
+                    create(conn, table, *args)
+            except Exception as e:
+                failures += 1
+                logger.error(f"Failed to create partition {name}: {e}")
+
+    logger.info(f"Ensured partitions up to {months_ahead} months ahead")
+    return failures
+
+
+async def maintain_partitions(
+    engine: Engine, interval: float = PARTITION_CHECK_INTERVAL
+) -> None:
+    """
+    Runs `ensure_partitions` off the event loop now and every `interval`
+    seconds, so long-running processes create upcoming months before their
+    rows would land in DEFAULT. Failures are logged and retried next time
+    """
+    while True:
+        try:
+            await asyncio.to_thread(ensure_partitions, engine)
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def list_partitions(engine: Engine, table: str) -> list[tuple[str, dt.date]]:
+    """
+    Monthly partitions of `table` as (name, month), oldest first
+    """
+    with engine.connect() as conn:
+        names = conn.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": table},
+        ).scalars()
+        partitions = [
+            (name, parsed[1])
+            for name in names
+            if (parsed := parse_partition_name(name)) and parsed[0] == table
+        ]
+    return sorted(partitions, key=lambda p: p[1])
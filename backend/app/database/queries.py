@@ -0,0 +1,58 @@
+from sqlalchemy import Select, and_, select
+
+from app.models import AnalysisRun, Ticket, TicketAnalysis
+from app.schemas import TicketFilter
+
+
+# The latest analysis of a ticket, pinned to one partition
+LATEST_ANALYSIS = and_(
+    TicketAnalysis.ticket_id == Ticket.id,
+    TicketAnalysis.created_at == Ticket.last_analyzed_at,
+)
+
+
+def select_tickets(
+    *entities,
+    filters: TicketFilter | None = None,
+    analysis_run_id: str | None = None,
+) -> Select:
+    """
+    Tickets joined with their latest analysis or, given `analysis_run_id`,
+    with their analysis from that run (tickets outside the run are left
+    out). Shared by the listing and the export so both filter alike
+    """
+    query = select(*entities).select_from(Ticket)
+
+    if analysis_run_id:
+        # Analyses never predate their run, this prunes older partitions
+        run_started = (
+            select(AnalysisRun.created_at)
+            .where(AnalysisRun.id == analysis_run_id)
+            .scalar_subquery()
+        )
+        query = query.join(
+            TicketAnalysis,
+            and_(
+                TicketAnalysis.ticket_id == Ticket.id,
+                TicketAnalysis.analysis_run_id == analysis_run_id,
+                TicketAnalysis.created_at >= run_started,
+            ),
+        )
+    else:
+        query = query.outerjoin(TicketAnalysis, LATEST_ANALYSIS)
+
+    if filters:
+        if filters.status:
+            query = query.where(Ticket.status == filters.status)
+        if filters.queue:
+            query = query.where(Ticket.queue == filters.queue)
+        if filters.category:
+            query = query.where(TicketAnalysis.category == filters.category)
+        if filters.priority:
+            query = query.where(TicketAnalysis.priority == filters.priority)
+        if filters.created_after:
+            query = query.where(Ticket.created_at >= filters.created_after)
+        if filters.created_before:
+            query = query.where(Ticket.created_at < filters.created_before)
+
+    return query.order_by(Ticket.created_at, Ticket.id)
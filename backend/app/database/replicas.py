@@ -0,0 +1,133 @@
+import asyncio
+import itertools
+import time
+from threading import Lock
+
+from fastapi import Request
+from sqlalchemy import Engine, create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import (
+    READ_YOUR_WRITES_SECONDS,
+    REPLICA_CHECK_INTERVAL,
+    REPLICA_MAX_LAG_SECONDS,
+    settings,
+    setup_logger,
+)
+
+
+logger = setup_logger(__name__)
+
+# Seconds behind the primary, 0 when fully replayed or not a replica at
+# all (e.g. the primary standing in as its own replica)
+LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class ReplicaPool:
+    """
+    Round-robin over the healthy read replicas. A background check marks
+    a replica down while it is unreachable or lags more than `max_lag`
+    seconds, reads then go to the remaining ones or to the primary
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        max_lag: float = REPLICA_MAX_LAG_SECONDS,
+        check_interval: float = REPLICA_CHECK_INTERVAL,
+    ):
+        self.engines = [create_engine(url, pool_pre_ping=True) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._healthy = [True] * len(self.engines)
+        self._turn = itertools.count()
+        self._task: asyncio.Task | None = None
+
+    def pick(self) -> Engine | None:
+        healthy = [
+            engine
+            for engine, ok in zip(self.engines, self._healthy, strict=True)
+            if ok
+        ]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def check(self) -> None:
+        for i, engine in enumerate(self.engines):
+            try:
+                with engine.connect() as conn:
+                    lag = conn.execute(LAG_QUERY).scalar() or 0
+                healthy = lag <= self.max_lag
+                reason = f"lagging {lag:.1f}s"
+            except SQLAlchemyError as e:
+                healthy = False
+                reason = f"unreachable: {e.__class__.__name__}"
+
+            if healthy != self._healthy[i]:
+                if healthy:
+                    logger.info(f"Replica {engine.url} is back", "GREEN")
+                else:
+                    logger.warning(f"Replica {engine.url} is down, {reason}")
+            self._healthy[i] = healthy
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._check_periodically())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _check_periodically(self) -> None:
+        while True:
+            await asyncio.to_thread(self.check)
+            await asyncio.sleep(self.check_interval)
+
+
+class RecentWrites:
+    """
+    Clients that wrote to the primary in the last `window` seconds, whose
+    reads stay on the primary until the replicas have caught up
+    """
+
+    def __init__(self, window: float = READ_YOUR_WRITES_SECONDS):
+        self.window = window
+        self._until: dict[str, float] = {}
+        self._lock = Lock()
+
+    def mark(self, client: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[client] = now + self.window
+            if len(self._until) > 1024:
+                self._until = {
+                    k: until for k, until in self._until.items() if until > now
+                }
+
+    def __contains__(self, client: str) -> bool:
+        return self._until.get(client, 0) > time.monotonic()
+
+
+def client_key(request: Request) -> str:
+    """
+    `X-Client-Id` when the frontend sends one, the client address otherwise
+    """
+    if client_id := request.headers.get("x-client-id"):
+        return client_id
+    return request.client.host if request.client else "anonymous"
+
+
+replicas = ReplicaPool(
+    [
+        url.strip()
+        for url in settings.read_replica_urls.split(",")
+        if url.strip()
+    ]
+)
+recent_writes = RecentWrites()
@@ -0,0 +1,180 @@
+import argparse
+import datetime as dt
+from pathlib import Path
+
+from sqlalchemy import Connection, Engine, Table, text
+
+from app.config import (
+    ARCHIVE_DIR,
+    HOT_MONTHS,
+    RETENTION_RUNS_PER_TICKET,
+    setup_logger,
+)
+from app.database.connection import engine as default_engine
+from app.database.parquet import arrow_schema, write_parquet
+from app.database.partitions import (
+    ensure_partitions,
+    list_partitions,
+    month_start,
+)
+from app.models import AnalysisRun, TicketAnalysis
+
+
+logger = setup_logger(__name__)
+
+ARCHIVE_BATCH_SIZE = 5000
+
+# Analyses that are not among the latest `keep` of their ticket, ranked
+# once over the whole table. Rows written afterwards only push older ones
+# further down, so the snapshot stays safe to archive
+_RANK_ANALYSES = """
+    CREATE TEMPORARY TABLE cold_analyses AS
+    SELECT id, created_at FROM (
+        SELECT id, created_at, row_number() OVER (
+            PARTITION BY ticket_id ORDER BY created_at DESC
+        ) AS rank
+        FROM ticket_analysis
+    ) ranked
+    WHERE rank > :keep
+"""
+
+_COLD_ANALYSES = """
+    SELECT ta.* FROM {partition} ta
+    JOIN cold_analyses cold
+        ON cold.created_at = ta.created_at AND cold.id = ta.id
+"""
+
+# Runs none of whose analyses are left in Postgres
+_COLD_RUNS = """
+    SELECT ar.* FROM {partition} ar
+    WHERE NOT EXISTS (
+        SELECT 1 FROM ticket_analysis ta WHERE ta.analysis_run_id = ar.id
+    )
+"""
+
+
+def _archive_partition(
+    conn: Connection,
+    table: Table,
+    partition: str,
+    query: str,
+    archive_dir: Path,
+) -> int:
+    """
+    Streams the selected rows of a partition to Parquet, then deletes them
+    """
+    # Typed by the table's columns, so archives hold ids and labels rather
+    # than raw UUID values and SMALLINT codes
+    result = conn.execution_options(
+        stream_results=True, yield_per=ARCHIVE_BATCH_SIZE
+    ).execute(text(query.format(partition=partition)).columns(*table.columns))
+
+    keys = []
+
+    def batches():
+        for batch in result.mappings().partitions():
+            rows = [dict(row) for row in batch]
+            keys.extend((row["id"], row["created_at"]) for row in rows)
+            yield rows
+
+    stamp = dt.datetime.now(dt.UTC).strftime("%Y%m%dT%H%M%S")
+    path = archive_dir / table.name / f"{partition}-{stamp}.parquet"
+    written = write_parquet(path, arrow_schema(table.columns), batches())
+
+    if not written:
+        path.unlink(missing_ok=True)
+        return 0
+
+    for start in range(0, len(keys), ARCHIVE_BATCH_SIZE):
+        chunk = keys[start : start + ARCHIVE_BATCH_SIZE]
+        conn.execute(
+            text(
+                f"DELETE FROM {partition} WHERE id = ANY(CAST(:ids AS uuid[]))"
+            ),
+            {"ids": [key[0] for key in chunk]},
+        )
+
+    logger.info(f"Archived {written} rows of {partition} to {path}", "CYAN")
+    return written
+
+
+def _drop_if_empty(conn: Connection, table: str, partition: str) -> None:
+    if conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {partition})")).scalar():
+        return
+    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+    conn.execute(text(f"DROP TABLE {partition}"))
+    logger.info(f"Dropped empty partition {partition}", "CYAN")
+
+
+def apply_retention(
+    engine: Engine = default_engine,
+    keep: int = RETENTION_RUNS_PER_TICKET,
+    hot_months: int = HOT_MONTHS,
+    archive_dir: str = ARCHIVE_DIR,
+) -> dict[str, int]:
+    """
+    Moves analyses that are not among the latest `keep` per ticket to
+    Parquet, from every partition, then the runs older than `hot_months`
+    left without analyses. Partitions older than that which end up empty
+    are dropped. Each partition is handled in its own transaction, after
+    its Parquet file is written
+    """
+    cutoff = month_start(dt.datetime.now(dt.UTC).date(), -hot_months)
+    archive_path = Path(archive_dir)
+    archived = {}
+
+    with engine.connect() as conn:
+        with conn.begin():
+            conn.execute(text(_RANK_ANALYSES), {"keep": keep})
+            conn.execute(text("CREATE INDEX ON cold_analyses (created_at)"))
+            conn.execute(text("ANALYZE cold_analyses"))
+
+        try:
+            # Runs of hot partitions may still be waiting for their analyses
+            for table, query, trim_hot in [
+                (TicketAnalysis.__table__, _COLD_ANALYSES, True),
+                (AnalysisRun.__table__, _COLD_RUNS, False),
+            ]:
+                archived[table.name] = 0
+                for partition, month in list_partitions(engine, table.name):
+                    cold = month < cutoff
+                    if not (cold or trim_hot):
+                        continue
+                    with conn.begin():
+                        archived[table.name] += _archive_partition(
+                            conn, table, partition, query, archive_path
+                        )
+                        if cold:
+                            _drop_if_empty(conn, table.name, partition)
+        finally:
+            conn.execute(text("DROP TABLE IF EXISTS cold_analyses"))
+            conn.commit()
+
+    with engine.begin() as conn:
+        archived["analysis_shards"] = conn.execute(
+            text(
+                "DELETE FROM analysis_shards "
+                "WHERE status IN ('done', 'failed') AND created_at < :cutoff"
+            ),
+            {"cutoff": cutoff},
+        ).rowcount
+
+    ensure_partitions(engine)
+    return archived
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Archive cold ticket analyses to Parquet"
+    )
+    parser.add_argument("--keep", type=int, default=RETENTION_RUNS_PER_TICKET)
+    parser.add_argument("--hot-months", type=int, default=HOT_MONTHS)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    archived = apply_retention(
+        keep=args.keep,
+        hot_months=args.hot_months,
+        archive_dir=args.archive_dir,
+    )
+    logger.info(f"Retention finished, archived rows: {archived}", "GREEN")
@@ -0,0 +1,166 @@
+import base64
+import datetime as dt
+import json
+import uuid
+from typing import Any, Literal
+
+from sqlalchemy import cast, func, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import Session
+
+from app.config import SEARCH_LANGUAGE
+from app.database.queries import LATEST_ANALYSIS
+from app.exceptions import ValidationError
+from app.models import (
+    Category,
+    Priority,
+    Ticket,
+    TicketAnalysis,
+    TicketStatus,
+)
+
+
+SearchSort = Literal["rank", "recent"]
+
+HEADLINE_OPTIONS = (
+    "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, "
+    "MaxFragments=2"
+)
+
+FACET_COLUMNS = {
+    "category": TicketAnalysis.category,
+    "priority": TicketAnalysis.priority,
+}
+
+def encode_cursor(sort_value: Any, ticket_id: str) -> str:
+    if isinstance(sort_value, dt.datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, ticket_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor: str, sort: SearchSort) -> tuple[Any, str]:
+    try:
+        sort_value, ticket_id = json.loads(base64.urlsafe_b64decode(cursor))
+        if sort == "recent":
+            sort_value = dt.datetime.fromisoformat(sort_value)
+        else:
+            sort_value = float(sort_value)
+        ticket_id = str(uuid.UUID(ticket_id))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValidationError("Invalid search cursor") from e
+    return sort_value, ticket_id
+
+
+def search_tickets(
+    db: Session,
+    q: str,
+    category: Category | None = None,
+    priority: Priority | None = None,
+    status: TicketStatus | None = None,
+    sort: SearchSort = "rank",
+    cursor: str | None = None,
+    limit: int = 20,
+) -> dict[str, Any]:
+    """
+    Full-text search over ticket title/description and the latest
+    analysis notes. Matches come from the GIN index on
+    `tickets.search_vector`, pages are keyset paginated on (rank or
+    created_at, id) and only the returned page gets highlighted. Facet
+    counts cover every match and are computed for the first page only
+    """
+    language = cast(literal(SEARCH_LANGUAGE), REGCONFIG)
+    tsquery = func.websearch_to_tsquery(language, q)
+    rank = func.ts_rank_cd(Ticket.search_vector, tsquery)
+    sort_key = rank if sort == "rank" else Ticket.created_at
+
+    filters = [Ticket.search_vector.bool_op("@@")(tsquery)]
+    if status:
+        filters.append(Ticket.status == status)
+    if category:
+        filters.append(TicketAnalysis.category == category)
+    if priority:
+        filters.append(TicketAnalysis.priority == priority)
+
+    matches = (
+        select(Ticket.id, sort_key.label("sort_key"), rank.label("rank"))
+        .outerjoin(TicketAnalysis, LATEST_ANALYSIS)
+        .where(*filters)
+    )
+    facets = _facets(db, filters) if cursor is None else None
+
+    if cursor:
+        sort_value, ticket_id = decode_cursor(cursor, sort)
+        matches = matches.where(
+            tuple_(sort_key, Ticket.id) < tuple_(sort_value, ticket_id)
+        )
+    page = (
+        matches.order_by(sort_key.desc(), Ticket.id.desc())
+        .limit(limit + 1)
+        .subquery()
+    )
+
+    rows = db.execute(
+        select(
+            Ticket,
+            TicketAnalysis,
+            page.c.sort_key,
+            page.c.rank,
+            func.ts_headline(
+                language, Ticket.title, tsquery, HEADLINE_OPTIONS
+            ),
+            func.ts_headline(
+                language, Ticket.description, tsquery, HEADLINE_OPTIONS
+            ),
+            func.ts_headline(
+                language, TicketAnalysis.notes, tsquery, HEADLINE_OPTIONS
+            ),
+        )
+        .join(page, page.c.id == Ticket.id)
+        .outerjoin(TicketAnalysis, LATEST_ANALYSIS)
+        .order_by(page.c.sort_key.desc(), Ticket.id.desc())
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.sort_key, last.Ticket.id)
+
+    hits = []
+    for ticket, analysis, _, score, title, description, notes in rows:
+        hits.append(
+            {
+                "id": ticket.id,
+                "created_at": ticket.created_at,
+                "title": ticket.title,
+                "description": ticket.description,
+                "status": ticket.status,
+                "queue": ticket.queue,
+                "category": analysis.category if analysis else None,
+                "priority": analysis.priority if analysis else None,
+                "notes": analysis.notes if analysis else None,
+                "rank": score,
+                "highlights": {
+                    "title": title,
+                    "description": description,
+                    "notes": notes,
+                },
+            }
+        )
+
+    return {"hits": hits, "next_cursor": next_cursor, "facets": facets}
+
+
+def _facets(db: Session, filters: list) -> dict[str, dict[str, int]]:
+    facets = {}
+    for name, column in FACET_COLUMNS.items():
+        counts = db.execute(
+            select(column, func.count())
+            .select_from(Ticket)
+            .join(TicketAnalysis, LATEST_ANALYSIS)
+            .where(*filters)
+            .group_by(column)
+        ).all()
+        facets[name] = {value: count for value, count in counts if value}
+    return facets
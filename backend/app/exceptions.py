@@ -3,8 +3,15 @@ from fastapi import HTTPException
 
 
 class BaseAppException(HTTPException):
-    def __init__(self, message: str, status_code: int = 500):
-        super().__init__(status_code=status_code, detail=message)
+    def __init__(
+        self,
+        message: str,
+        status_code: int = 500,
+        headers: dict[str, str] | None = None,
+    ):
+        super().__init__(
+            status_code=status_code, detail=message, headers=headers
+        )
 
 class DatabaseError(BaseAppException):
     def __init__(self, message: str):
@@ -30,3 +37,12 @@ class ValidationError(BaseAppException):
 class ExternalServiceError(BaseAppException):
     def __init__(self, service: str, message: str):
         super().__init__(f"{service} service error: {message}", 503)
+
+class QueueSaturatedError(BaseAppException):
+    def __init__(self, queue: str, retry_after: int):
+        super().__init__(
+            f"LLM capacity is saturated for queue {queue}, "
+            f"retry in {retry_after}s",
+            429,
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -1,19 +1,65 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from app.agents.continuous import continuous_triage
+from app.agents.warmup import model_warmer
 from app.api import analysis, tickets
-from app.database import engine
+from app.config import settings, setup_logger
+from app.database import engine, maintain_partitions, replicas
 from app.exceptions import BaseAppException
-from app.models import Base
 
 
-Base.metadata.create_all(bind=engine)
+logger = setup_logger(__name__)
+
+# Schema is managed by Alembic (`alembic upgrade head`), see migrations/
+
+
+def _log_task_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and (error := task.exception()):
+        logger.error(f"Background task {task.get_coro().__name__} died: {error}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+
+    # Off the startup path; rows fall into the DEFAULT partition meanwhile
+    partitions = asyncio.create_task(maintain_partitions(engine))
+    partitions.add_done_callback(_log_task_failure)
+    if replicas.engines:
+        await replicas.start()
+    if settings.continuous_triage:
+        await continuous_triage.start()
+    # In the background, /health reports ready once the model is warm
+    if settings.model_warmup:
+        await model_warmer.start()
+    else:
+        model_warmer.ready = True
+
+    logger.info(
+        f"Startup complete in {(time.perf_counter() - started) * 1000:.1f} ms",
+        "GREEN",
+    )
+    yield
+
+    if continuous_triage.running:
+        await continuous_triage.stop()
+    await model_warmer.stop()
+    await replicas.stop()
+    partitions.cancel()
+    await asyncio.gather(partitions, return_exceptions=True)
+
 
 app = FastAPI(
     title="Ticket Triaging Agent API",
     description="Support ticket analysis with LangGraph agent",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -28,7 +74,8 @@ app.add_middleware(
 async def app_exception_handler(request: Request, exc: BaseAppException):
     return JSONResponse(
         status_code=exc.status_code,
-        content={"detail": exc.detail}
+        content={"detail": exc.detail},
+        headers=exc.headers,
     )
 
 app.include_router(tickets.router)
@@ -36,4 +83,12 @@ app.include_router(analysis.router)
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    """
+    503 until the model is warm, so load balancers hold traffic back
+    """
+    if not model_warmer.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warming_up", "models": model_warmer.status},
+        )
+    return {"status": "healthy", "models": model_warmer.status}
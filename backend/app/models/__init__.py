@@ -1,6 +1,20 @@
-from app.models.analysis import AnalysisRun, TicketAnalysis
-from app.models.base import Base, BaseModel
-from app.models.ticket import Ticket
+from app.models.analysis import AnalysisRun, AnalysisShard, TicketAnalysis
+from app.models.base import Base, BaseModel, utc_now
+from app.models.enums import Category, CodedEnum, Priority, TicketStatus
+from app.models.ticket import Ticket, compute_fingerprint
 
 
-__all__ = ["Base", "BaseModel", "Ticket", "AnalysisRun", "TicketAnalysis"]
+__all__ = [
+    "Base",
+    "BaseModel",
+    "Ticket",
+    "AnalysisRun",
+    "TicketAnalysis",
+    "AnalysisShard",
+    "compute_fingerprint",
+    "utc_now",
+    "CodedEnum",
+    "TicketStatus",
+    "Category",
+    "Priority",
+]
@@ -1,19 +1,94 @@
-from sqlalchemy import ForeignKey, String, Text
+import datetime as dt
+import uuid
+
+from sqlalchemy import (
+    JSON,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    Uuid,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import BaseModel
+from app.models.enums import Category, CodedEnum, Priority
 
 
+# analysis_runs and ticket_analysis are range partitioned by month on
+# created_at (see app.database.partitions), so created_at is part of their
+# primary key and analysis_run_id cannot be a foreign key
 class AnalysisRun(BaseModel):
     __tablename__ = "analysis_runs"
+    __table_args__ = (
+        Index("ix_analysis_runs_created_at", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Mapped[str] = mapped_column(
+        Uuid(as_uuid=False),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4()),
+    )
+    created_at: Mapped[dt.datetime] = mapped_column(
+        DateTime, primary_key=True, default=lambda: dt.datetime.now(dt.UTC)
+    )
 
     summary: Mapped[str] = mapped_column(Text)
+    # LLM call counters and hedge/parse rates, see app.agents.metrics
+    stats: Mapped[dict] = mapped_column(JSON, nullable=True)
 
 class TicketAnalysis(BaseModel):
     __tablename__ = "ticket_analysis"
+    __table_args__ = (
+        # Latest analysis of a ticket, answered from the index alone
+        Index(
+            "ix_ticket_analysis_ticket_id_created_at",
+            "ticket_id",
+            text("created_at DESC"),
+            postgresql_include=["category", "priority"],
+        ),
+        # A run's analyses in the order they were saved
+        Index(
+            "ix_ticket_analysis_analysis_run_id",
+            "analysis_run_id",
+            "created_at",
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Mapped[str] = mapped_column(
+        Uuid(as_uuid=False),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4()),
+    )
+    created_at: Mapped[dt.datetime] = mapped_column(
+        DateTime, primary_key=True, default=lambda: dt.datetime.now(dt.UTC)
+    )
 
-    analysis_run_id: Mapped[str] = mapped_column(ForeignKey("analysis_runs.id"))
+    analysis_run_id: Mapped[str] = mapped_column(Uuid(as_uuid=False))
     ticket_id: Mapped[str] = mapped_column(ForeignKey("tickets.id"))
-    category: Mapped[str] = mapped_column(String(100))
-    priority: Mapped[str] = mapped_column(String(20))
+    category: Mapped[str] = mapped_column(CodedEnum(Category))
+    priority: Mapped[str] = mapped_column(CodedEnum(Priority))
     notes: Mapped[str] = mapped_column(Text, nullable=True)
+
+class AnalysisShard(BaseModel):
+    __tablename__ = "analysis_shards"
+
+    analysis_run_id: Mapped[str] = mapped_column(
+        Uuid(as_uuid=False), index=True
+    )
+    shard_index: Mapped[int] = mapped_column(Integer)
+    mode: Mapped[str] = mapped_column(String(20), default="incomplete")
+    ticket_ids: Mapped[list[str]] = mapped_column(JSON)
+    status: Mapped[str] = mapped_column(
+        String(20), default="pending", index=True
+    )  # pending | leased | done | failed
+    lease_owner: Mapped[str] = mapped_column(String(100), nullable=True)
+    lease_expires_at: Mapped[dt.datetime] = mapped_column(
+        DateTime, nullable=True
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
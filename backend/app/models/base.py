@@ -1,10 +1,18 @@
 import datetime as dt
 import uuid
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Uuid
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
+def utc_now() -> dt.datetime:
+    """
+    Naive UTC, for comparisons with and writes to naive DateTime columns
+    that must not depend on the database session's time zone
+    """
+    return dt.datetime.now(dt.UTC).replace(tzinfo=None)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -13,7 +21,9 @@ class BaseModel(Base):
     __abstract__ = True
 
     id: Mapped[str] = mapped_column(
-        String(36), primary_key=True, default=lambda: str(uuid.uuid4())
+        Uuid(as_uuid=False),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4()),
     )
     created_at: Mapped[dt.datetime] = mapped_column(
         DateTime, default=lambda: dt.datetime.now(dt.UTC)
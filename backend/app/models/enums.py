@@ -0,0 +1,40 @@
+from typing import Any, Literal, get_args
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+# Stored as SMALLINT codes, each value's position in its Literal. Only
+# ever append values, existing codes must not change
+TicketStatus = Literal["incomplete", "complete", "in_progress"]
+Category = Literal[
+    "billing", "bug", "feature_request", "authentication", "other"
+]
+Priority = Literal["high", "medium", "low"]
+
+
+class CodedEnum(TypeDecorator):
+    """
+    String labels in Python, SMALLINT codes in the database
+    """
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, labels: Any):
+        super().__init__()
+        self.labels: tuple[str, ...] = get_args(labels)
+        self._codes = {label: code for code, label in enumerate(self.labels)}
+
+    def process_bind_param(self, value: str | None, dialect) -> int | None:
+        if value is None:
+            return None
+        try:
+            return self._codes[value]
+        except KeyError:
+            raise ValueError(
+                f"Unknown value {value!r}, expected one of {self.labels}"
+            ) from None
+
+    def process_result_value(self, value: int | None, dialect) -> str | None:
+        return None if value is None else self.labels[value]
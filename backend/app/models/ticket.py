@@ -1,12 +1,77 @@
-from sqlalchemy import String, Text
+import datetime as dt
+import hashlib
+
+from sqlalchemy import DateTime, Index, String, Text, Uuid, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import BaseModel
+from app.models.enums import CodedEnum, TicketStatus
+
+
+def compute_fingerprint(title: str, description: str) -> str:
+    """
+    Content hash of the fields that are fed to the classifier
+    """
+    payload = f"{title or ''}\x1f{description or ''}".encode()
+    return hashlib.sha256(payload).hexdigest()
 
 
 class Ticket(BaseModel):
     __tablename__ = "tickets"
+    __table_args__ = (
+        Index("ix_tickets_status_created_at", "status", "created_at"),
+        Index("ix_tickets_queue_status", "queue", "status"),
+        Index(
+            "ix_tickets_claimed_by_run_id",
+            "claimed_by_run_id",
+            postgresql_where="claimed_by_run_id IS NOT NULL",
+        ),
+        Index(
+            "ix_tickets_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+    )
 
     title: Mapped[str] = mapped_column(String(255))
     description: Mapped[str] = mapped_column(Text)
-    status: Mapped[str] = mapped_column(String(20), default="incomplete")
+    status: Mapped[str] = mapped_column(
+        CodedEnum(TicketStatus), default="incomplete"
+    )
+    # Team or queue the ticket belongs to, the unit of fair LLM scheduling
+    queue: Mapped[str] = mapped_column(String(64), nullable=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=True)
+    analyzed_fingerprint: Mapped[str] = mapped_column(
+        String(64), nullable=True
+    )
+    analyzed_model: Mapped[str] = mapped_column(String(100), nullable=True)
+    analyzed_prompt_version: Mapped[str] = mapped_column(
+        String(64), nullable=True
+    )
+    # Set while a run holds the ticket (status "in_progress")
+    claimed_by_run_id: Mapped[str] = mapped_column(
+        Uuid(as_uuid=False), nullable=True
+    )
+    claim_expires_at: Mapped[dt.datetime] = mapped_column(
+        DateTime, nullable=True
+    )
+    # Description as sent to the LLM (see app.agents.preprocess), valid
+    # while `cleaned_key` matches the current text and cleaning rules
+    clean_description: Mapped[str] = mapped_column(Text, nullable=True)
+    cleaned_key: Mapped[str] = mapped_column(String(64), nullable=True)
+    # created_at of the latest TicketAnalysis, lets lookups prune partitions
+    last_analyzed_at: Mapped[dt.datetime] = mapped_column(
+        DateTime, nullable=True
+    )
+    # Title, description and latest analysis notes, kept current by the
+    # triggers of migration 0004
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR, nullable=True, deferred=True
+    )
+
+
+@event.listens_for(Ticket, "before_insert")
+@event.listens_for(Ticket, "before_update")
+def _refresh_fingerprint(mapper, connection, target: Ticket) -> None:
+    target.fingerprint = compute_fingerprint(target.title, target.description)
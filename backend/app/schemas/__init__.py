@@ -9,12 +9,16 @@ from app.schemas.base import (
     BaseResponseSchema,
     BaseSchema,
     ErrorResponseSchema,
+    UUIDStr,
 )
 from app.schemas.ticket import (
     TicketCreate,
+    TicketFilter,
     TicketListCreate,
     TicketListResponse,
     TicketResponse,
+    TicketSearchHit,
+    TicketSearchResponse,
 )
 
 
@@ -23,10 +27,14 @@ __all__ = [
     "BaseCreateSchema",
     "BaseResponseSchema",
     "ErrorResponseSchema",
+    "UUIDStr",
     "TicketCreate",
     "TicketResponse",
+    "TicketFilter",
     "TicketListCreate",
     "TicketListResponse",
+    "TicketSearchHit",
+    "TicketSearchResponse",
     "AnalysisRequest",
     "TicketAnalysisResponse",
     "AnalysisRunResponse",
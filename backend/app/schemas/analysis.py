@@ -1,18 +1,30 @@
-from app.schemas.base import BaseCreateSchema, BaseResponseSchema
+from typing import Literal
+
+from pydantic import Field
+
+from app.schemas.base import BaseCreateSchema, BaseResponseSchema, UUIDStr
 from app.schemas.ticket import TicketResponse
 
 
 class AnalysisRequest(BaseCreateSchema):
-    ticket_ids: list[str] | None = None
+    ticket_ids: list[UUIDStr] | None = None
+    mode: Literal["incomplete", "stale"] = "incomplete"
+    deadline_seconds: float | None = Field(default=None, gt=0)
+    shard_size: int | None = Field(default=None, gt=0)
+    # Only analyse this queue's tickets, and charge the run to its share
+    queue: str | None = Field(default=None, min_length=1, max_length=64)
+    # False: answer 202 once the run has started and poll it by id
+    wait: bool = True
 
 
 class TicketAnalysisResponse(BaseResponseSchema):
-    analysis_run_id: str
+    analysis_run_id: UUIDStr
     ticket: TicketResponse | None = None
 
 
 class AnalysisRunResponse(BaseResponseSchema):
     summary: str
+    stats: dict[str, float] | None = None
     ticket_analyses: list[TicketAnalysisResponse] = []
 
 
@@ -1,6 +1,12 @@
+import uuid
 from datetime import datetime
+from typing import Annotated
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import AfterValidator, BaseModel, ConfigDict
+
+
+# Ids are native UUIDs in the database, but plain strings in the API
+UUIDStr = Annotated[str, AfterValidator(lambda v: str(uuid.UUID(v)))]
 
 
 class BaseSchema(BaseModel):
@@ -10,7 +16,7 @@ class BaseCreateSchema(BaseSchema):
     pass
 
 class BaseResponseSchema(BaseSchema):
-    id: str
+    id: UUIDStr
     created_at: datetime
 
 class PaginationSchema(BaseSchema):
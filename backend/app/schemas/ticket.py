@@ -1,23 +1,54 @@
+from datetime import datetime
+
 from pydantic import Field
 
-from app.schemas.base import BaseCreateSchema, BaseResponseSchema
+from app.models.enums import Category, Priority, TicketStatus
+from app.schemas.base import (
+    BaseCreateSchema,
+    BaseResponseSchema,
+    BaseSchema,
+)
 
 
 class TicketCreate(BaseCreateSchema):
     title: str = Field(min_length=1, max_length=255)
     description: str = Field(min_length=1)
-    status: str | None = "incomplete"
+    status: TicketStatus | None = "incomplete"
+    queue: str | None = Field(default=None, min_length=1, max_length=64)
 
 
+# Status, category and priority are SMALLINT codes in the database (see
+# app.models.enums), the API only ever sees their labels
 class TicketResponse(BaseResponseSchema):
     title: str
     description: str
-    status: str
-    category: str | None = None
-    priority: str | None = None
+    status: TicketStatus
+    queue: str | None = None
+    category: Category | None = None
+    priority: Priority | None = None
     notes: str | None = None
 
 
+class TicketFilter(BaseSchema):
+    status: TicketStatus | None = None
+    queue: str | None = None
+    category: Category | None = None
+    priority: Priority | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+
+class TicketSearchHit(TicketResponse):
+    rank: float
+    highlights: dict[str, str | None] = {}
+
+
+class TicketSearchResponse(BaseSchema):
+    hits: list[TicketSearchHit]
+    next_cursor: str | None = None
+    facets: dict[str, dict[str, int]] | None = None
+
+
 class TicketListCreate(BaseCreateSchema):
     tickets: list[TicketCreate]
 
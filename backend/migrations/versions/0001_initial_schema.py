@@ -0,0 +1,64 @@
+"""initial schema
+
+Matches the tables previously created by Base.metadata.create_all.
+Existing databases should be stamped with this revision before upgrading:
+`alembic stamp 0001`
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tickets",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+    )
+    op.create_table(
+        "analysis_runs",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=False),
+    )
+    op.create_table(
+        "ticket_analysis",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "analysis_run_id",
+            sa.String(36),
+            sa.ForeignKey("analysis_runs.id"),
+            nullable=False,
+        ),
+        sa.Column(
+            "ticket_id",
+            sa.String(36),
+            sa.ForeignKey("tickets.id"),
+            nullable=False,
+        ),
+        sa.Column("category", sa.String(100), nullable=False),
+        sa.Column("priority", sa.String(20), nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ticket_analysis")
+    op.drop_table("analysis_runs")
+    op.drop_table("tickets")
@@ -0,0 +1,219 @@
+"""ticket fingerprints, analysis shards and partitioned analysis tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+"""
+import datetime as dt
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Frozen copy of the partition layout at this revision, so replaying the
+# history does not change with app.database.partitions
+PARTITIONED_TABLES = ["analysis_runs", "ticket_analysis"]
+PARTITION_MONTHS_AHEAD = 2
+
+
+def _month_start(day: dt.date, offset: int = 0) -> dt.date:
+    month_index = day.year * 12 + day.month - 1 + offset
+    return dt.date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _create_partitions(first_month: dt.date, last_month: dt.date) -> None:
+    """
+    Monthly partitions from `first_month` to `last_month` (inclusive) plus
+    a DEFAULT partition, on the freshly created (empty) tables
+    """
+    for table in PARTITIONED_TABLES:
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+        month = _month_start(first_month)
+        while month <= last_month:
+            end = _month_start(month, 1)
+            op.execute(
+                f"CREATE TABLE {table}_y{month.year}m{month.month:02d} "
+                f"PARTITION OF {table} FOR VALUES FROM ('{month}') TO ('{end}')"
+            )
+            month = end
+
+
+def upgrade() -> None:
+    op.add_column("tickets", sa.Column("fingerprint", sa.String(64)))
+    op.add_column("tickets", sa.Column("analyzed_fingerprint", sa.String(64)))
+    op.add_column("tickets", sa.Column("analyzed_model", sa.String(100)))
+    op.add_column(
+        "tickets", sa.Column("analyzed_prompt_version", sa.String(64))
+    )
+    op.add_column("tickets", sa.Column("last_analyzed_at", sa.DateTime()))
+
+    op.create_table(
+        "analysis_shards",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("analysis_run_id", sa.String(36), nullable=False),
+        sa.Column("shard_index", sa.Integer(), nullable=False),
+        sa.Column("mode", sa.String(20), nullable=False),
+        sa.Column("ticket_ids", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("lease_owner", sa.String(100)),
+        sa.Column("lease_expires_at", sa.DateTime()),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        "ix_analysis_shards_analysis_run_id",
+        "analysis_shards",
+        ["analysis_run_id"],
+    )
+    op.create_index(
+        "ix_analysis_shards_status", "analysis_shards", ["status"]
+    )
+
+    # Partitioned tables cannot be converted in place: rebuild and copy
+    op.rename_table("ticket_analysis", "ticket_analysis_legacy")
+    op.rename_table("analysis_runs", "analysis_runs_legacy")
+    op.execute(
+        "ALTER INDEX ticket_analysis_pkey RENAME TO ticket_analysis_legacy_pkey"
+    )
+    op.execute(
+        "ALTER INDEX analysis_runs_pkey RENAME TO analysis_runs_legacy_pkey"
+    )
+
+    op.create_table(
+        "analysis_runs",
+        sa.Column("id", sa.String(36), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index(
+        "ix_analysis_runs_created_at", "analysis_runs", ["created_at"]
+    )
+    op.create_table(
+        "ticket_analysis",
+        sa.Column("id", sa.String(36), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("analysis_run_id", sa.String(36), nullable=False),
+        sa.Column(
+            "ticket_id",
+            sa.String(36),
+            sa.ForeignKey("tickets.id"),
+            nullable=False,
+        ),
+        sa.Column("category", sa.String(100), nullable=False),
+        sa.Column("priority", sa.String(20), nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index(
+        "ix_ticket_analysis_analysis_run_id",
+        "ticket_analysis",
+        ["analysis_run_id"],
+    )
+    op.create_index(
+        "ix_ticket_analysis_ticket_id_created_at",
+        "ticket_analysis",
+        ["ticket_id", "created_at"],
+    )
+
+    conn = op.get_bind()
+    today = dt.datetime.now(dt.UTC).date()
+    oldest = conn.execute(
+        sa.text("SELECT min(created_at) FROM ticket_analysis_legacy")
+    ).scalar()
+    _create_partitions(
+        oldest.date() if oldest else today,
+        _month_start(today, PARTITION_MONTHS_AHEAD),
+    )
+
+    op.execute(
+        "INSERT INTO analysis_runs (id, created_at, summary) "
+        "SELECT id, created_at, summary FROM analysis_runs_legacy"
+    )
+    op.execute(
+        "INSERT INTO ticket_analysis "
+        "(id, created_at, analysis_run_id, ticket_id, category, priority, notes) "
+        "SELECT id, created_at, analysis_run_id, ticket_id, category, "
+        "priority, notes FROM ticket_analysis_legacy"
+    )
+    op.drop_table("ticket_analysis_legacy")
+    op.drop_table("analysis_runs_legacy")
+
+    op.execute(
+        "UPDATE tickets SET last_analyzed_at = latest.created_at "
+        "FROM (SELECT ticket_id, max(created_at) AS created_at "
+        "FROM ticket_analysis GROUP BY ticket_id) latest "
+        "WHERE latest.ticket_id = tickets.id"
+    )
+
+
+def downgrade() -> None:
+    op.rename_table("ticket_analysis", "ticket_analysis_partitioned")
+    op.rename_table("analysis_runs", "analysis_runs_partitioned")
+    op.execute(
+        "ALTER INDEX ticket_analysis_pkey "
+        "RENAME TO ticket_analysis_partitioned_pkey"
+    )
+    op.execute(
+        "ALTER INDEX analysis_runs_pkey RENAME TO analysis_runs_partitioned_pkey"
+    )
+    op.drop_index("ix_ticket_analysis_analysis_run_id")
+    op.drop_index("ix_ticket_analysis_ticket_id_created_at")
+    op.drop_index("ix_analysis_runs_created_at")
+
+    op.create_table(
+        "analysis_runs",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=False),
+    )
+    op.create_table(
+        "ticket_analysis",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "analysis_run_id",
+            sa.String(36),
+            sa.ForeignKey("analysis_runs.id"),
+            nullable=False,
+        ),
+        sa.Column(
+            "ticket_id",
+            sa.String(36),
+            sa.ForeignKey("tickets.id"),
+            nullable=False,
+        ),
+        sa.Column("category", sa.String(100), nullable=False),
+        sa.Column("priority", sa.String(20), nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+    )
+    op.execute(
+        "INSERT INTO analysis_runs SELECT id, created_at, summary "
+        "FROM analysis_runs_partitioned"
+    )
+    op.execute(
+        "INSERT INTO ticket_analysis "
+        "SELECT id, created_at, analysis_run_id, ticket_id, category, "
+        "priority, notes FROM ticket_analysis_partitioned"
+    )
+    op.execute("DROP TABLE ticket_analysis_partitioned CASCADE")
+    op.execute("DROP TABLE analysis_runs_partitioned CASCADE")
+
+    op.drop_table("analysis_shards")
+    for column in [
+        "last_analyzed_at",
+        "analyzed_prompt_version",
+        "analyzed_model",
+        "analyzed_fingerprint",
+        "fingerprint",
+    ]:
+        op.drop_column("tickets", column)
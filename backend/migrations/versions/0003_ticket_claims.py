@@ -0,0 +1,30 @@
+"""ticket claims
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0003"
+down_revision: str | None = "0002"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("tickets", sa.Column("claimed_by_run_id", sa.String(36)))
+    op.add_column("tickets", sa.Column("claim_expires_at", sa.DateTime()))
+
+
+def downgrade() -> None:
+    op.execute(
+        "UPDATE tickets SET status = 'incomplete' WHERE status = 'in_progress'"
+    )
+    op.drop_column("tickets", "claim_expires_at")
+    op.drop_column("tickets", "claimed_by_run_id")
@@ -0,0 +1,123 @@
+"""full-text search vector on tickets
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0004"
+down_revision: str | None = "0003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tickets", sa.Column("search_vector", postgresql.TSVECTOR())
+    )
+
+    op.execute(
+        """
+        CREATE FUNCTION ticket_search_document(
+            title text, description text, notes text
+        ) RETURNS tsvector LANGUAGE sql IMMUTABLE AS $$
+            SELECT setweight(to_tsvector('english', coalesce(title, '')), 'A')
+                || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+                || setweight(to_tsvector('english', coalesce(notes, '')), 'C')
+        $$
+        """
+    )
+
+    # Title or description edits keep the notes of the latest analysis
+    op.execute(
+        """
+        CREATE FUNCTION tickets_search_vector_update() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.search_vector := ticket_search_document(
+                NEW.title,
+                NEW.description,
+                (
+                    SELECT notes FROM ticket_analysis
+                    WHERE ticket_id = NEW.id
+                      AND created_at = NEW.last_analyzed_at
+                    LIMIT 1
+                )
+            );
+            RETURN NEW;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER tickets_search_vector
+        BEFORE INSERT OR UPDATE OF title, description ON tickets
+        FOR EACH ROW EXECUTE FUNCTION tickets_search_vector_update()
+        """
+    )
+
+    # A new analysis is always the latest one of its ticket
+    op.execute(
+        """
+        CREATE FUNCTION ticket_analysis_search_vector_update() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE tickets
+            SET search_vector = ticket_search_document(
+                title, description, NEW.notes
+            )
+            WHERE id = NEW.ticket_id;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER ticket_analysis_search_vector
+        AFTER INSERT ON ticket_analysis
+        FOR EACH ROW EXECUTE FUNCTION ticket_analysis_search_vector_update()
+        """
+    )
+
+    op.execute(
+        """
+        UPDATE tickets t
+        SET search_vector = ticket_search_document(
+            t.title,
+            t.description,
+            (
+                SELECT a.notes FROM ticket_analysis a
+                WHERE a.ticket_id = t.id AND a.created_at = t.last_analyzed_at
+                LIMIT 1
+            )
+        )
+        """
+    )
+    # Built after the backfill, which is much faster than maintaining it
+    op.create_index(
+        "ix_tickets_search_vector",
+        "tickets",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tickets_search_vector")
+    op.execute(
+        "DROP TRIGGER ticket_analysis_search_vector ON ticket_analysis"
+    )
+    op.execute("DROP TRIGGER tickets_search_vector ON tickets")
+    op.execute("DROP FUNCTION ticket_analysis_search_vector_update()")
+    op.execute("DROP FUNCTION tickets_search_vector_update()")
+    op.execute("DROP FUNCTION ticket_search_document(text, text, text)")
+    op.drop_column("tickets", "search_vector")
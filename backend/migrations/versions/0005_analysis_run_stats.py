@@ -0,0 +1,25 @@
+"""per-run LLM stats
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0005"
+down_revision: str | None = "0004"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("analysis_runs", sa.Column("stats", sa.JSON()))
+
+
+def downgrade() -> None:
+    op.drop_column("analysis_runs", "stats")
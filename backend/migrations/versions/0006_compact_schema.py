@@ -0,0 +1,163 @@
+"""native uuid keys, coded status/category/priority, covering indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+
+revision: str = "0006"
+down_revision: str | None = "0005"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Frozen copies of app.models.enums: the code of a label is its position
+STATUSES = ["incomplete", "complete", "in_progress"]
+CATEGORIES = ["billing", "bug", "feature_request", "authentication", "other"]
+PRIORITIES = ["high", "medium", "low"]
+
+
+def _to_code(column: str, labels: list[str], default: str) -> str:
+    cases = " ".join(
+        f"WHEN '{label}' THEN {code}" for code, label in enumerate(labels)
+    )
+    return f"CASE lower({column}) {cases} ELSE {labels.index(default)} END"
+
+
+def _to_label(column: str, labels: list[str]) -> str:
+    cases = " ".join(
+        f"WHEN {code} THEN '{label}'" for code, label in enumerate(labels)
+    )
+    return f"CASE {column} {cases} END"
+
+
+def upgrade() -> None:
+    # Dropped up front so the type changes do not rebuild them first
+    op.drop_constraint(
+        "ticket_analysis_ticket_id_fkey", "ticket_analysis", type_="foreignkey"
+    )
+    op.drop_index("ix_ticket_analysis_ticket_id_created_at")
+    op.drop_index("ix_ticket_analysis_analysis_run_id")
+    op.drop_index("ix_analysis_shards_analysis_run_id")
+
+    # One ALTER per table, so each is rewritten only once
+    op.execute(
+        "ALTER TABLE tickets "
+        "ALTER COLUMN id TYPE uuid USING id::uuid, "
+        "ALTER COLUMN claimed_by_run_id TYPE uuid "
+        "USING claimed_by_run_id::uuid, "
+        "ALTER COLUMN status TYPE smallint "
+        f"USING {_to_code('status', STATUSES, 'incomplete')}"
+    )
+    op.execute(
+        "ALTER TABLE analysis_runs ALTER COLUMN id TYPE uuid USING id::uuid"
+    )
+    op.execute(
+        "ALTER TABLE ticket_analysis "
+        "ALTER COLUMN id TYPE uuid USING id::uuid, "
+        "ALTER COLUMN analysis_run_id TYPE uuid USING analysis_run_id::uuid, "
+        "ALTER COLUMN ticket_id TYPE uuid USING ticket_id::uuid, "
+        "ALTER COLUMN category TYPE smallint "
+        f"USING {_to_code('category', CATEGORIES, 'other')}, "
+        "ALTER COLUMN priority TYPE smallint "
+        f"USING {_to_code('priority', PRIORITIES, 'medium')}"
+    )
+    op.execute(
+        "ALTER TABLE analysis_shards "
+        "ALTER COLUMN id TYPE uuid USING id::uuid, "
+        "ALTER COLUMN analysis_run_id TYPE uuid USING analysis_run_id::uuid"
+    )
+
+    op.create_foreign_key(
+        "ticket_analysis_ticket_id_fkey",
+        "ticket_analysis",
+        "tickets",
+        ["ticket_id"],
+        ["id"],
+    )
+    op.execute(
+        "CREATE INDEX ix_ticket_analysis_ticket_id_created_at "
+        "ON ticket_analysis (ticket_id, created_at DESC) "
+        "INCLUDE (category, priority)"
+    )
+    op.create_index(
+        "ix_ticket_analysis_analysis_run_id",
+        "ticket_analysis",
+        ["analysis_run_id", "created_at"],
+    )
+    op.create_index(
+        "ix_analysis_shards_analysis_run_id",
+        "analysis_shards",
+        ["analysis_run_id"],
+    )
+    op.create_index(
+        "ix_tickets_status_created_at", "tickets", ["status", "created_at"]
+    )
+    op.create_index(
+        "ix_tickets_claimed_by_run_id",
+        "tickets",
+        ["claimed_by_run_id"],
+        postgresql_where="claimed_by_run_id IS NOT NULL",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tickets_claimed_by_run_id")
+    op.drop_index("ix_tickets_status_created_at")
+    op.drop_index("ix_analysis_shards_analysis_run_id")
+    op.drop_index("ix_ticket_analysis_analysis_run_id")
+    op.drop_index("ix_ticket_analysis_ticket_id_created_at")
+    op.drop_constraint(
+        "ticket_analysis_ticket_id_fkey", "ticket_analysis", type_="foreignkey"
+    )
+
+    op.execute(
+        "ALTER TABLE tickets "
+        "ALTER COLUMN id TYPE varchar(36), "
+        "ALTER COLUMN claimed_by_run_id TYPE varchar(36), "
+        "ALTER COLUMN status TYPE varchar(20) "
+        f"USING {_to_label('status', STATUSES)}"
+    )
+    op.execute("ALTER TABLE analysis_runs ALTER COLUMN id TYPE varchar(36)")
+    op.execute(
+        "ALTER TABLE ticket_analysis "
+        "ALTER COLUMN id TYPE varchar(36), "
+        "ALTER COLUMN analysis_run_id TYPE varchar(36), "
+        "ALTER COLUMN ticket_id TYPE varchar(36), "
+        "ALTER COLUMN category TYPE varchar(100) "
+        f"USING {_to_label('category', CATEGORIES)}, "
+        "ALTER COLUMN priority TYPE varchar(20) "
+        f"USING {_to_label('priority', PRIORITIES)}"
+    )
+    op.execute(
+        "ALTER TABLE analysis_shards "
+        "ALTER COLUMN id TYPE varchar(36), "
+        "ALTER COLUMN analysis_run_id TYPE varchar(36)"
+    )
+
+    op.create_foreign_key(
+        "ticket_analysis_ticket_id_fkey",
+        "ticket_analysis",
+        "tickets",
+        ["ticket_id"],
+        ["id"],
+    )
+    op.create_index(
+        "ix_ticket_analysis_ticket_id_created_at",
+        "ticket_analysis",
+        ["ticket_id", "created_at"],
+    )
+    op.create_index(
+        "ix_ticket_analysis_analysis_run_id",
+        "ticket_analysis",
+        ["analysis_run_id"],
+    )
+    op.create_index(
+        "ix_analysis_shards_analysis_run_id",
+        "analysis_shards",
+        ["analysis_run_id"],
+    )
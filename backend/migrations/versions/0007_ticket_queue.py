@@ -0,0 +1,27 @@
+"""ticket queue for fair LLM scheduling
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0007"
+down_revision: str | None = "0006"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("tickets", sa.Column("queue", sa.String(64)))
+    op.create_index("ix_tickets_queue_status", "tickets", ["queue", "status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tickets_queue_status")
+    op.drop_column("tickets", "queue")
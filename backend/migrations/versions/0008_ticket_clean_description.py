@@ -0,0 +1,27 @@
+"""cached preprocessed ticket description
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:00:00
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0008"
+down_revision: str | None = "0007"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("tickets", sa.Column("clean_description", sa.Text()))
+    op.add_column("tickets", sa.Column("cleaned_key", sa.String(64)))
+
+
+def downgrade() -> None:
+    op.drop_column("tickets", "cleaned_key")
+    op.drop_column("tickets", "clean_description")
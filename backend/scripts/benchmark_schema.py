@@ -0,0 +1,166 @@
+"""
+Compares the legacy text-keyed layout of tickets/ticket_analysis with
+the compact one (uuid keys, SMALLINT codes, covering index) on
+synthetic data, e.g. `python scripts/benchmark_schema.py --tickets 200000`
+Both copies are built in scratch schemas that are dropped afterwards
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# Column types and generated values of each layout
+LAYOUTS = {
+    "legacy": {
+        "id": "varchar(36)",
+        "id_value": "gen_random_uuid()::text",
+        "code": "varchar(100)",
+        "label": "(ARRAY['billing','bug','feature_request',"
+        "'authentication','other'])[1 + (n % 5)]",
+        "priority": "(ARRAY['high','medium','low'])[1 + (n % 3)]",
+        "status": "(ARRAY['incomplete','complete'])[1 + (n % 2)]",
+        "analysis_index": "(ticket_id, created_at)",
+    },
+    "compact": {
+        "id": "uuid",
+        "id_value": "gen_random_uuid()",
+        "code": "smallint",
+        "label": "n % 5",
+        "priority": "n % 3",
+        "status": "n % 2",
+        "analysis_index": "(ticket_id, created_at DESC) "
+        "INCLUDE (category, priority)",
+    },
+}
+
+SETUP = """
+CREATE TABLE {schema}.tickets (
+    id {id} PRIMARY KEY,
+    created_at timestamptz NOT NULL,
+    title varchar(255) NOT NULL,
+    status {code} NOT NULL,
+    last_analyzed_at timestamptz
+);
+CREATE TABLE {schema}.ticket_analysis (
+    id {id} PRIMARY KEY,
+    created_at timestamptz NOT NULL,
+    analysis_run_id {id} NOT NULL,
+    ticket_id {id} NOT NULL,
+    category {code},
+    priority {code}
+);
+INSERT INTO {schema}.tickets
+SELECT {id_value}, now() - n * interval '1 minute', 'ticket ' || n,
+       {status}, now()
+FROM generate_series(1, :tickets) AS n;
+INSERT INTO {schema}.ticket_analysis
+WITH runs AS MATERIALIZED (
+    SELECT r, {id_value} AS id FROM generate_series(0, :runs - 1) AS r
+)
+SELECT {id_value}, t.last_analyzed_at - runs.r * interval '1 day',
+       runs.id, t.id, {label}, {priority}
+FROM (SELECT id, last_analyzed_at, row_number() OVER () AS n
+      FROM {schema}.tickets) AS t, runs;
+CREATE INDEX ON {schema}.ticket_analysis {analysis_index};
+CREATE INDEX ON {schema}.ticket_analysis (analysis_run_id, created_at);
+CREATE INDEX ON {schema}.tickets (status, created_at);
+ANALYZE {schema}.tickets;
+ANALYZE {schema}.ticket_analysis;
+"""
+
+QUERIES = {
+    "latest analysis per ticket": """
+        SELECT t.id, a.category, a.priority
+        FROM {schema}.tickets t
+        JOIN {schema}.ticket_analysis a
+          ON a.ticket_id = t.id AND a.created_at = t.last_analyzed_at
+        WHERE t.status = {complete}
+        ORDER BY t.created_at DESC LIMIT 500
+    """,
+    "analyses of one run": """
+        SELECT ticket_id, category, priority
+        FROM {schema}.ticket_analysis
+        WHERE analysis_run_id = (
+            SELECT analysis_run_id FROM {schema}.ticket_analysis LIMIT 1
+        )
+        ORDER BY created_at
+    """,
+    "category facet counts": """
+        SELECT a.category, count(*)
+        FROM {schema}.tickets t
+        JOIN {schema}.ticket_analysis a
+          ON a.ticket_id = t.id AND a.created_at = t.last_analyzed_at
+        GROUP BY a.category
+    """,
+}
+
+
+def build(conn, name: str, tickets: int, runs: int) -> str:
+    layout = LAYOUTS[name]
+    schema = f"benchmark_{name}"
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {schema}"))
+    sql = SETUP.format(schema=schema, **layout)
+    for statement in filter(str.strip, sql.split(";")):
+        conn.execute(text(statement), {"tickets": tickets, "runs": runs})
+    return schema
+
+
+def sizes(conn, schema: str) -> tuple[int, int]:
+    return conn.execute(
+        text(
+            "SELECT sum(pg_table_size(c.oid)), sum(pg_indexes_size(c.oid)) "
+            "FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = :schema AND c.relkind = 'r'"
+        ),
+        {"schema": schema},
+    ).one()
+
+
+def time_query(conn, sql: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(text(sql)).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    from app.config import settings
+
+    engine = create_engine(settings.database_url)
+    with engine.connect() as conn:
+        for name in LAYOUTS:
+            schema = build(conn, name, args.tickets, args.runs)
+            conn.commit()
+            table_bytes, index_bytes = sizes(conn, schema)
+            print(
+                f"{name}: table {table_bytes / 2**20:.1f} MiB, "
+                f"indexes {index_bytes / 2**20:.1f} MiB"
+            )
+            complete = "'complete'" if name == "legacy" else "1"
+            for label, sql in QUERIES.items():
+                elapsed = time_query(
+                    conn,
+                    sql.format(schema=schema, complete=complete),
+                    args.repeat,
+                )
+                print(f"  {label}: {elapsed:.1f} ms")
+            if not args.keep:
+                conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+                conn.commit()
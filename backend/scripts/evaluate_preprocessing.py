@@ -0,0 +1,103 @@
+"""
+Classifies a labelled sample twice, with raw and with preprocessed
+descriptions, and compares prompt tokens, LLM latency and accuracy, e.g.
+`python scripts/evaluate_preprocessing.py sample.jsonl --limit 200`
+Each JSONL line needs `title`, `description` and `category`, optionally
+`priority`. Needs the configured LLM backend to be reachable
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+async def classify(ticket, semaphore) -> tuple[dict | None, int, float]:
+    from app.agents.nodes import TicketStructuredOutput
+    from app.agents.prompts import (
+        CLASSIFICATION_SYSTEM_PROMPT,
+        build_classification_prompt,
+        count_tokens,
+    )
+    from app.agents.utils import get_structured_llm_response
+
+    prompt = build_classification_prompt(ticket)
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            result = await get_structured_llm_response(
+                prompt=prompt,
+                system_prompt=CLASSIFICATION_SYSTEM_PROMPT,
+                response_format=TicketStructuredOutput,
+            )
+        except Exception:
+            result = None
+        elapsed = time.perf_counter() - started
+    return result, count_tokens(prompt), elapsed
+
+
+async def evaluate(rows: list[dict], clean: bool, concurrency: int) -> dict:
+    from app.agents.preprocess import preprocess_text
+
+    semaphore = asyncio.Semaphore(concurrency)
+    tickets = [
+        SimpleNamespace(
+            title=row["title"],
+            description=row["description"],
+            clean_description=(
+                preprocess_text(row["description"]) if clean else None
+            ),
+        )
+        for row in rows
+    ]
+    outcomes = await asyncio.gather(
+        *(classify(ticket, semaphore) for ticket in tickets)
+    )
+
+    latencies = sorted(elapsed for _, _, elapsed in outcomes)
+    report = {
+        "prompt_tokens": statistics.mean(t for _, t, _ in outcomes),
+        "latency_ms": statistics.mean(latencies) * 1000,
+        "p95_latency_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "failures": sum(result is None for result, _, _ in outcomes),
+    }
+    for field in ("category", "priority"):
+        labelled = [
+            (row[field], result)
+            for row, (result, _, _) in zip(rows, outcomes, strict=True)
+            if row.get(field)
+        ]
+        if labelled:
+            report[f"{field}_accuracy"] = sum(
+                bool(result) and result[field] == label
+                for label, result in labelled
+            ) / len(labelled)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample", help="Labelled JSONL file")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.sample) as f:
+        rows = [json.loads(line) for line in f if line.strip()][: args.limit]
+
+    for label, clean in (("raw", False), ("preprocessed", True)):
+        report = asyncio.run(evaluate(rows, clean, args.concurrency))
+        print(
+            f"{label}: "
+            + ", ".join(
+                f"{k} {v:.3f}" if isinstance(v, float) else f"{k} {v}"
+                for k, v in report.items()
+            )
+        )
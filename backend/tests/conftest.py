@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+import httpx
+import pytest
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+
+
+# app.config reads the database URL at import time. A file, so that every
+# connection of the engine sees the same SQLite database
+_db_dir = tempfile.mkdtemp(prefix="triage-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test.db")
+
+
+@compiles(TSVECTOR, "sqlite")
+def _tsvector_as_text(type_, compiler, **kw) -> str:
+    return "TEXT"
+
+
+@pytest.fixture
+def tables():
+    """
+    A fresh schema per test. Postgres-only features (partitions, search
+    triggers) are not part of it, see `postgres` for those
+    """
+    from app.database import engine
+    from app.models import Base
+
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def postgres():
+    """
+    Engine on TEST_POSTGRES_URL with the schema migrated to head, for
+    tests of Postgres-only queries. Skipped when the URL is not set
+    """
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+    backend = os.path.dirname(os.path.dirname(__file__))
+    config = Config(os.path.join(backend, "alembic.ini"))
+    config.set_main_option("script_location", f"{backend}/migrations")
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+async def client():
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as client:
+        yield client
@@ -0,0 +1,79 @@
+import asyncio
+import uuid
+
+from app.database import get_db_session
+from app.models import Ticket
+
+
+async def test_unknown_run_answers_404(client, tables):
+    response = await client.get(f"/api/analysis/{uuid.uuid4()}")
+    assert response.status_code == 404
+
+
+async def test_no_runs_yet_answers_404(client, tables):
+    response = await client.get("/api/analysis/latest")
+    assert response.status_code == 404
+
+
+async def test_run_can_be_polled_before_it_completes(client, tables):
+    db = get_db_session()
+    db.add(Ticket(title="Site down", description="500 on every page"))
+    db.commit()
+    db.close()
+
+    response = await client.post("/api/analysis/", json={"wait": False})
+    assert response.status_code == 202
+    run = response.json()
+    assert run["summary"] == "Analysis in progress..."
+    assert response.headers["Location"] == f"/api/analysis/{run['id']}"
+
+    for _ in range(100):
+        polled = await client.get(response.headers["Location"])
+        assert polled.status_code == 200
+        if polled.json()["ticket_analyses"]:
+            break
+        await asyncio.sleep(0.05)
+    assert polled.json()["id"] == run["id"]
+    assert len(polled.json()["ticket_analyses"]) == 1
+
+
+async def test_run_answers_with_results_by_default(client, tables):
+    db = get_db_session()
+    db.add(Ticket(title="Add dark mode", description="Feature request"))
+    db.commit()
+    db.close()
+
+    response = await client.post("/api/analysis/", json={})
+    assert response.status_code == 200
+    assert len(response.json()["ticket_analyses"]) == 1
+
+
+async def test_only_identical_requests_share_a_run(client, tables, monkeypatch):
+    import app.agents.graph as graph
+    import app.agents.sharding as sharding
+
+    release = asyncio.Event()
+
+    async def blocked_run(*args, **kwargs):
+        await release.wait()
+
+    monkeypatch.setattr(graph, "run_graph", blocked_run)
+    monkeypatch.setattr(sharding, "run_sharded_analysis", blocked_run)
+
+    async def start(**options) -> str:
+        response = await client.post(
+            "/api/analysis/", json={"wait": False, **options}
+        )
+        assert response.status_code == 202
+        return response.json()["id"]
+
+    try:
+        plain = await start()
+        assert await start() == plain
+        assert await start(deadline_seconds=30) != plain
+        assert await start(shard_size=10) != plain
+        assert await start(deadline_seconds=30) != await start(
+            deadline_seconds=60
+        )
+    finally:
+        release.set()
@@ -0,0 +1,111 @@
+import datetime as dt
+
+import numpy as np
+
+from app.agents.dedup import (
+    cluster_tickets,
+    lsh_clusters,
+    minhash_signatures,
+    normalize_text,
+    shingle,
+)
+from app.models import Ticket
+
+
+def ticket(title: str, description: str, minutes_ago: int = 0) -> Ticket:
+    created_at = dt.datetime(2026, 1, 1) - dt.timedelta(minutes=minutes_ago)
+    return Ticket(title=title, description=description, created_at=created_at)
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return len(np.intersect1d(a, b)) / len(np.union1d(a, b))
+
+
+class TestNormalizeText:
+    def test_numbers_case_and_whitespace_are_masked(self):
+        first = ticket("Order 1234 FAILED", "Error  at\n12:30")
+        second = ticket("order 98 failed", "error at 9:05")
+        assert normalize_text(first) == normalize_text(second)
+
+    def test_clean_description_is_preferred(self):
+        item = ticket("Login", "Login broken\n\nThanks,\nJane")
+        item.clean_description = "Login broken"
+        assert normalize_text(item) == "login login broken"
+
+
+class TestShingle:
+    def test_distinct_grams(self):
+        assert len(shingle("aaaaaaa", 5)) == 1
+        assert len(shingle("abcdefg", 5)) == 3
+
+    def test_short_text_is_padded_to_one_gram(self):
+        assert len(shingle("ab", 5)) == 1
+        assert len(shingle("", 5)) == 1
+
+
+class TestMinHash:
+    def test_signatures_are_deterministic(self):
+        sets = [shingle("the export fails"), shingle("login is broken")]
+        assert np.array_equal(
+            minhash_signatures(sets), minhash_signatures(sets)
+        )
+
+    def test_agreement_estimates_jaccard(self):
+        a = shingle("the nightly export to s3 fails with a timeout error")
+        b = shingle("the nightly export to s3 fails with a permission error")
+        signatures = minhash_signatures([a, b], num_perm=512)
+        estimate = (signatures[0] == signatures[1]).mean()
+        assert abs(estimate - jaccard(a, b)) < 0.1
+
+
+class TestLshClusters:
+    def test_identical_rows_merge_and_others_stay_apart(self):
+        signatures = np.array(
+            [[1, 2, 3, 4], [1, 2, 3, 4], [5, 6, 7, 8], [9, 9, 9, 9]],
+            dtype=np.uint64,
+        )
+        roots = lsh_clusters(signatures, bands=2, threshold=0.8)
+        assert roots[0] == roots[1]
+        assert len({roots[0], roots[2], roots[3]}) == 3
+
+    def test_bucket_mates_below_threshold_stay_apart(self):
+        # Same first band, different second one: 50% agreement
+        signatures = np.array([[1, 2, 3, 4], [1, 2, 7, 8]], dtype=np.uint64)
+        assert lsh_clusters(signatures, bands=2, threshold=0.8) == [0, 1]
+        assert lsh_clusters(signatures, bands=2, threshold=0.5) == [0, 0]
+
+    def test_merges_are_transitive(self):
+        signatures = np.array(
+            [[1, 2, 3, 4], [1, 2, 3, 5], [1, 2, 6, 5]], dtype=np.uint64
+        )
+        roots = lsh_clusters(signatures, bands=4, threshold=0.75)
+        assert len(set(roots)) == 1
+
+
+class TestClusterTickets:
+    def test_near_duplicates_share_a_cluster(self):
+        tickets = [
+            ticket(
+                "Checkout fails",
+                "Order 1001 fails at payment with error 502.",
+            ),
+            ticket("Dark mode", "Please add a dark theme to the dashboard."),
+            ticket(
+                "Checkout fails",
+                "Order 2087 fails at payment with error 502.",
+            ),
+        ]
+        clusters = cluster_tickets(tickets)
+        assert sorted(map(sorted, clusters)) == [[0, 2], [1]]
+
+    def test_most_urgent_ticket_represents_its_cluster(self):
+        description = "The whole site is down, every page returns 500."
+        tickets = [
+            ticket("Site down", description, minutes_ago=5),
+            ticket("Site down", description, minutes_ago=30),
+        ]
+        assert cluster_tickets(tickets) == [[1, 0]]
+
+    def test_fewer_than_two_tickets(self):
+        assert cluster_tickets([]) == []
+        assert cluster_tickets([ticket("Login", "Broken")]) == [[0]]
@@ -0,0 +1,46 @@
+import csv
+import io
+import uuid
+
+from app.database import get_db_session
+from app.models import Ticket
+
+
+async def test_csv_export_lists_tickets(client, tables):
+    db = get_db_session()
+    db.add_all(
+        [
+            Ticket(title="Login broken", description="Cannot log in"),
+            Ticket(title="Dark mode", description="Feature request"),
+        ]
+    )
+    db.commit()
+    db.close()
+
+    response = await client.get("/api/tickets/export")
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert sorted(row["title"] for row in rows) == ["Dark mode", "Login broken"]
+
+
+async def test_export_of_unknown_run_is_empty(client, tables):
+    response = await client.get(
+        "/api/tickets/export",
+        params={"format": "ndjson", "run_id": str(uuid.uuid4())},
+    )
+    assert response.status_code == 200
+    assert response.text == ""
+
+
+async def test_malformed_run_id_answers_422(client, tables):
+    response = await client.get(
+        "/api/tickets/export", params={"run_id": "not-a-uuid"}
+    )
+    assert response.status_code == 422
+
+
+async def test_failing_query_answers_500_before_streaming(client):
+    # No tables: the query fails on its first batch
+    response = await client.get("/api/tickets/export")
+    assert response.status_code == 500
+    assert response.headers["content-type"] == "application/json"
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from app.agents.fair_queue import FairQueue, llm_queue, parse_weights
+from app.exceptions import QueueSaturatedError
+
+
+def test_parse_weights():
+    assert parse_weights(" billing=3, platform=1,,") == {
+        "billing": 3.0,
+        "platform": 1.0,
+    }
+    assert parse_weights("") == {}
+
+
+class TestOrdering:
+    async def run_calls(self, queue: FairQueue, calls: list[str]) -> list[str]:
+        """
+        Holds the only slot, queues `calls` behind it and returns the order
+        in which they are served
+        """
+        served = []
+        await queue.acquire("warmup")
+
+        async def call(name: str) -> None:
+            async with queue.slot(name):
+                served.append(name)
+
+        tasks = [asyncio.create_task(call(name)) for name in calls]
+        await asyncio.sleep(0)  # Every call is waiting now
+        queue.release()
+        await asyncio.gather(*tasks)
+        return served
+
+    async def test_small_queue_is_not_stuck_behind_large_backlog(self):
+        queue = FairQueue(capacity=1)
+        served = await self.run_calls(queue, ["big"] * 6 + ["small"] * 2)
+        # Alternates instead of draining the earlier arrivals first
+        assert served[:4] == ["big", "small", "big", "small"]
+
+    async def test_weights_set_the_share(self):
+        queue = FairQueue(capacity=1, weights={"heavy": 3})
+        served = await self.run_calls(queue, ["heavy"] * 6 + ["light"] * 6)
+        assert served[:8].count("heavy") == 6
+
+    async def test_capacity_bounds_concurrency(self):
+        queue = FairQueue(capacity=2)
+        active = peak = 0
+
+        async def call() -> None:
+            nonlocal active, peak
+            async with queue.slot(None):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.001)
+                active -= 1
+
+        await asyncio.gather(*(call() for _ in range(10)))
+        assert peak == 2
+        assert queue.snapshot()["active"] == 0
+
+    async def test_cancelled_waiter_gives_up_its_turn(self):
+        queue = FairQueue(capacity=1)
+        await queue.acquire("a")
+        waiter = asyncio.create_task(queue.acquire("b"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        queue.release()
+        assert queue.snapshot()["active"] == 0
+
+
+class TestAdmission:
+    def test_busy_queue_is_rejected_when_saturated(self):
+        queue = FairQueue(capacity=2, max_backlog=4)
+        queue.add_backlog("big", 4)
+        with pytest.raises(QueueSaturatedError) as error:
+            queue.admit("big")
+        assert error.value.status_code == 429
+        assert int(error.value.headers["Retry-After"]) >= 1
+
+    def test_idle_queue_is_admitted_when_saturated(self):
+        queue = FairQueue(max_backlog=4)
+        queue.add_backlog("big", 4)
+        queue.admit("small")
+
+    def test_backlog_below_limit_is_admitted(self):
+        queue = FairQueue(max_backlog=4)
+        queue.add_backlog(None, 3)
+        queue.admit(None)
+        queue.remove_backlog(None, 3)
+        assert queue.pending == 0
+
+    def test_retry_after_grows_with_backlog(self):
+        queue = FairQueue(capacity=1)
+        queue.add_backlog("a", 10)
+        short = queue.retry_after()
+        queue.add_backlog("a", 90)
+        assert queue.retry_after() > short
+
+
+async def test_saturated_queue_answers_429_with_retry_after(
+    client, monkeypatch
+):
+    monkeypatch.setattr(llm_queue, "max_backlog", 1)
+    llm_queue.add_backlog("billing")
+    try:
+        response = await client.post(
+            "/api/analysis/", json={"queue": "billing"}
+        )
+    finally:
+        llm_queue.remove_backlog("billing")
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert "billing" in response.json()["detail"]
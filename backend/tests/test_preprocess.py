@@ -0,0 +1,98 @@
+import base64
+import time
+
+from app.agents.preprocess import (
+    clean_text,
+    strip_encoded_blobs,
+    strip_signature,
+)
+
+
+def lines(text: str) -> list[str]:
+    return text.split("\n")
+
+
+class TestStripSignature:
+    def test_closing_followed_by_name_is_stripped(self):
+        text = "The export fails on step 2.\n\nThanks,\nJane Doe\nAcme Inc."
+        assert strip_signature(lines(text)) == [
+            "The export fails on step 2.",
+            "",
+        ]
+
+    def test_closing_as_last_line_is_stripped(self):
+        text = "Login is broken since Monday.\nBest regards"
+        assert strip_signature(lines(text)) == ["Login is broken since Monday."]
+
+    def test_delimiter_cuts_everything_below(self):
+        text = "Refund please.\n--\nJane Doe\nCall me: +1 555 0100"
+        assert strip_signature(lines(text)) == ["Refund please."]
+
+    def test_sentence_starting_with_closing_word_is_kept(self):
+        text = (
+            "The export fails on step 2.\n"
+            "Thanks to this bug our team is blocked.\n"
+            "Error code 500 when clicking Save."
+        )
+        assert strip_signature(lines(text)) == lines(text)
+
+    def test_closing_followed_by_report_text_is_kept(self):
+        text = "Hi,\nThanks!\nThe Save button does nothing at all."
+        assert strip_signature(lines(text)) == lines(text)
+
+    def test_closing_above_the_tail_is_kept(self):
+        body = ["Step one works.", "Thanks", *(["More detail"] * 6)]
+        assert strip_signature(body) == body
+
+    def test_first_line_is_never_stripped(self):
+        assert strip_signature(["Thanks"]) == ["Thanks"]
+
+
+class TestCleanText:
+    def test_keeps_error_line_after_thanks_sentence(self):
+        text = (
+            "The export fails on step 2.\n"
+            "Thanks to this bug our team is blocked.\n"
+            "Error code 500 when clicking Save."
+        )
+        assert clean_text(text) == text
+
+    def test_strips_quoted_reply_and_signature(self):
+        text = (
+            "Still broken after the update.\n\n"
+            "Cheers,\nSam\n\n"
+            "On Mon, Jan 6, 2025 at 9:00 AM Support wrote:\n"
+            "> Please try again."
+        )
+        assert clean_text(text) == "Still broken after the update."
+
+
+class TestStripEncodedBlobs:
+    def test_wrapped_base64_block_is_replaced(self):
+        encoded = base64.encodebytes(bytes(range(256)) * 2).decode()
+        text = f"See attachment:\n{encoded}Thanks"
+        assert strip_encoded_blobs(text) == (
+            "See attachment:\n[encoded data]\nThanks"
+        )
+
+    def test_long_single_line_is_replaced(self):
+        encoded = base64.b64encode(bytes(range(256))).decode()
+        assert strip_encoded_blobs(f"Log:\n{encoded}\nEnd") == (
+            "Log:\n[encoded data]\nEnd"
+        )
+
+    def test_short_tokens_are_kept(self):
+        text = "Token abc123DEF456 expired, request id " + "a1" * 20
+        assert strip_encoded_blobs(text) == text
+
+    def test_near_miss_runs_stay_linear(self):
+        # Runs just too short to match used to backtrack polynomially
+        text = "!".join(["A" * 179] * 2000)
+        started = time.perf_counter()
+        assert strip_encoded_blobs(text) == text
+        assert time.perf_counter() - started < 1.0
+
+    def test_short_last_line_of_block_is_replaced(self):
+        encoded = base64.encodebytes(bytes(range(200))).decode()
+        assert not encoded.endswith(f"{'x' * 76}\n")
+        assert strip_encoded_blobs(f"{encoded}Bye") == "[encoded data]\nBye"
@@ -0,0 +1,63 @@
+import datetime as dt
+import uuid
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.database.partitions import create_partition, month_start
+from app.database.retention import apply_retention
+from app.models import AnalysisRun, Ticket, TicketAnalysis, utc_now
+
+
+def test_keeps_latest_analyses_in_hot_and_cold_partitions(postgres, tmp_path):
+    now = utc_now()
+    old = dt.datetime.combine(month_start(now.date(), -6), dt.time(12))
+    with postgres.begin() as conn:
+        for table in ["analysis_runs", "ticket_analysis"]:
+            create_partition(conn, table, old.date())
+
+    old_run, new_run = str(uuid.uuid4()), str(uuid.uuid4())
+    with Session(postgres) as db:
+        ticket = Ticket(title="Login broken", description="Cannot log in")
+        db.add_all(
+            [
+                ticket,
+                AnalysisRun(id=old_run, created_at=old, summary="old"),
+                AnalysisRun(id=new_run, created_at=now, summary="new"),
+            ]
+        )
+        db.flush()
+        db.add_all(
+            TicketAnalysis(
+                analysis_run_id=run_id,
+                ticket_id=ticket.id,
+                created_at=created_at,
+                category="bug",
+                priority="high",
+            )
+            for run_id, created_at in [
+                (old_run, old),
+                (old_run, old + dt.timedelta(minutes=1)),
+                (new_run, now - dt.timedelta(minutes=1)),
+                (new_run, now),
+            ]
+        )
+        db.commit()
+
+    archived = apply_retention(
+        postgres, keep=1, hot_months=1, archive_dir=str(tmp_path)
+    )
+
+    assert archived["ticket_analysis"] == 3
+    assert archived["analysis_runs"] == 1
+    with Session(postgres) as db:
+        kept = db.execute(select(TicketAnalysis.created_at)).scalars().all()
+        assert kept == [now]
+        runs = db.execute(select(AnalysisRun.id)).scalars().all()
+        assert runs == [new_run]
+        assert not db.scalar(
+            select(
+                func.to_regclass(f"ticket_analysis_y{old.year}m{old.month:02d}")
+            )
+        )
+    assert len(list(tmp_path.rglob("*.parquet"))) == 3
@@ -0,0 +1,54 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.orm import Session
+
+from app.agents.graph import add_run_stats
+from app.database import get_db_session
+from app.models import AnalysisRun
+
+
+def create_run(db: Session) -> str:
+    analysis_run = AnalysisRun(id=str(uuid.uuid4()), summary="test")
+    db.add(analysis_run)
+    db.commit()
+    return analysis_run.id
+
+
+def test_stats_add_up_and_rates_are_recomputed(tables):
+    db = get_db_session()
+    try:
+        run_id = create_run(db)
+        add_run_stats(db, run_id, {"llm_calls": 4, "hedged": 1})
+        stats = add_run_stats(db, run_id, {"llm_calls": 4, "hedged": 3}).stats
+    finally:
+        db.close()
+
+    assert stats["llm_calls"] == 8
+    assert stats["hedge_rate"] == 0.5
+
+
+def test_unknown_run_is_ignored(tables):
+    db = get_db_session()
+    try:
+        assert add_run_stats(db, str(uuid.uuid4()), {"llm_calls": 1}) is None
+    finally:
+        db.close()
+
+
+def test_concurrent_merges_lose_no_counts(postgres):
+    with Session(postgres) as db:
+        run_id = create_run(db)
+
+    def add_one(_):
+        with Session(postgres) as db:
+            add_run_stats(db, run_id, {"llm_calls": 1})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(add_one, range(40)))
+
+    with Session(postgres) as db:
+        analysis_run = (
+            db.query(AnalysisRun).filter(AnalysisRun.id == run_id).one()
+        )
+        assert analysis_run.stats["llm_calls"] == 40
@@ -0,0 +1,98 @@
+import uuid
+
+import pytest
+from pydantic import TypeAdapter
+from pydantic import ValidationError as PydanticValidationError
+from sqlalchemy import text
+from sqlalchemy.exc import StatementError
+
+from app.database import get_db_session
+from app.models import AnalysisRun, Ticket, TicketAnalysis
+from app.models.enums import Category, CodedEnum, Priority
+from app.schemas import AnalysisRequest
+from app.schemas.base import UUIDStr
+
+
+class TestCodedEnum:
+    def test_codes_are_label_positions(self):
+        coded = CodedEnum(Category)
+        assert coded.process_bind_param("billing", None) == 0
+        assert coded.process_bind_param("other", None) == 4
+        assert coded.process_result_value(1, None) == "bug"
+
+    def test_none_passes_through(self):
+        coded = CodedEnum(Priority)
+        assert coded.process_bind_param(None, None) is None
+        assert coded.process_result_value(None, None) is None
+
+    def test_unknown_label_is_rejected(self):
+        with pytest.raises(ValueError, match="Unknown value 'urgent'"):
+            CodedEnum(Priority).process_bind_param("urgent", None)
+
+    def test_round_trip_stores_smallint_codes(self, tables):
+        db = get_db_session()
+        try:
+            ticket = Ticket(title="Refund", description="Charged twice")
+            run = AnalysisRun(id=str(uuid.uuid4()), summary="test")
+            db.add_all([ticket, run])
+            db.flush()
+            db.add(
+                TicketAnalysis(
+                    analysis_run_id=run.id,
+                    ticket_id=ticket.id,
+                    category="billing",
+                    priority="low",
+                )
+            )
+            db.commit()
+
+            raw = db.execute(
+                text("SELECT category, priority FROM ticket_analysis")
+            ).one()
+            assert tuple(raw) == (0, 2)
+            status = db.execute(text("SELECT status FROM tickets")).scalar()
+            assert status == 0
+
+            db.expire_all()
+            analysis = db.query(TicketAnalysis).one()
+            assert (analysis.category, analysis.priority) == ("billing", "low")
+            assert db.query(Ticket).one().status == "incomplete"
+        finally:
+            db.close()
+
+    def test_unknown_label_fails_the_write(self, tables):
+        db = get_db_session()
+        try:
+            db.add(Ticket(title="x", description="y", status="archived"))
+            with pytest.raises(StatementError, match="Unknown value"):
+                db.commit()
+        finally:
+            db.rollback()
+            db.close()
+
+
+class TestUUIDStr:
+    adapter = TypeAdapter(UUIDStr)
+    canonical = "0f8fad5b-d9cb-469f-a165-70867728950e"
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "0f8fad5b-d9cb-469f-a165-70867728950e",
+            "0F8FAD5B-D9CB-469F-A165-70867728950E",
+            "0f8fad5bd9cb469fa16570867728950e",
+            "{0f8fad5b-d9cb-469f-a165-70867728950e}",
+            "urn:uuid:0f8fad5b-d9cb-469f-a165-70867728950e",
+        ],
+    )
+    def test_spellings_are_normalized(self, value):
+        assert self.adapter.validate_python(value) == self.canonical
+
+    @pytest.mark.parametrize("value", ["", "not-a-uuid", "0f8fad5b-d9cb"])
+    def test_malformed_ids_are_rejected(self, value):
+        with pytest.raises(PydanticValidationError):
+            self.adapter.validate_python(value)
+
+    def test_request_ticket_ids_are_normalized(self):
+        request = AnalysisRequest(ticket_ids=[self.canonical.upper()])
+        assert request.ticket_ids == [self.canonical]
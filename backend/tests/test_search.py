@@ -0,0 +1,64 @@
+import datetime as dt
+import uuid
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.database.search import decode_cursor, encode_cursor, search_tickets
+from app.exceptions import ValidationError
+from app.models import Ticket
+
+
+class TestCursor:
+    def test_rank_cursor_round_trips(self):
+        ticket_id = str(uuid.uuid4())
+        cursor = encode_cursor(0.25, ticket_id)
+        assert decode_cursor(cursor, "rank") == (0.25, ticket_id)
+
+    def test_recent_cursor_round_trips(self):
+        created_at = dt.datetime(2025, 3, 1, 12, 30)
+        ticket_id = str(uuid.uuid4())
+        cursor = encode_cursor(created_at, ticket_id)
+        assert decode_cursor(cursor, "recent") == (created_at, ticket_id)
+
+    @pytest.mark.parametrize(
+        "cursor",
+        ["garbage", encode_cursor(0.5, "not-a-uuid"), encode_cursor("x", "")],
+    )
+    def test_malformed_cursor_is_a_validation_error(self, cursor):
+        with pytest.raises(ValidationError):
+            decode_cursor(cursor, "rank")
+
+
+async def test_malformed_cursor_answers_400(client):
+    response = await client.get(
+        "/api/tickets/search", params={"q": "login", "cursor": "garbage"}
+    )
+    assert response.status_code == 400
+    assert "Invalid search cursor" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("sort", ["rank", "recent"])
+def test_pages_cover_every_match_once(postgres, sort):
+    with Session(postgres) as db:
+        db.add_all(
+            [
+                Ticket(title=f"Login broken {i}", description="Cannot log in")
+                for i in range(7)
+            ]
+            + [Ticket(title="Dark mode", description="Feature request")]
+        )
+        db.commit()
+
+        seen, cursor = [], None
+        while True:
+            page = search_tickets(
+                db, "login", sort=sort, cursor=cursor, limit=3
+            )
+            seen += [hit["id"] for hit in page["hits"]]
+            if not page["next_cursor"]:
+                break
+            cursor = page["next_cursor"]
+
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
@@ -0,0 +1,58 @@
+import asyncio
+import uuid
+
+from sqlalchemy import update
+
+import app.agents.claims as claims
+import app.agents.sharding as sharding
+from app.database import get_db_session
+from app.models import AnalysisShard, Ticket, utc_now
+
+
+def claim_expiries() -> list:
+    db = get_db_session()
+    try:
+        return [
+            ticket.claim_expires_at
+            for ticket in db.query(Ticket).order_by(Ticket.created_at)
+        ]
+    finally:
+        db.close()
+
+
+async def test_coordinator_keeps_all_claims_until_shards_finish(
+    tables, monkeypatch
+):
+    db = get_db_session()
+    db.add_all(
+        Ticket(title=f"Ticket {i}", description="Broken") for i in range(4)
+    )
+    db.commit()
+
+    monkeypatch.setattr(claims, "CLAIM_LEASE_SECONDS", 0.3)
+    seen = {}
+
+    async def slow_worker(worker_id, analysis_run_id, stop_when_idle):
+        # Longer than the lease, with no shard's own heartbeat running
+        await asyncio.sleep(0.6)
+        seen["now"] = utc_now()
+        seen["expiries"] = claim_expiries()
+        with get_db_session() as worker_db:
+            worker_db.execute(update(AnalysisShard).values(status="done"))
+            worker_db.commit()
+
+    async def no_summary(analysis_run_id, queue):
+        pass
+
+    monkeypatch.setattr(sharding, "run_shard_worker", slow_worker)
+    monkeypatch.setattr(sharding, "summarize_run", no_summary)
+
+    try:
+        await sharding.run_sharded_analysis(db, str(uuid.uuid4()), shard_size=2)
+    finally:
+        db.close()
+
+    assert len(seen["expiries"]) == 4
+    assert all(expiry > seen["now"] for expiry in seen["expiries"])
+    # Nothing was completed, so the claims are handed back at the end
+    assert claim_expiries() == [None] * 4
@@ -0,0 +1,41 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+# Generous for slow CI machines; importing the heavy modules below alone
+# takes well over this
+STARTUP_BUDGET_MS = 2000
+HEAVY_MODULES = ["langgraph", "openai", "numpy", "pyarrow", "httpx"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+print(json.dumps({
+    "ms": (time.perf_counter() - started) * 1000,
+    "modules": sorted(set(name.split(".")[0] for name in sys.modules)),
+}))
+"""
+
+
+def import_app() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+        env={**os.environ, "PYTHONPATH": "."},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_app_import_stays_light():
+    probes = [import_app() for _ in range(3)]
+
+    loaded = set(probes[0]["modules"]).intersection(HEAVY_MODULES)
+    assert not loaded, f"imported at startup: {sorted(loaded)}"
+    assert statistics.median(p["ms"] for p in probes) < STARTUP_BUDGET_MS
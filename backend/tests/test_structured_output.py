@@ -0,0 +1,176 @@
+import time
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import BadRequestError
+
+import app.agents.nodes as nodes
+import app.agents.utils as utils
+from app.agents.nodes import TicketStructuredOutput, get_analysis
+from app.agents.utils import get_structured_output, parse_partial_json
+from app.models import Ticket
+
+
+class TestParsePartialJson:
+    def test_plain_object(self):
+        assert parse_partial_json('{"a": 1}') == {"a": 1}
+
+    def test_code_fence_and_prose(self):
+        content = 'Sure!\n```json\n{"a": [1, 2]}\n```\nAnything else?'
+        assert parse_partial_json(content) == {"a": [1, 2]}
+
+    def test_brackets_in_prose_before_the_object(self):
+        content = 'Here is [note] then {"category": "bug"}'
+        assert parse_partial_json(content) == {"category": "bug"}
+
+    def test_parseable_list_in_prose_does_not_win_over_object(self):
+        content = 'See [1] for details: {"priority": "high"}'
+        assert parse_partial_json(content) == {"priority": "high"}
+
+    def test_braces_in_prose_before_the_object(self):
+        content = 'Use {placeholders} like this: {"notes": "ok"}'
+        assert parse_partial_json(content) == {"notes": "ok"}
+
+    def test_truncated_object_is_closed(self):
+        content = '{"category": "bug", "notes": "Crashes on sa'
+        assert parse_partial_json(content) == {
+            "category": "bug",
+            "notes": "Crashes on sa",
+        }
+
+    def test_truncated_outer_object_wins_over_inner_one(self):
+        content = '{"meta": {"a": 1}, "notes": "cut'
+        assert parse_partial_json(content) == {
+            "meta": {"a": 1},
+            "notes": "cut",
+        }
+
+    def test_array(self):
+        assert parse_partial_json("Results: [1, 2, 3") == [1, 2, 3]
+
+    @pytest.mark.parametrize("content", ["", "no json here", "{not: json}"])
+    def test_unparseable_raises_value_error(self, content):
+        with pytest.raises(ValueError):
+            parse_partial_json(content)
+
+
+def bad_request(message: str, param: str | None = None) -> BadRequestError:
+    request = httpx.Request("POST", "http://llm/v1/chat/completions")
+    return BadRequestError(
+        message,
+        response=httpx.Response(400, request=request),
+        body={"message": message, "param": param},
+    )
+
+
+class FakeClient:
+    """
+    Raises `errors` one by one, then answers `content`. Records the
+    response_format type of every call
+    """
+
+    def __init__(
+        self,
+        errors=(),
+        content='{"category": "bug", "priority": "high", "notes": "ok"}',
+    ):
+        self.errors = list(errors)
+        self.content = content
+        self.formats = []
+        self.chat = SimpleNamespace(completions=self)
+
+    async def create(self, **kwargs):
+        self.formats.append(kwargs.get("response_format", {}).get("type"))
+        if self.errors:
+            raise self.errors.pop(0)
+        message = SimpleNamespace(content=self.content, refusal=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def output_mode(monkeypatch):
+    monkeypatch.setattr(utils, "_structured_output_mode", "json_schema")
+    monkeypatch.setattr(utils, "_downgraded_at", 0.0)
+
+
+async def structured(client: FakeClient) -> dict:
+    return await get_structured_output(
+        client, [], TicketStructuredOutput, "model", 0, 100
+    )
+
+
+class TestOutputModeDowngrade:
+    async def test_steps_down_to_text(self, output_mode):
+        client = FakeClient(
+            [
+                bad_request("json_schema is not supported"),
+                bad_request("invalid", param="response_format"),
+            ]
+        )
+        assert (await structured(client))["category"] == "bug"
+        assert client.formats == ["json_schema", "json_object", None]
+        assert utils._structured_output_mode == "text"
+
+    async def test_downgrade_sticks_for_later_calls(self, output_mode):
+        await structured(FakeClient([bad_request("bad response_format")]))
+        client = FakeClient()
+        await structured(client)
+        assert client.formats == ["json_object"]
+
+    async def test_downgrade_expires(self, output_mode, monkeypatch):
+        await structured(FakeClient([bad_request("bad response_format")]))
+        monkeypatch.setattr(utils, "STRUCTURED_OUTPUT_RETRY_SECONDS", 0)
+        client = FakeClient()
+        await structured(client)
+        assert client.formats == ["json_schema"]
+
+    async def test_unrelated_bad_request_keeps_mode(self, output_mode):
+        client = FakeClient([bad_request("maximum context length exceeded")])
+        with pytest.raises(BadRequestError):
+            await structured(client)
+        assert utils._structured_output_mode == "json_schema"
+
+    async def test_text_mode_rejection_raises(self, output_mode, monkeypatch):
+        monkeypatch.setattr(utils, "_structured_output_mode", "text")
+        monkeypatch.setattr(utils, "_downgraded_at", time.monotonic())
+        with pytest.raises(BadRequestError):
+            await structured(FakeClient([bad_request("bad response_format")]))
+
+    async def test_loose_labels_are_normalized(self, output_mode):
+        client = FakeClient(
+            content='Result: {"category": "Feature Request", '
+            '"priority": "URGENT", "notes": "x"}'
+        )
+        result = await structured(client)
+        assert result["category"] == "feature_request"
+        assert result["priority"] == "medium"
+
+
+class TestKeywordFallback:
+    @pytest.fixture
+    def ticket(self):
+        return Ticket(
+            id=str(uuid.uuid4()),
+            title="Login broken",
+            description="Password reset fails",
+        )
+
+    async def test_llm_error_falls_back_to_keywords(self, ticket, monkeypatch):
+        async def failing(**kwargs):
+            raise RuntimeError("connection refused")
+
+        monkeypatch.setattr(nodes, "get_structured_llm_response", failing)
+        [result] = await get_analysis([ticket])
+        assert result == utils.default_categorizer(ticket)
+
+    async def test_unparseable_output_falls_back(self, ticket, monkeypatch):
+        async def garbage(**kwargs):
+            return await structured(FakeClient(content="I cannot help."))
+
+        monkeypatch.setattr(utils, "_structured_output_mode", "text")
+        monkeypatch.setattr(utils, "_downgraded_at", time.monotonic())
+        monkeypatch.setattr(nodes, "get_structured_llm_response", garbage)
+        [result] = await get_analysis([ticket])
+        assert result == utils.default_categorizer(ticket)
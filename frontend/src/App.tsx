@@ -70,7 +70,7 @@ const AppContent = () => {
     loadLatestAnalysis();
   }, []);
 
-  const pendingTickets = tickets.filter(t => t.status === 'incomplete');
+  const pendingTickets = tickets.filter(t => t.status !== 'complete');
   const analyzedTickets = tickets.filter(t => t.status === 'complete');
   console.log(pendingTickets)
   console.log(analyzedTickets)
@@ -1,5 +1,13 @@
 import axios from 'axios';
-import { Ticket, TicketCreate, AnalysisRun, AnalysisRequest } from '../types';
+import {
+  Ticket,
+  TicketCreate,
+  TicketSearchParams,
+  TicketSearchResponse,
+  AnalysisRun,
+  AnalysisRequest,
+  TrendReport,
+} from '../types';
 
 const api = axios.create({
   baseURL: '/api',
@@ -26,6 +34,17 @@ export const ticketApi = {
       throw new Error('Failed to fetch tickets');
     }
   },
+
+  searchTickets: async (
+    params: TicketSearchParams
+  ): Promise<TicketSearchResponse> => {
+    try {
+      const response = await api.get('/tickets/search', { params });
+      return response.data;
+    } catch (error) {
+      throw new Error('Failed to search tickets');
+    }
+  },
 };
 
 export const analysisApi = {
@@ -46,4 +65,13 @@ export const analysisApi = {
       return null;
     }
   },
+
+  getTrends: async (days = 30): Promise<TrendReport> => {
+    try {
+      const response = await api.get('/analysis/trends', { params: { days } });
+      return response.data;
+    } catch (error) {
+      throw new Error('Failed to load trends');
+    }
+  },
 };
\ No newline at end of file
@@ -3,16 +3,39 @@ export interface Ticket {
   title: string;
   description: string;
   created_at: string;
-  status: 'incomplete' | 'complete';
+  status: 'incomplete' | 'in_progress' | 'complete';
+  queue?: string | null;
   category?: string;
   priority?: string;
   notes?: string;
 }
 
+export interface TicketSearchHit extends Ticket {
+  rank: number;
+  highlights: Record<string, string | null>;
+}
+
+export interface TicketSearchResponse {
+  hits: TicketSearchHit[];
+  next_cursor: string | null;
+  facets: Record<string, Record<string, number>> | null;
+}
+
+export interface TicketSearchParams {
+  q: string;
+  category?: string;
+  priority?: string;
+  status?: string;
+  sort?: 'rank' | 'recent';
+  cursor?: string;
+  limit?: number;
+}
+
 export interface TicketCreate {
   title: string;
   description: string;
   status?: 'incomplete' | 'complete';
+  queue?: string;
 }
 
 export interface TicketAnalysis {
@@ -35,4 +58,31 @@ export interface AnalysisRun {
 
 export interface AnalysisRequest {
   ticket_ids?: string[];
-}
\ No newline at end of file
+  queue?: string;
+}
+
+export interface TrendEntry {
+  label: string;
+  count: number;
+  baseline: number;
+  ratio: number | null;
+  z_score: number;
+  ewma: number;
+  spike: boolean;
+  rising: boolean;
+}
+
+export interface TrendSpike {
+  date: string;
+  dimension: 'category' | 'priority';
+  label: string;
+  count: number;
+  baseline: number;
+  z_score: number;
+}
+
+export interface TrendReport {
+  as_of: string | null;
+  current: Record<string, TrendEntry[]>;
+  spikes: TrendSpike[];
+}